@@ -0,0 +1,163 @@
+"""
+Fuzzy autocomplete benchmark: per-keystroke latency vs. vocabulary size.
+
+Builds synthetic vocabularies of pronounceable words, then "types" queries
+one prefix at a time and times each fuzzy lookup. Workloads:
+  - typo: vocabulary words with one typo (many matches, lookups stop early)
+  - miss: random letter strings (few matches, the whole neighbourhood is searched)
+Implementations:
+  - legacy: the previous recursive match/substitute/insert/delete search on
+            the CompactTrie (unranked: stops at the first `limit` results it
+            runs into)
+  - dp:     search_fuzzy (banded Levenshtein row per trie node, closest
+            matches first) on the memory-mapped CompactTrie, whose completions
+            are precomputed per node
+  - dp-mem: search_fuzzy on the in-memory Trie (the delta tries and legacy
+            pickled models), which collects completions by subtree walk
+Reports p50 / p99 / max milliseconds per keystroke.
+
+Usage (from backend/):
+    python -m benchmarks.autocomplete_fuzzy
+    python -m benchmarks.autocomplete_fuzzy --sizes 1000 10000 100000 --distances 1 2
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from core.trie import CompactTrie, Trie
+
+SYLLABLES = [
+    c + v
+    for c in "bcdfghjklmnprstvwz"
+    for v in ("a", "e", "i", "o", "u", "ai", "ou", "ea")
+]
+
+
+def make_vocabulary(size: int, rng: random.Random):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+
+def with_typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[i + 1 :]
+
+
+def legacy_search_fuzzy(trie, pattern: str, max_distance: int, limit: int):
+    pattern = pattern.lower()
+    results = set()
+
+    def collect(node):
+        if len(results) >= limit:
+            return
+        entry = trie._entry(node)
+        if entry is not None:
+            word, _, phrases = entry
+            for p in phrases or [word]:
+                if len(results) >= limit:
+                    break
+                results.add(p)
+        for _, child in trie._children(node):
+            collect(child)
+
+    def dfs(node, index, edits_left):
+        if len(results) >= limit:
+            return
+        if index == len(pattern):
+            collect(node)
+            return
+        child = trie._child(node, pattern[index])
+        if child is not None:
+            dfs(child, index + 1, edits_left)
+        if edits_left > 0:
+            children = list(trie._children(node))
+            for _, child in children:
+                dfs(child, index + 1, edits_left - 1)
+            for _, child in children:
+                dfs(child, index, edits_left - 1)
+            dfs(node, index + 1, edits_left - 1)
+
+    dfs(trie._root(), 0, max_distance)
+    return list(results)
+
+
+def keystrokes(words, count: int, rng: random.Random, workload: str):
+    typed = []
+    for word in rng.sample(words, min(count, len(words))):
+        if workload == "typo":
+            word = with_typo(word, rng)
+        else:
+            word = "".join(rng.choice("qxyzwkv") for _ in range(len(word) + 2))
+        typed.extend(word[:n] for n in range(2, len(word) + 1))
+    return typed
+
+
+def time_calls(fn, prefixes):
+    timings = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        fn(prefix)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return (
+        timings[len(timings) // 2],
+        timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        timings[-1],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--distances", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--words", type=int, default=100, help="Words typed per run")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument(
+        "--workloads", nargs="+", choices=["typo", "miss"], default=["typo", "miss"]
+    )
+    parser.add_argument("--skip-legacy", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.setrecursionlimit(10000)
+
+    header = (
+        f"{'words':>7} {'load':>5} {'dist':>4} {'impl':>6} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        vocabulary = make_vocabulary(size, rng)
+        trie = Trie()
+        for word in vocabulary:
+            trie.insert(word)
+        compact = CompactTrie(trie.to_bytes())
+
+        for workload, distance in (
+            (w, d) for w in args.workloads for d in args.distances
+        ):
+            prefixes = keystrokes(vocabulary, args.words, random.Random(args.seed), workload)
+            impls = [
+                ("dp", lambda p: compact.search_fuzzy(p, distance, args.limit)),
+                ("dp-mem", lambda p: trie.search_fuzzy(p, distance, args.limit)),
+            ]
+            if not args.skip_legacy:
+                impls.insert(
+                    0,
+                    ("legacy", lambda p: legacy_search_fuzzy(compact, p, distance, args.limit)),
+                )
+            for name, fn in impls:
+                p50, p99, worst = time_calls(fn, prefixes)
+                print(
+                    f"{size:>7} {workload:>5} {distance:>4} {name:>6} "
+                    f"{p50:>8.3f} {p99:>8.3f} {worst:>8.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Decode benchmark: full-resolution decode vs. draft-mode (DCT-scaled) decode.
+
+For each synthetic JPEG size it runs, in a fresh process per case:
+  - full:  Image.open + full decode, then downscale to the target
+  - draft: core.utils._open_image(max_size=target), then downscale
+and reports wall time and peak RSS growth, both normalised per megapixel.
+
+Usage (from backend/):
+    python -m benchmarks.decode
+    python -m benchmarks.decode --megapixels 12 24 40 --target 1024 3000
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from PIL import Image, ImageOps
+
+from core.utils import _downscale, _open_image
+
+
+def make_jpeg(path: str, megapixels: float):
+    # 3:2 frame with smooth gradients so the JPEG compresses like a photo
+    height = int((megapixels * 1_000_000 / 1.5) ** 0.5)
+    width = int(height * 1.5)
+    size = (width, height)
+    image = Image.merge(
+        "RGB",
+        [
+            Image.linear_gradient("L").resize(size),
+            Image.radial_gradient("L").resize(size),
+            Image.linear_gradient("L").rotate(90).resize(size),
+        ],
+    )
+    image.save(path, format="JPEG", quality=90)
+    return size
+
+
+def _max_rss_mb() -> float:
+    # VmHWM is this process' own peak; ru_maxrss survives exec on Linux and
+    # would include the parent's peak from generating the test images.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_case(path: str, mode: str, target: int, queue):
+    with open(path, "rb") as f:
+        file_bytes = f.read()
+    baseline = _max_rss_mb()
+
+    start = time.perf_counter()
+    if mode == "full":
+        image = Image.open(io.BytesIO(file_bytes))
+        ImageOps.exif_transpose(image, in_place=True)
+        image.load()
+    else:
+        image = _open_image(file_bytes, target)
+        image.load()
+    decoded_size = image.size
+    _downscale(image, target)
+    elapsed = time.perf_counter() - start
+
+    queue.put((elapsed, _max_rss_mb() - baseline, decoded_size))
+
+
+def measure(path: str, mode: str, target: int, repeat: int):
+    ctx = multiprocessing.get_context("spawn")
+    timings, peaks = [], []
+    decoded_size = None
+    for _ in range(repeat):
+        queue = ctx.Queue()
+        process = ctx.Process(target=_run_case, args=(path, mode, target, queue))
+        process.start()
+        elapsed, peak, decoded_size = queue.get()
+        process.join()
+        timings.append(elapsed)
+        peaks.append(peak)
+    return min(timings), max(peaks), decoded_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[12, 24, 40])
+    parser.add_argument("--target", type=int, nargs="+", default=[1024, 2000, 3000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    header = (
+        f"{'MP':>5} {'target':>6} {'mode':>5} {'decoded':>11} "
+        f"{'ms':>8} {'ms/MP':>7} {'peak MB':>8} {'MB/MP':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+    with tempfile.TemporaryDirectory() as tmp:
+        for megapixels in args.megapixels:
+            path = os.path.join(tmp, f"{megapixels}mp.jpg")
+            width, height = make_jpeg(path, megapixels)
+            actual_mp = width * height / 1_000_000
+            for target in args.target:
+                for mode in ("full", "draft"):
+                    elapsed, peak, decoded = measure(path, mode, target, args.repeat)
+                    print(
+                        f"{actual_mp:>5.1f} {target:>6} {mode:>5} "
+                        f"{decoded[0]:>5}x{decoded[1]:<5} "
+                        f"{elapsed * 1000:>8.1f} {elapsed * 1000 / actual_mp:>7.2f} "
+                        f"{peak:>8.1f} {peak / actual_mp:>6.2f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
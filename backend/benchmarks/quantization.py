@@ -0,0 +1,204 @@
+"""
+Quantization benchmark: recall@k, latency and Qdrant memory per storage layout.
+
+Copies a sample of points (dense-image / dense-text vectors) from the live
+collection into one scratch collection per layout, then queries image vectors
+with text vectors, the way /search does. Ground truth is an exact (brute
+force) float32 search. Memory is the growth of the Qdrant server's resident
+set (`memory_resident_bytes` from its /metrics endpoint), so run it against a
+quiet, non-production Qdrant.
+
+Usage (from backend/):
+    python -m benchmarks.quantization
+    python -m benchmarks.quantization --sample 50000 --layouts none scalar binary scalar+disk
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+from qdrant_client import models
+
+from core.config import settings
+from core.db import QdrantClientWrapper
+
+
+async def load_sample(client, size: int):
+    """
+    (image_vectors, text_vectors) for up to `size` points of the live collection.
+    """
+    images, texts = [], []
+    offset = None
+    while len(images) < size:
+        points, offset = await client.scroll(
+            collection_name=settings.COLLECTION_NAME,
+            limit=min(256, size - len(images)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=["dense-image", "dense-text"],
+        )
+        for point in points:
+            images.append(point.vector["dense-image"])
+            texts.append(point.vector["dense-text"])
+        if offset is None:
+            break
+    return images, texts
+
+
+def synthetic_sample(size: int, dims: int):
+    # Text vectors are noisy copies of image vectors, so neighbours exist
+    images = [[random.gauss(0, 1) for _ in range(dims)] for _ in range(size)]
+    texts = [[x + random.gauss(0, 0.5) for x in vector] for vector in images]
+    return images, texts
+
+
+async def server_rss_mb() -> float:
+    headers = {"api-key": settings.QDRANT_API_KEY} if settings.QDRANT_API_KEY else {}
+    async with httpx.AsyncClient(timeout=10) as http:
+        response = await http.get(f"{settings.QDRANT_URL}/metrics", headers=headers)
+    for line in response.text.splitlines():
+        if line.startswith("memory_resident_bytes"):
+            return float(line.split()[-1]) / 1024 / 1024
+    return float("nan")
+
+
+async def wait_green(client, name: str):
+    while (await client.get_collection(name)).status != "green":
+        await asyncio.sleep(1)
+
+
+async def query_all(client, name, queries, k, params):
+    results, timings = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        response = await client.query_points(
+            collection_name=name,
+            query=vector,
+            using="dense-image",
+            limit=k,
+            search_params=params,
+        )
+        timings.append(time.perf_counter() - start)
+        results.append([point.id for point in response.points])
+    timings.sort()
+    p50 = timings[len(timings) // 2] * 1000
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+    return results, p50, p99
+
+
+def recall(results, truth, k) -> float:
+    hits = sum(len(set(r[:k]) & set(t[:k])) for r, t in zip(results, truth))
+    return hits / (k * len(truth))
+
+
+async def run(args):
+    qdrant_wrapper = QdrantClientWrapper()
+    client = qdrant_wrapper.client
+    try:
+        if args.synthetic:
+            images, texts = synthetic_sample(args.sample, args.dims)
+        else:
+            images, texts = await load_sample(client, args.sample)
+        if not images:
+            print("No points in the collection; use --synthetic.")
+            return
+        queries = random.sample(texts, min(args.queries, len(texts)))
+        print(f"{len(images)} points, {len(queries)} queries, k={args.k}")
+
+        header = (
+            f"{'layout':>12} {'rescore':>7} {'recall':>7} "
+            f"{'p50 ms':>7} {'p99 ms':>7} {'RSS MB':>7}"
+        )
+        print(header)
+        print("-" * len(header))
+
+        truth = None
+        for layout in args.layouts:
+            quantization, _, disk = layout.partition("+")
+            name = f"{settings.COLLECTION_NAME}_bench_{quantization}_{disk or 'ram'}"
+            params = qdrant_wrapper.dense_vector_params(len(images[0]), quantization)
+            params.on_disk = disk == "disk"
+
+            if await client.collection_exists(name):
+                await client.delete_collection(name)
+            rss_before = await server_rss_mb()
+            await client.create_collection(
+                collection_name=name,
+                vectors_config={"dense-image": params},
+                # Build HNSW even for small samples instead of full-scanning
+                optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),
+            )
+            try:
+                for start in range(0, len(images), 256):
+                    await client.upsert(
+                        collection_name=name,
+                        points=[
+                            models.PointStruct(id=i, vector={"dense-image": images[i]})
+                            for i in range(start, min(start + 256, len(images)))
+                        ],
+                    )
+                await wait_green(client, name)
+                rss = await server_rss_mb() - rss_before
+
+                if truth is None:
+                    truth, _, _ = await query_all(
+                        client,
+                        name,
+                        queries,
+                        args.k,
+                        models.SearchParams(
+                            exact=True,
+                            quantization=models.QuantizationSearchParams(ignore=True),
+                        ),
+                    )
+
+                rescore_options = [True, False] if quantization != "none" else [None]
+                for rescore in rescore_options:
+                    search_params = None
+                    if rescore is not None:
+                        search_params = models.SearchParams(
+                            quantization=models.QuantizationSearchParams(
+                                rescore=rescore,
+                                oversampling=args.oversampling if rescore else None,
+                            )
+                        )
+                    results, p50, p99 = await query_all(
+                        client, name, queries, args.k, search_params
+                    )
+                    print(
+                        f"{layout:>12} {str(rescore if rescore is not None else '-'):>7} "
+                        f"{recall(results, truth, args.k):>7.3f} "
+                        f"{p50:>7.2f} {p99:>7.2f} {rss:>7.1f}"
+                    )
+            finally:
+                await client.delete_collection(name)
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sample", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--oversampling", type=float, default=settings.QDRANT_QUANTIZATION_OVERSAMPLING
+    )
+    parser.add_argument(
+        "--layouts",
+        nargs="+",
+        default=["none", "scalar", "binary", "scalar+disk", "binary+disk"],
+        help="<none|scalar|binary>[+disk]; the first one should be 'none'",
+    )
+    parser.add_argument(
+        "--synthetic", action="store_true", help="Random vectors instead of live data"
+    )
+    parser.add_argument("--dims", type=int, default=settings.JINA_DIMENSIONS)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import fcntl
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from core.config import settings
+
+# Pointer to the newest published version, next to the version directories
+LATEST = "LATEST"
+# `expected` for an unconditional publish (whatever LATEST names)
+ANY_VERSION = "*"
+
+
+class PublishConflict(Exception):
+    """LATEST moved on since the version a publish was based on."""
+
+    def __init__(self, expected: Optional[str], latest: Optional[str]):
+        super().__init__(f"LATEST is {latest!r}, expected {expected!r}")
+        self.expected = expected
+        self.latest = latest
+
+
+def new_version() -> str:
+    """Sortable, unique version id: UTC timestamp (ms) plus a random suffix."""
+    now = time.time()
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now))
+    return f"{stamp}.{int(now * 1000) % 1000:03d}Z-{uuid.uuid4().hex[:8]}"
+
+
+class LocalArtifactStore:
+    """
+    Versioned artifacts in a directory: <directory>/<version>/<name>, plus a
+    LATEST file naming the newest version. Shared by every worker on the host
+    (or on a shared volume); also the stand-in for the object store in tests.
+    """
+
+    def __init__(self, directory: str, keep: int = 3):
+        self.directory = directory
+        self.keep = keep
+
+    def publish(self, files: Dict[str, str], expected: Optional[str] = ANY_VERSION) -> str:
+        """
+        Copy `files` (name -> local path) as a new version and point LATEST at
+        it, provided LATEST still names `expected` (None: nothing published
+        yet); else raises PublishConflict and the copy is dropped.
+        """
+        version = new_version()
+        version_dir = os.path.join(self.directory, version)
+        os.makedirs(version_dir, exist_ok=True)
+        for name, path in files.items():
+            shutil.copyfile(path, os.path.join(version_dir, name))
+        with self._locked():
+            latest = self.latest()
+            if expected != ANY_VERSION and latest != expected:
+                shutil.rmtree(version_dir, ignore_errors=True)
+                raise PublishConflict(expected, latest)
+            _write_atomic(os.path.join(self.directory, LATEST), version.encode())
+        self.prune()
+        return version
+
+    @contextmanager
+    def _locked(self):
+        """Serialises check-and-set of LATEST across processes sharing the directory."""
+        with open(os.path.join(self.directory, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def latest(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, LATEST)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def fetch(self, version: str, name: str, dest: str):
+        """Copy one artifact of `version` to `dest` atomically."""
+        tmp_path = f"{dest}.tmp.{os.getpid()}"
+        shutil.copyfile(os.path.join(self.directory, version, name), tmp_path)
+        os.replace(tmp_path, dest)
+
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            entry
+            for entry in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, entry))
+        )
+
+    def prune(self):
+        """Drop all but the newest `keep` versions (readers fetch, not map, these)."""
+        latest = self.latest()
+        for version in self.versions()[: -self.keep]:
+            if version == latest:
+                continue
+            shutil.rmtree(os.path.join(self.directory, version), ignore_errors=True)
+
+
+class R2ArtifactStore:
+    """
+    Versioned artifacts in the R2 bucket under `prefix`, laid out like
+    LocalArtifactStore, so replicas on separate machines share one build.
+    """
+
+    def __init__(self, client, bucket: str, prefix: str, keep: int = 3):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+        self.keep = keep
+
+    def _key(self, *parts: str) -> str:
+        return "/".join((self.prefix, *parts))
+
+    def publish(self, files: Dict[str, str], expected: Optional[str] = ANY_VERSION) -> str:
+        """
+        Like LocalArtifactStore.publish; the LATEST check is a conditional PUT
+        (If-Match on the ETag it was read with, If-None-Match when unset).
+        """
+        version = new_version()
+        for name, path in files.items():
+            self.client.upload_file(path, self.bucket, self._key(version, name))
+        condition = {}
+        if expected is None:
+            condition = {"IfNoneMatch": "*"}
+        elif expected != ANY_VERSION:
+            latest, etag = self._latest_object()
+            if latest != expected:
+                self._delete_version(version)
+                raise PublishConflict(expected, latest)
+            condition = {"IfMatch": etag}
+        # Written last: readers never see a version with missing files
+        try:
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=self._key(LATEST),
+                Body=version.encode(),
+                ContentType="text/plain",
+                CacheControl="no-store",
+                **condition,
+            )
+        except self.client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("PreconditionFailed", "412"):
+                raise
+            self._delete_version(version)
+            raise PublishConflict(expected, self.latest()) from e
+        self.prune()
+        return version
+
+    def latest(self) -> Optional[str]:
+        return self._latest_object()[0]
+
+    def _latest_object(self) -> Tuple[Optional[str], Optional[str]]:
+        """LATEST's version and ETag."""
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(LATEST))
+        except self.client.exceptions.NoSuchKey:
+            return None, None
+        return response["Body"].read().decode().strip() or None, response["ETag"]
+
+    def fetch(self, version: str, name: str, dest: str):
+        tmp_path = f"{dest}.tmp.{os.getpid()}"
+        self.client.download_file(self.bucket, self._key(version, name), tmp_path)
+        os.replace(tmp_path, dest)
+
+    def versions(self) -> List[str]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        versions = set()
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}/"):
+            for obj in page.get("Contents", []):
+                version, _, name = obj["Key"][len(self.prefix) + 1 :].partition("/")
+                if name:
+                    versions.add(version)
+        return sorted(versions)
+
+    def prune(self):
+        latest = self.latest()
+        for version in self.versions()[: -self.keep]:
+            if version == latest:
+                continue
+            self._delete_version(version)
+
+    def _delete_version(self, version: str):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(version, "")):
+            keys = [{"Key": obj["Key"]} for obj in page.get("Contents", [])]
+            if keys:
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": keys})
+
+
+def create_artifact_store():
+    """
+    The configured artifact store (AUTOCOMPLETE_ARTIFACT_STORE): "local",
+    "r2", or None for "none".
+    """
+    kind = settings.AUTOCOMPLETE_ARTIFACT_STORE
+    if kind == "local":
+        return LocalArtifactStore(settings.AUTOCOMPLETE_ARTIFACT_DIR)
+    if kind == "r2":
+        # Imported here: the R2 client is only needed for this store
+        from core.storage import s3
+
+        return R2ArtifactStore(s3, settings.CF_BUCKET, settings.AUTOCOMPLETE_ARTIFACT_PREFIX)
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown AUTOCOMPLETE_ARTIFACT_STORE: {kind!r}")
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -1,13 +1,36 @@
 import os
 import re
+import json
 import string
 import asyncio
-from typing import List
-from core.trie import Trie
+import multiprocessing
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+from core.trie import Trie, load_trie
+from core.artifacts import ANY_VERSION, PublishConflict, create_artifact_store
+from core.cache import LRUCache, normalize_query
 from core.config import settings
 
-# Define the path for the serialized model
-TRIE_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "trie_model.pkl")
+# Define the path for the serialized model (compact binary, memory-mapped)
+TRIE_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "trie_model.bin")
+# Pickled object Trie written by older versions; converted on first startup
+LEGACY_TRIE_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "trie_model.pkl")
+# Phrase detector unigram / bigram counts matching the saved model
+PHRASE_COUNTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "phrase_counts.json")
+# Texts added since the model was saved, one JSON list per line; folded into
+# the model by compaction. Each process appends to its own "<path>.<pid>".
+DELTA_LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "trie_delta.jsonl")
+# Published artifact version the saved model came from
+VERSION_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "trie_model.version")
+# Artifact names in the store
+MODEL_ARTIFACT = "trie_model.bin"
+COUNTS_ARTIFACT = "phrase_counts.json"
+# Folds of one compaction onto a newer LATEST after losing a publish race
+COMPACT_PUBLISH_ATTEMPTS = 3
 
 # Define a minimal set of stop words for autocomplete logic
 STOP_WORDS = {
@@ -52,43 +75,100 @@ class SimplePhraseDetector:
                     bg = f"{w1} {w2}"
                     self.bigram_counts[bg] = self.bigram_counts.get(bg, 0) + 1
 
+    def is_phrase(self, bg: str) -> bool:
+        """Whether the bigram "w1 w2" currently scores as a phrase."""
+        count = self.bigram_counts.get(bg, 0)
+        if count < self.min_count:
+            return False
+
+        w1, w2 = bg.split(" ")
+        count1 = self.vocab.get(w1, 0)
+        count2 = self.vocab.get(w2, 0)
+
+        if count1 == 0 or count2 == 0: return False
+
+        # Score formula: (bigram_count - min) * N / (count1 * count2)
+        score = (count - self.min_count) * len(self.vocab) / (count1 * count2)
+        return score > self.threshold
+
     def get_phrases(self):
         """Pass 2: Identify phrases based on score."""
-        phrases = set()
-        vocab_len = len(self.vocab)
-        
-        for bg, count in self.bigram_counts.items():
-            if count < self.min_count:
-                continue
-            
-            w1, w2 = bg.split(" ")
-            count1 = self.vocab.get(w1, 0)
-            count2 = self.vocab.get(w2, 0)
-            
-            if count1 == 0 or count2 == 0: continue
-            
-            # Score formula: (bigram_count - min) * N / (count1 * count2)
-            score = (count - self.min_count) * vocab_len / (count1 * count2)
-            
-            if score > self.threshold:
-                phrases.add(bg)
-        
+        phrases = {bg for bg in self.bigram_counts if self.is_phrase(bg)}
         print(f"Learned {len(phrases)} common phrases (e.g. {list(phrases)[:5] if phrases else 'None'})")
         return phrases
 
+    def save(self, filepath: str):
+        """Write the counts atomically, so learning can resume after a restart."""
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        tmp_path = f"{filepath}.tmp.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump({"vocab": self.vocab, "bigram_counts": self.bigram_counts}, f)
+        os.replace(tmp_path, filepath)
+
+    def load(self, filepath: str):
+        with open(filepath) as f:
+            counts = json.load(f)
+        self.vocab = counts["vocab"]
+        self.bigram_counts = counts["bigram_counts"]
+
 class AutocompleteManager:
+    """
+    Serves the saved (memory-mapped) model plus an in-memory delta trie of
+    texts added since. Added texts are appended to a delta log, replayed on
+    startup, and periodically compacted into a new saved model.
+
+    Built and compacted models are published to the artifact store as a new
+    version; every worker / replica polls for newer versions and swaps them
+    in, so one build serves the fleet and cold replicas download instead of
+    rebuilding.
+    """
     def __init__(self):
         self.trie = Trie()
         self.is_ready = False
         self.model_path = TRIE_MODEL_PATH
         self.learned_phrases = set() # Store verified bigrams
+        self.detector = SimplePhraseDetector(stop_words=STOP_WORDS)
+        self.delta = Trie()  # Texts added since the model was saved
+        self.compacting_delta: Optional[Trie] = None  # Being folded into the model
+        self.delta_texts = 0
+        self.folds = 0  # Times the delta log was handed to a fold
+        # Per process: workers sharing the data dir each fold only their own texts
+        self.delta_log = f"{DELTA_LOG_PATH}.{os.getpid()}"
+        self._lock = threading.Lock()  # Guards the swap of model / delta tries
+        self._compaction: Optional[asyncio.Task] = None
+        self._build: Optional[asyncio.Task] = None
+        self.build_status: dict = {"state": "idle"}
+        self.artifact_store = None
+        self.version: Optional[str] = None  # Published version being served
+        # Finished suggestion lists by (index_version, normalised query)
+        self.index_version = 0  # Bumped whenever the served tries change
+        self.cache = LRUCache(maxsize=settings.AUTOCOMPLETE_CACHE_SIZE)
+        self.counters = {"hits": 0, "misses": 0, "partial": 0}
+        self.latencies_ms = deque(maxlen=settings.AUTOCOMPLETE_LATENCY_WINDOW)
 
     def initialize(self):
         """Attempts to load the model from disk on startup."""
+        if os.path.exists(VERSION_PATH):
+            with open(VERSION_PATH) as f:
+                self.version = f.read().strip() or None
+
+        # Start from the newest published model when there is one
+        try:
+            self.artifact_store = create_artifact_store()
+            latest = self._newer_version()
+            if latest:
+                print(f"Fetching published autocomplete model {latest}...")
+                self._install(latest, *self._download(latest))
+        except Exception as e:
+            print(f"Failed to fetch published autocomplete model: {e}")
+
+        if not os.path.exists(self.model_path) and os.path.exists(LEGACY_TRIE_MODEL_PATH):
+            self._convert_legacy_model()
+
         if os.path.exists(self.model_path):
             print(f"Loading autocomplete model from {self.model_path}...")
             try:
-                self.trie = Trie.load(self.model_path)
+                self.trie = load_trie(self.model_path)
                 self.is_ready = True
                 print("Autocomplete model loaded successfully.")
             except Exception as e:
@@ -96,79 +176,508 @@ class AutocompleteManager:
         else:
             print("No autocomplete model found. Please trigger build via /api/autocomplete/build.")
 
+        try:
+            self.detector = self._load_detector()
+            self.learned_phrases = self.detector.get_phrases()
+        except Exception as e:
+            print(f"Failed to load phrase counts: {e}")
+
+        # Replay texts added since the model was saved (an interrupted
+        # compaction leaves its log behind), including logs of exited workers
+        self._claim_orphan_logs()
+        for path in (f"{self.delta_log}.compacting", self.delta_log):
+            replayed = [text for texts in self._read_delta_log(path) for text in texts]
+            if replayed:
+                self._apply_texts(replayed)
+        if self.delta_texts:
+            self.is_ready = True
+            print(f"Replayed {self.delta_texts} autocomplete texts from the delta log.")
+
+    def _claim_orphan_logs(self):
+        """
+        Take over delta logs of processes that are gone (and the shared log of
+        older versions): their texts join this process's `.compacting` log,
+        to be replayed and folded by it. Claiming is a rename, so when several
+        workers start at once each orphan goes to exactly one of them.
+        """
+        directory = os.path.dirname(DELTA_LOG_PATH)
+        name = os.path.basename(DELTA_LOG_PATH)
+        if not os.path.isdir(directory):
+            return
+        claim_path = f"{self.delta_log}.claim"
+        for entry in sorted(os.listdir(directory)):
+            if not entry.startswith(name):
+                continue
+            path = os.path.join(directory, entry)
+            if path in (self.delta_log, f"{self.delta_log}.compacting"):
+                continue
+            owner = entry[len(name) :].lstrip(".").split(".")[0]
+            if owner.isdigit() and int(owner) != os.getpid() and _pid_alive(int(owner)):
+                continue
+            if path != claim_path:  # Else left by a claim this pid did not finish
+                try:
+                    os.rename(path, claim_path)
+                except FileNotFoundError:
+                    continue  # Claimed by another worker
+            with open(claim_path) as src, open(f"{self.delta_log}.compacting", "a") as dst:
+                lines = src.read()
+                dst.write(lines if not lines or lines.endswith("\n") else f"{lines}\n")
+            os.remove(claim_path)
+            print(f"Claimed autocomplete delta log {entry}.")
+
+    @staticmethod
+    def _read_delta_log(path: str) -> Iterable[List[str]]:
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Torn last line after a crash
+                    continue
+
+    async def add_texts(self, texts: List[Optional[str]]):
+        """
+        Make a new image's title / description suggestible right away:
+        O(text length) work on the delta trie, one appended log line.
+        """
+        texts = [text for text in texts if text]
+        if not texts:
+            return
+        # Off the event loop: compaction / reload threads take the same lock
+        await asyncio.to_thread(self._add_texts, texts)
+
+        if self.delta_texts >= settings.AUTOCOMPLETE_COMPACT_EVERY and (
+            self._compaction is None or self._compaction.done()
+        ):
+            self._compaction = asyncio.create_task(asyncio.to_thread(self.compact))
+
+    async def flush(self):
+        """
+        Fold all added texts into the saved (and published) model, e.g. before
+        a short-lived process exits. A failed fold leaves the log to be
+        claimed by the next worker that starts.
+        """
+        if self._compaction is not None:
+            await self._compaction
+        if self.delta_texts:
+            await asyncio.to_thread(self.compact)
+
+    def _add_texts(self, texts: List[str]):
+        tokenized = [self._tokenize_to_sentences(text) for text in texts]
+        with self._lock:
+            # Appended under the lock, so a fold takes the line together with
+            # the texts it freezes
+            try:
+                os.makedirs(os.path.dirname(self.delta_log), exist_ok=True)
+                with open(self.delta_log, "a") as f:
+                    f.write(json.dumps(texts) + "\n")
+            except OSError as e:
+                print(f"Failed to append to autocomplete delta log: {e}")
+            self._apply_texts(texts, tokenized)
+            self.is_ready = True
+            self.index_version += 1
+
+    def _apply_texts(self, texts: List[str], tokenized: Optional[List[List[List[str]]]] = None):
+        """
+        Update phrase counts, promote new phrases, insert into the delta trie.
+        Suggestions read the delta and phrases without the lock, so they are
+        updated as copies and swapped in.
+        """
+        delta = self.delta.copy()
+        phrases = set(self.learned_phrases)
+        for sentences in tokenized or map(self._tokenize_to_sentences, texts):
+            self._learn(self.detector, phrases, sentences)
+            self._insert_sentences(sentences, trie=delta, phrases=phrases)
+        self.delta, self.learned_phrases = delta, phrases
+        self.delta_texts += len(texts)
+
+    @staticmethod
+    def _learn(detector: SimplePhraseDetector, phrases: set, sentences: List[List[str]]):
+        """Count `sentences` and promote bigrams that became phrases."""
+        detector.learn_vocab(sentences)
+        # Only bigrams of these sentences can have crossed the threshold
+        for words in sentences:
+            for w1, w2 in zip(words, words[1:]):
+                bg = f"{w1} {w2}"
+                if bg not in phrases and detector.is_phrase(bg):
+                    phrases.add(bg)
+
+    def compact(self):
+        """
+        Fold the delta trie into a new saved model (runs in a worker thread)
+        and publish it. Texts added meanwhile go to a fresh delta trie and log.
+
+        The new version is published only if LATEST is still the version it
+        was folded onto; when another worker published first, the fold is
+        redone on top of that. The delta log is kept until the publish lands.
+        """
+        pending = self._begin_fold()
+        if pending is None:
+            return  # Another compaction or a rebuild is in progress
+
+        # Own files: other workers save, install and publish concurrently
+        model_tmp = _temp_path(self.model_path)
+        counts_tmp = _temp_path(PHRASE_COUNTS_PATH)
+        try:
+            for attempt in range(1, COMPACT_PUBLISH_ATTEMPTS + 1):
+                based_on = self.artifact_store.latest() if self.artifact_store else None
+                self._fold(pending, based_on, model_tmp, counts_tmp)
+                try:
+                    version = self._publish(model_tmp, counts_tmp, expected=based_on)
+                    break
+                except PublishConflict as e:
+                    if attempt == COMPACT_PUBLISH_ATTEMPTS:
+                        raise
+                    print(f"Autocomplete publish conflict ({e}); folding again.")
+            model = load_trie(model_tmp)
+            os.replace(model_tmp, self.model_path)
+            os.replace(counts_tmp, PHRASE_COUNTS_PATH)
+        except Exception as e:
+            # Keep serving the pending texts; the next compaction retries
+            print(f"Autocomplete compaction failed: {e}")
+            self._abort_fold(pending)
+            return
+        finally:
+            for path in (model_tmp, counts_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        self._reset_detector()
+        # The saved model is `version` (None: no artifact store)
+        self._finish_fold(model, version=version)
+        print(f"Compacted autocomplete delta into {self.model_path}.")
+
+    def _fold(self, pending: Trie, based_on: Optional[str], model_path: str, counts_path: str):
+        """
+        Save the model of version `based_on` plus the `pending` texts to
+        `model_path`, with matching phrase counts. The served model is only
+        read: it and the version change at the swap.
+        """
+        base, base_counts = self.trie, None
+        downloaded = ()
+        try:
+            if based_on and based_on != self.version:
+                downloaded = model_tmp, base_counts = self._download(based_on)
+                base = load_trie(model_tmp)
+            merged = Trie()
+            merged.merge(base)
+            merged.merge(pending)
+            detector = self._load_detector(f"{self.delta_log}.compacting", counts_path=base_counts)
+            merged.save(model_path)
+            detector.save(counts_path)
+        finally:
+            for path in downloaded:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _begin_fold(self) -> Optional[Trie]:
+        """
+        Freeze the delta trie (and its log) for folding into a new model; it is
+        still searched until `_finish_fold`. None if a fold is already running.
+        """
+        with self._lock:
+            if self.compacting_delta is not None:
+                return None
+            pending, self.delta = self.delta, Trie()
+            self.compacting_delta = pending
+            self.delta_texts = 0
+            self.folds += 1
+            compacting_log = f"{self.delta_log}.compacting"
+            if os.path.exists(self.delta_log):
+                if os.path.exists(compacting_log):
+                    # Left by a failed fold: keep both
+                    with open(self.delta_log) as src, open(compacting_log, "a") as dst:
+                        dst.write(src.read())
+                    os.remove(self.delta_log)
+                else:
+                    os.replace(self.delta_log, compacting_log)
+            return pending
+
+    def _finish_fold(self, model, version: Optional[str] = None):
+        with self._lock:
+            self.trie = model
+            if version:
+                self._set_version(version)
+            self.compacting_delta = None
+            self.is_ready = True
+            self.index_version += 1
+            try:
+                os.remove(f"{self.delta_log}.compacting")
+            except FileNotFoundError:
+                pass
+
+    def _abort_fold(self, pending: Trie):
+        with self._lock:
+            delta = self.delta.copy()
+            delta.merge(pending)
+            self.delta = delta
+            self.compacting_delta = None
+
+    def _load_detector(self, *log_paths: str, counts_path: Optional[str] = None) -> SimplePhraseDetector:
+        """Counts matching the saved model (or `counts_path`), plus the texts in `log_paths`."""
+        detector = SimplePhraseDetector(stop_words=STOP_WORDS)
+        counts_path = counts_path or PHRASE_COUNTS_PATH
+        if os.path.exists(counts_path):
+            detector.load(counts_path)
+        for path in log_paths:
+            self._learn_log(detector, None, path)
+        return detector
+
+    def _reset_detector(self):
+        """After a new model is saved: its counts plus texts added since."""
+        prepared = self._prepare_detector()
+        with self._lock:
+            self._swap_detector(prepared)
+
+    def _prepare_detector(self, counts_path: Optional[str] = None):
+        """
+        The slow part of a detector reset, without the lock: load the counts,
+        learn the delta log as far as it is written, find the phrases.
+        """
+        folds = self.folds
+        detector = self._load_detector(counts_path=counts_path)
+        offset = self._learn_log(detector, None, self.delta_log)
+        return detector, detector.get_phrases(), folds, offset
+
+    def _swap_detector(self, prepared):
+        """Catch a prepared detector up with lines logged since, and use it (lock held)."""
+        detector, phrases, folds, offset = prepared
+        if folds != self.folds:
+            # The log it read was folded away meanwhile (not expected: resets
+            # run while this process's fold is pending); start over
+            detector = self._load_detector(self.delta_log)
+            phrases = detector.get_phrases()
+        else:
+            self._learn_log(detector, phrases, self.delta_log, offset)
+        self.detector = detector
+        self.learned_phrases = phrases
+
+    def _learn_log(self, detector: SimplePhraseDetector, phrases: Optional[set], path: str, offset: int = 0) -> int:
+        """
+        Learn the complete lines of the delta log at `path` from byte `offset`
+        (promoting phrases into `phrases` if given); returns the offset read to.
+        """
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return offset
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                texts = json.loads(line)
+            except ValueError:
+                continue  # Torn line after a crash
+            for text in texts:
+                sentences = self._tokenize_to_sentences(text)
+                if phrases is None:
+                    detector.learn_vocab(sentences)
+                else:
+                    self._learn(detector, phrases, sentences)
+        return offset + end
+
+    # --- Published artifacts ---
+
+    def _newer_version(self) -> Optional[str]:
+        if self.artifact_store is None:
+            return None
+        latest = self.artifact_store.latest()
+        return latest if latest and latest != self.version else None
+
+    def _download(self, version: str):
+        """Fetch a published model and its counts next to the saved ones."""
+        # Per process: workers may fetch the same version at once
+        model_tmp = f"{self.model_path}.{version}.{os.getpid()}"
+        counts_tmp = f"{PHRASE_COUNTS_PATH}.{version}.{os.getpid()}"
+        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        self.artifact_store.fetch(version, MODEL_ARTIFACT, model_tmp)
+        self.artifact_store.fetch(version, COUNTS_ARTIFACT, counts_tmp)
+        return model_tmp, counts_tmp
+
+    def _install(self, version: str, model_tmp: str, counts_tmp: str):
+        """Open a downloaded version and move it into place (not yet served)."""
+        # Opened first: another worker may replace the saved model meanwhile
+        model = load_trie(model_tmp)
+        os.replace(model_tmp, self.model_path)
+        os.replace(counts_tmp, PHRASE_COUNTS_PATH)
+        self._set_version(version)
+        return model
+
+    def _set_version(self, version: Optional[str]):
+        self.version = version
+        tmp_path = f"{VERSION_PATH}.tmp.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            f.write(version or "")
+        os.replace(tmp_path, VERSION_PATH)
+
+    def _publish(self, model_path: str, counts_path: str, expected: Optional[str] = ANY_VERSION) -> Optional[str]:
+        """
+        Publish a saved model and its counts as a new version for every worker
+        (None without an artifact store). Raises PublishConflict when LATEST
+        no longer names `expected`.
+        """
+        if self.artifact_store is None:
+            return None
+        version = self.artifact_store.publish(
+            {MODEL_ARTIFACT: model_path, COUNTS_ARTIFACT: counts_path}, expected=expected
+        )
+        print(f"Published autocomplete model {version}.")
+        return version
+
+    def reload_if_newer(self) -> bool:
+        """
+        Swap in a newer published model (blocking I/O: run in a thread).
+        In-flight suggestions finish on the old one. Local texts not yet
+        compacted stay in the delta trie.
+        """
+        latest = self._newer_version()
+        if latest is None or self.compacting_delta is not None:
+            return False  # Up to date, or a fold will pick it up
+        model_tmp, counts_tmp = self._download(latest)
+        prepared = self._prepare_detector(counts_tmp)
+        with self._lock:
+            if self.compacting_delta is not None:
+                for path in (model_tmp, counts_tmp):
+                    os.remove(path)
+                return False
+            self.trie = self._install(latest, model_tmp, counts_tmp)
+            self._swap_detector(prepared)
+            self.is_ready = True
+            self.index_version += 1
+        print(f"Loaded published autocomplete model {latest}.")
+        return True
+
+    async def watch_artifacts(self):
+        """Poll the artifact store for newer models, loading them in the background."""
+        if self.artifact_store is None:
+            return
+        while True:
+            await asyncio.sleep(settings.AUTOCOMPLETE_RELOAD_INTERVAL)
+            try:
+                await asyncio.to_thread(self.reload_if_newer)
+            except Exception as e:
+                print(f"Failed to reload autocomplete model: {e}")
+
+    def _convert_legacy_model(self):
+        """Rewrite the pickled Trie in the binary format (once, on first startup)."""
+        print(f"Converting {LEGACY_TRIE_MODEL_PATH} to {self.model_path}...")
+        legacy = Trie.load(LEGACY_TRIE_MODEL_PATH)
+        try:
+            legacy.save(self.model_path)
+        except Exception as e:
+            # Read-only filesystem etc.: serve the pickled Trie as-is
+            print(f"Failed to convert autocomplete model: {e}")
+            self.trie = legacy
+            self.is_ready = True
+
+    def start_build(self, qdrant_wrapper) -> dict:
+        """
+        Start a full rebuild from Qdrant in the background (unless one is
+        already running) and return the build status.
+        """
+        if self._build is None or self._build.done():
+            self.build_status = {"state": "running", "phase": "starting", "started_at": time.time()}
+            self._build = asyncio.create_task(self.build_index(qdrant_wrapper))
+        return self.build_status
+
     async def build_index(self, qdrant_wrapper):
-        """Fetches data from Qdrant and rebuilds the Trie."""
+        """
+        Fetches data from Qdrant and rebuilds the Trie. The current model keeps
+        serving until the new one is swapped in.
+
+        Titles and descriptions stream from `scroll` into a spool file, so
+        memory does not grow with the collection; tokenization, phrase learning
+        and trie building run in a worker process (`_build_model_files`).
+        """
         print("Rebuilding autocomplete index from Qdrant...")
-        self.trie = Trie() # Reset
-        self.learned_phrases = set() # Reset
-        
-        offset = None
-        count = 0
-        total_points = 0
-        
         print(f"Using collection: {settings.COLLECTION_NAME}")
+        status = self.build_status = {
+            "state": "running",
+            "phase": "waiting",
+            "started_at": self.build_status.get("started_at", time.time()),
+            "records": 0,
+            "texts": 0,
+        }
 
-        # Phase 1: Collect all text to learn phrases
-        all_texts = [] 
-        
-        # We need to scroll through everything first anyway.
-        # Ideally we loop once to collect text, train, then insert.
-        # Note: If dataset is massive (millions), saving all_texts in RAM is bad.
-        # But for typical gallery ( < 100k), 100k strings is fine (~20MB).
-        
-        while True:
-            records, next_offset = await qdrant_wrapper.client.scroll(
-                collection_name=settings.COLLECTION_NAME,
-                limit=100,
-                with_payload=True,
-                with_vectors=False,
-                offset=offset
-            )
-            
-            if not records:
-                break
-                
-            for point in records:
-                payload = point.payload
-                if not payload: continue
+        # Everything added so far is in the collection: freeze the delta
+        # (still searched) and drop it at the swap. Texts added from here on
+        # go to a fresh delta that survives the swap.
+        while (pending := self._begin_fold()) is None:
+            await asyncio.sleep(0.5)  # A compaction is running
 
-                if payload.get("title"):
-                    all_texts.append(payload["title"])
-                
-                if payload.get("description"):
-                    all_texts.append(payload["description"])
-            
-            count += len(records)
-            offset = next_offset
-            if offset is None:
-                break
-        
-        print(f"Collected {len(all_texts)} text segments. Learning phrases...")
-        
-        # Train Bigram Detector
-        detector = SimplePhraseDetector(stop_words=STOP_WORDS)
-        # We need to pre-tokenize exactly as we do during insertion
-        # We'll use a helper _tokenize(text) -> list[list[str]] (sentences -> words)
-        tokenized_corpus = []
-        for text in all_texts:
-            sentences = self._tokenize_to_sentences(text)
-            tokenized_corpus.extend(sentences)
-            
-        detector.learn_vocab(tokenized_corpus)
-        self.learned_phrases = detector.get_phrases()
-        
-        # Phase 2: Build Trie using learned phrases
-        print("Inserting into Trie...")
-        for text in all_texts:
-            self._process_and_insert(text)
-        
-        # Save the built model
+        spool_path = None
+        model_tmp = f"{self.model_path}.building.{os.getpid()}"
+        counts_tmp = f"{PHRASE_COUNTS_PATH}.building.{os.getpid()}"
+        version = None
         try:
-            self.trie.save(self.model_path)
-            self.is_ready = True
-            print(f"Autocomplete index built with {count} records and saved to {self.model_path}.")
+            # Phase 1: stream titles / descriptions to the spool file
+            status["phase"] = "scrolling"
+            offset = None
+            fd, spool_path = tempfile.mkstemp(prefix="autocomplete_", suffix=".jsonl")
+            with os.fdopen(fd, "w") as spool:
+                while True:
+                    records, offset = await qdrant_wrapper.client.scroll(
+                        collection_name=settings.COLLECTION_NAME,
+                        limit=settings.AUTOCOMPLETE_BUILD_PAGE_SIZE,
+                        with_payload=["title", "description"],
+                        with_vectors=False,
+                        offset=offset,
+                    )
+                    for point in records:
+                        payload = point.payload or {}
+                        for key in ("title", "description"):
+                            if payload.get(key):
+                                spool.write(json.dumps(payload[key]) + "\n")
+                                status["texts"] += 1
+                    status["records"] += len(records)
+                    if not records or offset is None:
+                        break
+
+            # Phase 2: learn phrases and build the trie off the event loop
+            status["phase"] = "building"
+            print(f"Collected {status['texts']} text segments. Learning phrases...")
+            loop = asyncio.get_running_loop()
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                status["phrases"] = await loop.run_in_executor(
+                    executor, _build_model_files, spool_path, model_tmp, counts_tmp
+                )
+
+            # Phase 3: publish (it holds everything in the collection, so it
+            # replaces LATEST unconditionally) and swap the new model in
+            status["phase"] = "publishing"
+            try:
+                version = await asyncio.to_thread(self._publish, model_tmp, counts_tmp)
+            except Exception as e:
+                # Served locally; other workers keep their model until the next publish
+                print(f"Failed to publish autocomplete model: {e}")
+            status["phase"] = "swapping"
+            model = load_trie(model_tmp)
+            os.replace(model_tmp, self.model_path)
+            os.replace(counts_tmp, PHRASE_COUNTS_PATH)
+        except asyncio.CancelledError:
+            self._abort_fold(pending)
+            status.update(state="cancelled", finished_at=time.time())
+            raise
         except Exception as e:
-            print(f"Failed to save Trie model: {e}")
+            self._abort_fold(pending)
+            status.update(state="failed", error=str(e), finished_at=time.time())
+            print(f"Failed to build autocomplete index: {e}")
+            return
+        finally:
+            for path in (spool_path, model_tmp, counts_tmp):
+                if path and os.path.exists(path):
+                    os.remove(path)
+
+        # Texts added during the build keep their delta (and log)
+        await asyncio.to_thread(self._reset_detector)
+        self._finish_fold(model, version=version)
+        status.update(state="succeeded", phase="done", version=self.version, finished_at=time.time())
+        print(f"Autocomplete index built with {status['records']} records and saved to {self.model_path}.")
 
     def _get_smart_suffix(self, words: list, start_index: int, limit: int = 3) -> str:
         """
@@ -218,34 +727,27 @@ class AutocompleteManager:
                 result.append(words)
         return result
 
-    def _process_and_insert(self, text: str, is_phrase: bool = False):
+    def _process_and_insert(self, text: str, is_phrase: bool = False, trie: Optional[Trie] = None):
         # reuse tokenize helper
-        sentences = self._tokenize_to_sentences(text)
+        self._insert_sentences(self._tokenize_to_sentences(text), trie)
+
+    def _insert_sentences(
+        self, sentences: List[List[str]], trie: Optional[Trie] = None, phrases: Optional[set] = None
+    ):
+        if trie is None:
+            trie = self.trie
 
         for words in sentences:
-            # 1. Apply Phrase Merging based on self.learned_phrases
-            if self.learned_phrases:
-                merged_words = []
-                skip_next = False
-                for k in range(len(words)):
-                    if skip_next:
-                        skip_next = False
-                        continue
-                    
-                    word = words[k]
-                    # Check forward bigram
-                    if k < len(words) - 1:
-                        next_word = words[k+1]
-                        bg = f"{word} {next_word}"
-                        if bg in self.learned_phrases:
-                            merged_words.append(bg)
-                            skip_next = True
-                            continue
-                    
-                    merged_words.append(word)
-                words = merged_words
-
-            # 2. Insert into Trie
+            # 1. Apply Phrase Merging based on self.learned_phrases (or `phrases`)
+            words = self._merge_phrases(words, phrases)
+
+            # 2. Count next-word continuations of the last one and two tokens
+            for i in range(1, len(words)):
+                trie.add_continuation(words[i - 1 : i], words[i])
+                if i >= 2:
+                    trie.add_continuation(words[i - 2 : i], words[i])
+
+            # 3. Insert into Trie
             for i in range(len(words)):
                 word = words[i]
                 if len(word) < 2 and word not in ("a", "i"): continue 
@@ -254,7 +756,33 @@ class AutocompleteManager:
                 # Note: words list now contains merged phrases like "san francisco"
                 suffix_phrase = self._get_smart_suffix(words, i, limit=3)
                 
-                self.trie.insert(word, phrase=suffix_phrase)
+                trie.insert(word, phrase=suffix_phrase)
+
+    def _merge_phrases(self, words: List[str], phrases: Optional[set] = None) -> List[str]:
+        """Join adjacent words forming a learned phrase into one token."""
+        if phrases is None:
+            phrases = self.learned_phrases
+        if not phrases:
+            return words
+        merged_words = []
+        skip_next = False
+        for k in range(len(words)):
+            if skip_next:
+                skip_next = False
+                continue
+
+            word = words[k]
+            # Check forward bigram
+            if k < len(words) - 1:
+                next_word = words[k+1]
+                bg = f"{word} {next_word}"
+                if bg in phrases:
+                    merged_words.append(bg)
+                    skip_next = True
+                    continue
+
+            merged_words.append(word)
+        return merged_words
 
     def _smart_title_case(self, text: str) -> str:
         words = text.split()
@@ -274,7 +802,54 @@ class AutocompleteManager:
         
         return " ".join(capitalized_words)
 
-    def suggest(self, query: str) -> List[str]:
+    async def suggest(self, query: str) -> List[str]:
+        """
+        Suggestions for `query`, served from an LRU of finished lists keyed by
+        the normalised query and the index version (so any index change
+        misses). Misses are computed in a worker thread and stop at
+        AUTOCOMPLETE_TIME_BUDGET_MS with what they have; such partial answers
+        are returned but not cached.
+        """
+        start = time.monotonic()
+        # A trailing space asks for the next word: keep it in the key
+        key = (self.index_version, normalize_query(query), query.endswith(" "))
+        suggestions = self.cache.get(key)
+        if suggestions is not None:
+            self.counters["hits"] += 1
+        else:
+            self.counters["misses"] += 1
+            deadline = start + settings.AUTOCOMPLETE_TIME_BUDGET_MS / 1000
+            suggestions = await asyncio.to_thread(self.compute_suggestions, query, deadline)
+            if time.monotonic() < deadline:
+                self.cache.set(key, suggestions)
+            else:
+                self.counters["partial"] += 1
+        self.latencies_ms.append((time.monotonic() - start) * 1000)
+        return suggestions
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        latencies = sorted(self.latencies_ms)
+        return {
+            **self.counters,
+            "hit_ratio": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self.cache),
+            "index_version": self.index_version,
+            "p50_ms": round(latencies[len(latencies) // 2], 3) if latencies else 0.0,
+            "p99_ms": (
+                round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3)
+                if latencies
+                else 0.0
+            ),
+        }
+
+    def compute_suggestions(self, query: str, deadline: Optional[float] = None) -> List[str]:
+        """
+        Completions for the last word of `query`, closest then most frequent
+        first. Matching stops at
+        `deadline` (time.monotonic(); default: AUTOCOMPLETE_TIME_BUDGET_MS from
+        now) and the suggestions found so far are returned.
+        """
         if not query or not self.is_ready:
             return []
         
@@ -288,17 +863,27 @@ class AutocompleteManager:
         
         # Determine strictness based on user input
         if query.endswith(" "):
-            # User typed a space, usually expects next word, but our Trie is word-based.
-            # We don't have n-gram or next-word prediction here yet.
-            # So we return nothing or maybe everything? Returning nothing is safer.
-            return []
+            # User typed a space: predict the next word instead
+            return self.suggest_next_words(query)
         
         # We complete the last word currently being typed
         last_word = parts[-1]
         
         # Fuzzy search on the last word
         # max_distance=1 allows for 1 typo
-        suggestions = self.trie.search_fuzzy(last_word, max_distance=1, limit=5)
+        if deadline is None:
+            deadline = time.monotonic() + settings.AUTOCOMPLETE_TIME_BUDGET_MS / 1000
+        # Saved model first, then texts added since
+        suggestions = []
+        for trie in (self.trie, self.compacting_delta, self.delta):
+            if trie is None or time.monotonic() >= deadline:
+                continue
+            suggestions.extend(trie.search_fuzzy(
+                last_word,
+                max_distance=settings.AUTOCOMPLETE_MAX_DISTANCE,
+                limit=5,
+                deadline=deadline,
+            ))
         
         # If the search returns phrases (which contain spaces), we directly return them
         # as they are usually better suggestions than reconstructing words.
@@ -326,7 +911,96 @@ class AutocompleteManager:
             
             final_results.append(self._smart_title_case(full_phrase))
         
-        # Deduplicate and limit
-        return list(set(final_results))[:10]
+        # Deduplicate (keeping the ranking) and limit
+        return list(dict.fromkeys(final_results))[:10]
+
+    def suggest_next_words(self, query: str, limit: int = 5) -> List[str]:
+        """
+        `query` followed by its most likely next words: continuations of the
+        last two tokens first, then of the last one. Each is a table lookup.
+        """
+        if query.rstrip()[-1:] in (".", "!", "?", ";", ":"):
+            return []  # New sentence: nothing to continue
+        sentences = self._tokenize_to_sentences(query)
+        if not sentences:
+            return []
+        words = self._merge_phrases(sentences[-1])
+
+        tokens = self._next_words(words[-2:], limit) if len(words) >= 2 else []
+        tokens += [t for t in self._next_words(words[-1:], limit) if t not in tokens]
+
+        prefix = " ".join(query.split())
+        final_results = []
+        for token in tokens[:limit]:
+            # "sunset over" -> "the" alone is a poor suggestion; add what follows it
+            if token in STOP_WORDS:
+                follow = self._next_words([words[-1], token], 1)
+                if follow:
+                    token = f"{token} {follow[0]}"
+            final_results.append(self._smart_title_case(f"{prefix} {token}"))
+        return list(dict.fromkeys(final_results))
+
+    def _next_words(self, context: List[str], limit: int) -> List[str]:
+        """Most frequent continuations of `context` across the model and deltas."""
+        counts = {}
+        for trie in (self.trie, self.compacting_delta, self.delta):
+            if trie is None:
+                continue
+            for token, count in trie.next_words(context, limit):
+                counts[token] = counts.get(token, 0) + count
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [token for token, _ in ranked[:limit]]
+
+def _temp_path(path: str) -> str:
+    """A new empty file next to `path`, unique across workers."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.")
+    os.close(fd)
+    return tmp_path
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by someone else
+    return True
+
+
+def _build_model_files(spool_path: str, model_path: str, counts_path: str) -> int:
+    """
+    Worker process: build the model from a spool of texts (one JSON string
+    per line) and write it to `model_path`, the phrase counts to
+    `counts_path`. Memory is bounded by the vocabulary, not the corpus: texts
+    are tokenized once into a second spool, which the insert pass re-reads.
+    Returns the number of learned phrases.
+    """
+    builder = AutocompleteManager()
+    detector = SimplePhraseDetector(stop_words=STOP_WORDS)
+    tokens_path = f"{spool_path}.tokens"
+    try:
+        # Pass 1: tokenize and count unigrams / bigrams
+        with open(spool_path) as texts, open(tokens_path, "w") as tokens:
+            for line in texts:
+                sentences = builder._tokenize_to_sentences(json.loads(line))
+                detector.learn_vocab(sentences)
+                tokens.write(json.dumps(sentences) + "\n")
+        builder.learned_phrases = detector.get_phrases()
+
+        # Pass 2: insert using the learned phrases
+        print("Inserting into Trie...")
+        trie = Trie()
+        with open(tokens_path) as tokens:
+            for line in tokens:
+                builder._insert_sentences(json.loads(line), trie)
+        trie.save(model_path)
+        detector.save(counts_path)
+        return len(builder.learned_phrases)
+    finally:
+        if os.path.exists(tokens_path):
+            os.remove(tokens_path)
+
 
 autocomplete_manager = AutocompleteManager()
@@ -0,0 +1,459 @@
+import asyncio
+import hashlib
+import json
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import redis.asyncio as redis
+
+from core.config import settings
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key form of a user query: case-folded, whitespace collapsed.
+    "Sunset  " and "sunset" share one entry.
+    """
+    return " ".join(text.casefold().split())
+
+
+def create_redis_client(decode_responses: bool = True, **kwargs) -> redis.Redis:
+    return redis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        username=settings.REDIS_USERNAME,
+        password=settings.REDIS_PASSWORD,
+        decode_responses=decode_responses,
+        **kwargs,
+    )
+
+
+class LRUCache:
+    """
+    Small thread-safe in-process LRU (used from the event loop and worker threads).
+    With `ttl` set, entries older than `ttl` seconds are treated as missing.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            expires_at, value = self._data[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# --- Codecs: compact binary forms for Redis ---
+
+
+def pack_dense(vector: List[float]) -> bytes:
+    # float32 little-endian: 512 dims -> 2 KB (vs ~10 KB of JSON text)
+    return struct.pack(f"<{len(vector)}f", *vector)
+
+
+def unpack_dense(data: bytes) -> List[float]:
+    return list(struct.unpack(f"<{len(data) // 4}f", data))
+
+
+def pack_sparse(vector: Dict[str, List]) -> bytes:
+    # uint32 count, then uint32 indices, then float32 values
+    n = len(vector["indices"])
+    return struct.pack(f"<I{n}I{n}f", n, *vector["indices"], *vector["values"])
+
+
+def unpack_sparse(data: bytes) -> Dict[str, List]:
+    (n,) = struct.unpack_from("<I", data)
+    fields = struct.unpack_from(f"<{n}I{n}f", data, 4)
+    return {"indices": list(fields[:n]), "values": list(fields[n:])}
+
+
+class TwoTierCache:
+    """
+    Query-keyed cache with a bounded in-process tier (LRU + TTL) in front of
+    an async Redis tier holding packed binary values.
+
+    Keys are normalised query text; `namespace` should carry everything that
+    changes the value (model, dimensions, task) so that bumping any of them
+    simply stops hitting old entries. Redis errors degrade to a miss.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        encode: Callable[[Any], bytes],
+        decode: Callable[[bytes], Any],
+        redis_client: Optional[redis.Redis] = None,
+        memory_size: int = 1024,
+        memory_ttl: Optional[float] = 3600,
+        redis_ttl: Optional[int] = 7 * 24 * 3600,
+    ):
+        self.namespace = namespace
+        self.encode = encode
+        self.decode = decode
+        self.redis_client = redis_client
+        self.redis_ttl = redis_ttl
+        self.memory = LRUCache(maxsize=memory_size, ttl=memory_ttl)
+        self.counters = {"memory_hits": 0, "redis_hits": 0, "misses": 0, "errors": 0}
+
+    async def connect(self):
+        """
+        Check the Redis connection once on startup and drop the Redis tier if it is down.
+        """
+        if not self.redis_client:
+            return
+        try:
+            await self.redis_client.ping()  # Check connection
+        except Exception as e:
+            print(
+                f"Warning: Redis connection failed ({e}). "
+                f"Running {self.namespace} cache in memory only."
+            )
+            self.redis_client = None
+
+    def key(self, text: str) -> str:
+        digest = hashlib.blake2b(
+            normalize_query(text).encode("utf-8"), digest_size=16
+        ).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    async def get(self, text: str) -> Optional[Any]:
+        key = self.key(text)
+        data = self.memory.get(key)
+        if data is not None:
+            self.counters["memory_hits"] += 1
+            return self.decode(data)
+
+        if self.redis_client:
+            try:
+                data = await self.redis_client.get(key)
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"Redis get error: {e}")
+            if data:
+                self.counters["redis_hits"] += 1
+                self.memory.set(key, data)
+                return self.decode(data)
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, text: str, value: Any):
+        key = self.key(text)
+        data = self.encode(value)
+        self.memory.set(key, data)
+        if self.redis_client:
+            try:
+                await self.redis_client.set(key, data, ex=self.redis_ttl)
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"Redis set error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = (
+            self.counters["memory_hits"]
+            + self.counters["redis_hits"]
+            + self.counters["misses"]
+        )
+        hits = lookups - self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
+
+
+class CollectionGeneration:
+    """
+    Redis counter bumped on every write to the collection. Caches put the
+    generation in their keys, so one INCR invalidates every cached read
+    without scanning or deleting keys (old entries just expire).
+
+    The value is memoised in-process for `local_ttl` seconds to save a Redis
+    round trip per read; a bump from this process is visible immediately,
+    bumps from other processes within `local_ttl`.
+    """
+
+    key = "gen:collection"
+
+    def __init__(self, redis_client: Optional[redis.Redis], local_ttl: float = 1.0):
+        self.redis_client = redis_client
+        self.local_ttl = local_ttl
+        self._value: Optional[int] = None
+        self._expires_at = 0.0
+
+    async def get(self) -> int:
+        if self._value is not None and time.monotonic() < self._expires_at:
+            return self._value
+        value = await self.redis_client.get(self.key)
+        self._remember(int(value or 0))
+        return self._value
+
+    async def bump(self) -> int:
+        value = await self.redis_client.incr(self.key)
+        self._remember(value)
+        return value
+
+    def _remember(self, value: int):
+        self._value = value
+        self._expires_at = time.monotonic() + self.local_ttl
+
+
+class SearchResultCache:
+    """
+    Finished /search responses in Redis, keyed by generation + normalised
+    query + every parameter that changes the result. Any Redis error is
+    treated as a miss so search keeps working without the cache.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis],
+        generation: CollectionGeneration,
+        ttl: int = 3600,
+    ):
+        self.redis_client = redis_client
+        self.generation = generation
+        self.ttl = ttl
+        self.counters = {"hits": 0, "misses": 0, "errors": 0}
+
+    @staticmethod
+    def key(generation: int, query: str, **params: Any) -> str:
+        parts = [normalize_query(query)] + [
+            f"{name}={params[name]}" for name in sorted(params)
+        ]
+        digest = hashlib.blake2b(
+            "\x1f".join(parts).encode("utf-8"), digest_size=16
+        ).hexdigest()
+        return f"search:{generation}:{digest}"
+
+    async def current_generation(self) -> Optional[int]:
+        """
+        Generation to stamp one lookup and its store with. Read it before the
+        search: a write that lands mid-search then leaves the stored result
+        under the old generation instead of looking current. None (no caching)
+        if Redis is unavailable.
+        """
+        if not self.redis_client:
+            return None
+        try:
+            return await self.generation.get()
+        except Exception as e:
+            self.counters["errors"] += 1
+            print(f"Search cache generation error: {e}")
+            return None
+
+    async def get(
+        self, generation: Optional[int], query: str, **params: Any
+    ) -> Optional[List[Dict[str, Any]]]:
+        if generation is None:
+            return None
+        try:
+            data = await self.redis_client.get(self.key(generation, query, **params))
+        except Exception as e:
+            self.counters["errors"] += 1
+            print(f"Search cache get error: {e}")
+            return None
+        if data is None:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return json.loads(data)
+
+    async def set(
+        self,
+        generation: Optional[int],
+        query: str,
+        results: List[Dict[str, Any]],
+        **params: Any,
+    ):
+        if generation is None:
+            return
+        try:
+            key = self.key(generation, query, **params)
+            await self.redis_client.set(key, json.dumps(results), ex=self.ttl)
+        except Exception as e:
+            self.counters["errors"] += 1
+            print(f"Search cache set error: {e}")
+
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent callers with the same key share one
+    in-flight computation instead of each hitting Jina / Qdrant / Redis.
+
+    The computation runs as its own task, so a caller that disconnects does
+    not cancel it for the others. Results (and exceptions) are shared as-is;
+    callers must not mutate them.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.counters = {"executed": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.counters["executed"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.counters["executed"] + self.counters["coalesced"]
+        return {
+            **self.counters,
+            "in_flight": len(self._inflight),
+            "coalesced_ratio": (
+                round(self.counters["coalesced"] / calls, 4) if calls else 0.0
+            ),
+        }
+
+
+class StaleWhileRevalidateCache:
+    """
+    Redis JSON entries stamped with the collection generation and fetch time.
+
+    - fresh (same generation, younger than `fresh_ttl`): returned as-is
+    - stale (collection written since, or older than `fresh_ttl`): returned
+      immediately while one background task refetches it
+    - missing: fetched inline, concurrent misses coalesced via `single_flight`
+
+    Entries live in Redis for `max_stale` seconds, so a write or a TTL expiry
+    never turns every page into a cold miss at once.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis],
+        generation: CollectionGeneration,
+        single_flight: SingleFlight,
+        namespace: str,
+        fresh_ttl: int = 300,
+        max_stale: int = 24 * 3600,
+    ):
+        self.redis_client = redis_client
+        self.generation = generation
+        self.single_flight = single_flight
+        self.namespace = namespace
+        self.fresh_ttl = fresh_ttl
+        self.max_stale = max_stale
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.counters = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "errors": 0,
+        }
+
+    def key(self, name: str) -> str:
+        return f"{self.namespace}:{name}"
+
+    async def get(self, name: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Cached value for `name`, calling `fetch()` (JSON-serialisable result)
+        when there is nothing usable in Redis.
+        """
+        key = self.key(name)
+        entry = None
+        generation = None
+        if self.redis_client:
+            try:
+                generation = await self.generation.get()
+                data = await self.redis_client.get(key)
+                entry = json.loads(data) if data else None
+                if entry is not None and "generation" not in entry:
+                    entry = None  # written by an older version
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"{self.namespace} cache get error: {e}")
+
+        if entry is None:
+            self.counters["misses"] += 1
+            return await self.single_flight.do(key, lambda: self._fetch(key, fetch))
+
+        age = time.time() - entry["fetched_at"]
+        if entry["generation"] == generation and age < self.fresh_ttl:
+            self.counters["fresh_hits"] += 1
+        else:
+            self.counters["stale_hits"] += 1
+            self._refresh(key, fetch)
+        return entry["value"]
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        # Read the generation before fetching: a write that lands mid-fetch
+        # then leaves this entry stale instead of looking current.
+        generation = None
+        if self.redis_client:
+            try:
+                generation = await self.generation.get()
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"{self.namespace} cache generation error: {e}")
+
+        value = await fetch()
+
+        if generation is not None:
+            entry = {"generation": generation, "fetched_at": time.time(), "value": value}
+            try:
+                await self.redis_client.set(key, json.dumps(entry), ex=self.max_stale)
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"{self.namespace} cache set error: {e}")
+        return value
+
+    def _refresh(self, key: str, fetch: Callable[[], Awaitable[Any]]):
+        if key in self._refreshing:
+            return
+        self.counters["refreshes"] += 1
+        task = asyncio.ensure_future(
+            self.single_flight.do(key, lambda: self._fetch(key, fetch))
+        )
+        self._refreshing[key] = task
+        task.add_done_callback(lambda t: self._refreshed(key, t))
+
+    def _refreshed(self, key: str, task: asyncio.Task):
+        self._refreshing.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.counters["errors"] += 1
+            print(f"{self.namespace} cache refresh failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "refreshing": len(self._refreshing)}
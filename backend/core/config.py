@@ -11,16 +11,57 @@ class Settings:
     CF_API_KEY_SECRET = os.getenv("CF_API_KEY_SECRET")
     CF_BUCKET = "haozheli-pictures"
     CLOUDFLARE_FREE_URL = "https://img-cdn.haozheli.com/"
+    R2_MAX_POOL_CONNECTIONS = int(os.getenv("R2_MAX_POOL_CONNECTIONS", 32))
+    R2_MULTIPART_THRESHOLD = int(os.getenv("R2_MULTIPART_THRESHOLD", 16 * 1024 * 1024))
+    R2_MULTIPART_CHUNKSIZE = int(os.getenv("R2_MULTIPART_CHUNKSIZE", 8 * 1024 * 1024))
     # Qdrant Config
     QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
     QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", None)
     COLLECTION_NAME = "gallery_rag_hybrid"
+    # Storage layout for the dense vectors (applied to existing collections
+    # with `python -m scripts.migrate_collection`)
+    QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none")  # none | scalar | binary
+    QDRANT_QUANTIZATION_ALWAYS_RAM = os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true"
+    QDRANT_VECTORS_ON_DISK = os.getenv("QDRANT_VECTORS_ON_DISK", "false").lower() == "true"
+    QDRANT_SPARSE_ON_DISK = os.getenv("QDRANT_SPARSE_ON_DISK", "false").lower() == "true"
+    QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", 16))
+    QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", 100))
+    # Query-time rescoring of quantized candidates with the original vectors
+    QDRANT_QUANTIZATION_RESCORE = os.getenv("QDRANT_QUANTIZATION_RESCORE", "true").lower() == "true"
+    QDRANT_QUANTIZATION_OVERSAMPLING = float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", 2.0))
 
     # Jina Config
     JINA_API_KEY = os.getenv(
         "JINA_API_KEY",
     )
     JINA_URL = "https://api.jina.ai/v1/embeddings"
+    JINA_MODEL = "jina-clip-v2"
+    JINA_DIMENSIONS = 512
+    JINA_TIMEOUT = float(os.getenv("JINA_TIMEOUT", 30))
+    JINA_CONNECT_TIMEOUT = float(os.getenv("JINA_CONNECT_TIMEOUT", 5))
+    JINA_MAX_CONCURRENCY = int(os.getenv("JINA_MAX_CONCURRENCY", 8))
+    JINA_MAX_CONNECTIONS = int(os.getenv("JINA_MAX_CONNECTIONS", 16))
+    JINA_BATCH_MAX_SIZE = int(os.getenv("JINA_BATCH_MAX_SIZE", 16))
+    JINA_BATCH_WAIT_MS = float(os.getenv("JINA_BATCH_WAIT_MS", 10))
+
+    # Query Embedding Cache Config
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 4096))
+    EMBEDDING_CACHE_MEMORY_TTL = int(os.getenv("EMBEDDING_CACHE_MEMORY_TTL", 3600))
+    EMBEDDING_CACHE_REDIS_TTL = int(os.getenv("EMBEDDING_CACHE_REDIS_TTL", 30 * 24 * 3600))
+
+    # Search Result Cache Config
+    SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 3600))
+    SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", 32))
+
+    # Gallery Cache Config (fresh for GALLERY_CACHE_TTL, then served stale while refreshing)
+    GALLERY_CACHE_TTL = int(os.getenv("GALLERY_CACHE_TTL", 300))
+    GALLERY_CACHE_MAX_STALE = int(os.getenv("GALLERY_CACHE_MAX_STALE", 24 * 3600))
+    # Points per cached gallery block; pages of any limit are cut from these
+    GALLERY_BLOCK_SIZE = int(os.getenv("GALLERY_BLOCK_SIZE", 60))
+
+    # Sparse (BM25) Config
+    SPARSE_CACHE_SIZE = int(os.getenv("SPARSE_CACHE_SIZE", 4096))
+    SPARSE_PARALLEL_MIN_BATCH = int(os.getenv("SPARSE_PARALLEL_MIN_BATCH", 512))
 
     # Redis Config
     REDIS_HOST = os.getenv("REDIS_HOST")
@@ -28,9 +69,43 @@ class Settings:
     REDIS_USERNAME = os.getenv("REDIS_USERNAME", "default")
     REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
 
+    # Image Transcoding Config (0 = size the process pool to the available cores)
+    TRANSCODE_WORKERS = int(os.getenv("TRANSCODE_WORKERS", 0))
+    # Jobs allowed to wait for a worker before new uploads get 503 + Retry-After
+    TRANSCODE_QUEUE_SIZE = int(os.getenv("TRANSCODE_QUEUE_SIZE", 0))
+    # Slots bulk ingest may never take, kept for interactive uploads (0 = half the queue)
+    TRANSCODE_INTERACTIVE_RESERVE = int(os.getenv("TRANSCODE_INTERACTIVE_RESERVE", 0))
+
+    # Ingest Pipeline Config (0 = one transcode worker per pool process)
+    INGEST_TRANSCODE_WORKERS = int(os.getenv("INGEST_TRANSCODE_WORKERS", 0))
+    INGEST_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", 8))
+    INGEST_UPLOAD_WORKERS = int(os.getenv("INGEST_UPLOAD_WORKERS", 8))
+    INGEST_WRITE_BATCH_SIZE = int(os.getenv("INGEST_WRITE_BATCH_SIZE", 32))
+    INGEST_BATCH_MAX_FILES = int(os.getenv("INGEST_BATCH_MAX_FILES", 200))
+
+    # Autocomplete Config
+    AUTOCOMPLETE_MAX_DISTANCE = int(os.getenv("AUTOCOMPLETE_MAX_DISTANCE", 1))
+    # Per-keystroke budget for fuzzy matching; past it, return what was found
+    AUTOCOMPLETE_TIME_BUDGET_MS = float(os.getenv("AUTOCOMPLETE_TIME_BUDGET_MS", 25))
+    # Finished suggestion lists kept per worker, and requests in the latency stats
+    AUTOCOMPLETE_CACHE_SIZE = int(os.getenv("AUTOCOMPLETE_CACHE_SIZE", 10000))
+    AUTOCOMPLETE_LATENCY_WINDOW = int(os.getenv("AUTOCOMPLETE_LATENCY_WINDOW", 1000))
+    # Texts added on ingest before the delta trie is compacted into the model
+    AUTOCOMPLETE_COMPACT_EVERY = int(os.getenv("AUTOCOMPLETE_COMPACT_EVERY", 200))
+    # Points per scroll page when rebuilding the index
+    AUTOCOMPLETE_BUILD_PAGE_SIZE = int(os.getenv("AUTOCOMPLETE_BUILD_PAGE_SIZE", 1000))
+    # Where built indexes are published for every worker / replica: local | r2 | none
+    AUTOCOMPLETE_ARTIFACT_STORE = os.getenv("AUTOCOMPLETE_ARTIFACT_STORE", "local")
+    AUTOCOMPLETE_ARTIFACT_PREFIX = os.getenv("AUTOCOMPLETE_ARTIFACT_PREFIX", "_artifacts/autocomplete")
+    # Seconds between checks for a newer published index
+    AUTOCOMPLETE_RELOAD_INTERVAL = float(os.getenv("AUTOCOMPLETE_RELOAD_INTERVAL", 30))
+
     # Project Paths
     PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+    AUTOCOMPLETE_ARTIFACT_DIR = os.getenv(
+        "AUTOCOMPLETE_ARTIFACT_DIR", os.path.join(PROJECT_ROOT, "data", "artifacts")
+    )
 
 
 settings = Settings()
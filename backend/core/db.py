@@ -1,9 +1,40 @@
 import asyncio
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 from qdrant_client import AsyncQdrantClient, models
 from qdrant_client.http.models import Distance, VectorParams, SparseVectorParams
 from core.config import settings
 
+# Payload fields used in filters; keyword-indexed so lookups don't scan
+KEYWORD_PAYLOAD_FIELDS = ("original_url", "preview_url", "camera")
+DENSE_VECTOR_NAMES = ("dense-image", "dense-text")
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+
+@dataclass(frozen=True)
+class SearchTuning:
+    """
+    Query-time recall / latency trade-off for the dense branches.
+    `prefetch_multiplier` sets each branch's candidate depth (x limit) for RRF.
+    None means "collection / config default".
+    """
+
+    hnsw_ef: Optional[int] = None
+    exact: bool = False
+    rescore: Optional[bool] = None
+    oversampling: Optional[float] = None
+    prefetch_multiplier: int = 2
+
+
+SEARCH_PROFILES: Dict[str, SearchTuning] = {
+    # Typeahead: small beam, no rescoring, shallow branches
+    "fast": SearchTuning(hnsw_ef=32, rescore=False, oversampling=1.0, prefetch_multiplier=1),
+    # Previous behaviour: config defaults, 2x candidates per branch
+    "balanced": SearchTuning(),
+    # Brute force over the original vectors; for the full results page / evaluation
+    "exact": SearchTuning(exact=True, prefetch_multiplier=4),
+}
+
 
 class QdrantClientWrapper:
     def __init__(self):
@@ -11,6 +42,9 @@ class QdrantClientWrapper:
             url=settings.QDRANT_URL,
             api_key=settings.QDRANT_API_KEY,
         )
+        # Whether the dense vectors are quantized, read from the collection by
+        # init_collection (None until then: QDRANT_QUANTIZATION decides)
+        self.quantized: Optional[bool] = None
 
     async def init_collection(self, vector_size: int = 512):
         """
@@ -25,25 +59,153 @@ class QdrantClientWrapper:
             await self.client.create_collection(
                 collection_name=settings.COLLECTION_NAME,
                 vectors_config={
-                    "dense-image": VectorParams(
-                        size=vector_size, distance=Distance.COSINE
-                    ),
-                    "dense-text": VectorParams(
-                        size=vector_size, distance=Distance.COSINE
-                    ),
-                },
-                sparse_vectors_config={
-                    "sparse": SparseVectorParams(
-                        index=models.SparseIndexParams(
-                            on_disk=False,
-                        )
-                    )
+                    name: self.dense_vector_params(vector_size)
+                    for name in DENSE_VECTOR_NAMES
                 },
+                sparse_vectors_config={"sparse": self.sparse_vector_params()},
             )
             print(f"Collection {settings.COLLECTION_NAME} created.")
         else:
             print(f"Collection {settings.COLLECTION_NAME} already exists.")
 
+        info = await self.client.get_collection(settings.COLLECTION_NAME)
+        # The collection may not have been migrated to QDRANT_QUANTIZATION yet
+        self.quantized = self.is_quantized(info)
+        await self.ensure_payload_indexes(info)
+
+    @staticmethod
+    def is_quantized(info: models.CollectionInfo) -> bool:
+        """Whether the collection (or any dense vector in it) has a quantization config."""
+        if info.config.quantization_config is not None:
+            return True
+        vectors = info.config.params.vectors or {}
+        if not isinstance(vectors, dict):
+            return vectors.quantization_config is not None
+        return any(
+            vectors[name].quantization_config is not None
+            for name in DENSE_VECTOR_NAMES
+            if name in vectors
+        )
+
+    async def ensure_payload_indexes(self, info: Optional[models.CollectionInfo] = None):
+        """
+        Create the keyword payload indexes that are missing (existing
+        collections get them on the next startup).
+        """
+        if info is None:
+            info = await self.client.get_collection(settings.COLLECTION_NAME)
+        existing = info.payload_schema or {}
+        for field_name in KEYWORD_PAYLOAD_FIELDS:
+            if field_name in existing:
+                continue
+            await self.client.create_payload_index(
+                collection_name=settings.COLLECTION_NAME,
+                field_name=field_name,
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+            print(f"Payload index on {field_name} created.")
+
+    @staticmethod
+    def quantization_config(mode: str = None):
+        """
+        Quantized copy of the dense vectors kept (by default) in RAM for the
+        HNSW search, while the float32 originals may live on disk.
+        scalar: int8, 4x smaller, near-lossless with rescoring.
+        binary: 1 bit per dimension, 32x smaller, needs rescoring + oversampling.
+        """
+        mode = (mode or settings.QDRANT_QUANTIZATION).lower()
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        if mode == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM,
+                )
+            )
+        if mode == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(
+                    always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM,
+                )
+            )
+        return None
+
+    @classmethod
+    def dense_vector_params(cls, vector_size: int = 512, quantization: str = None) -> VectorParams:
+        return VectorParams(
+            size=vector_size,
+            distance=Distance.COSINE,
+            on_disk=settings.QDRANT_VECTORS_ON_DISK,
+            hnsw_config=models.HnswConfigDiff(
+                m=settings.QDRANT_HNSW_M,
+                ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+            ),
+            quantization_config=cls.quantization_config(quantization),
+        )
+
+    @staticmethod
+    def sparse_vector_params() -> SparseVectorParams:
+        return SparseVectorParams(
+            index=models.SparseIndexParams(
+                on_disk=settings.QDRANT_SPARSE_ON_DISK,
+            )
+        )
+
+    def search_params(self, profile: str = "balanced") -> Optional[models.SearchParams]:
+        """
+        Query-time params for dense prefetches under a latency profile: HNSW
+        beam width or exact scan, plus rescoring of quantized candidates
+        against the original vectors, oversampling to recover recall.
+        """
+        tuning = SEARCH_PROFILES[profile]
+        quantized = self.quantized
+        if quantized is None:
+            quantized = settings.QDRANT_QUANTIZATION.lower() != "none"
+        quantization = None
+        if quantized:
+            if tuning.exact:
+                quantization = models.QuantizationSearchParams(ignore=True)
+            else:
+                quantization = models.QuantizationSearchParams(
+                    rescore=(
+                        settings.QDRANT_QUANTIZATION_RESCORE
+                        if tuning.rescore is None
+                        else tuning.rescore
+                    ),
+                    oversampling=(
+                        tuning.oversampling or settings.QDRANT_QUANTIZATION_OVERSAMPLING
+                    ),
+                )
+
+        if tuning.hnsw_ef is None and not tuning.exact and quantization is None:
+            return None
+        return models.SearchParams(
+            hnsw_ef=tuning.hnsw_ef, exact=tuning.exact, quantization=quantization
+        )
+
+    async def apply_storage_config(self, vector_size: int = 512, quantization: str = None):
+        """
+        Apply the configured quantization / on-disk / HNSW settings to an
+        existing collection. Qdrant rebuilds the affected segments in the
+        background; the collection stays readable meanwhile.
+        """
+        params = self.dense_vector_params(vector_size, quantization)
+        await self.client.update_collection(
+            collection_name=settings.COLLECTION_NAME,
+            vectors_config={
+                name: models.VectorParamsDiff(
+                    on_disk=params.on_disk,
+                    hnsw_config=params.hnsw_config,
+                    quantization_config=params.quantization_config
+                    or models.Disabled.DISABLED,
+                )
+                for name in DENSE_VECTOR_NAMES
+            },
+            sparse_vectors_config={"sparse": self.sparse_vector_params()},
+        )
+
     async def upsert_point(
         self,
         point_id: str,
@@ -52,39 +214,70 @@ class QdrantClientWrapper:
         sparse_vector: Dict[str, Any],
         payload: Dict[str, Any],
     ):
+        await self.upsert_points(
+            [
+                self.build_point(
+                    point_id,
+                    image_dense_vector,
+                    text_dense_vector,
+                    sparse_vector,
+                    payload,
+                )
+            ]
+        )
+
+    async def upsert_points(self, points: List[models.PointStruct]):
+        """
+        Upsert several points in a single request.
+        """
         await self.client.upsert(
             collection_name=settings.COLLECTION_NAME,
-            points=[
-                models.PointStruct(
-                    id=point_id,
-                    vector={
-                        "dense-image": image_dense_vector,
-                        "dense-text": text_dense_vector,
-                        "sparse": models.SparseVector(
-                            indices=sparse_vector["indices"],
-                            values=sparse_vector["values"],
-                        ),
-                    },
-                    payload=payload,
-                )
-            ],
+            points=points,
         )
 
-    async def search(
-        self, dense_vector: List[float], sparse_vector: Dict[str, Any], limit: int = 10, similarity_threshold: Optional[float] = None, search_mode: str = "hybrid"
-    ):
+    @staticmethod
+    def build_point(
+        point_id: str,
+        image_dense_vector: List[float],
+        text_dense_vector: List[float],
+        sparse_vector: Dict[str, Any],
+        payload: Dict[str, Any],
+    ) -> models.PointStruct:
+        return models.PointStruct(
+            id=point_id,
+            vector={
+                "dense-image": image_dense_vector,
+                "dense-text": text_dense_vector,
+                "sparse": models.SparseVector(
+                    indices=sparse_vector["indices"],
+                    values=sparse_vector["values"],
+                ),
+            },
+            payload=payload,
+        )
+
+    def build_search_prefetch(
+        self, dense_vector: List[float], sparse_vector: Dict[str, Any], limit: int = 10, similarity_threshold: Optional[float] = None, search_mode: str = "hybrid", profile: str = "balanced"
+    ) -> List[models.Prefetch]:
+        """
+        Per-branch candidate queries for one search, fused with RRF by the caller.
+        """
+        dense_params = self.search_params(profile)
+        prefetch_limit = limit * SEARCH_PROFILES[profile].prefetch_multiplier
         if search_mode == "hybrid":
             prefetch = [
                 models.Prefetch(
                     query=dense_vector,
                     using="dense-image",
-                    limit=limit * 2,
+                    params=dense_params,
+                    limit=prefetch_limit,
                     score_threshold=similarity_threshold,
                 ),
                 models.Prefetch(
                     query=dense_vector,
                     using="dense-text",
-                    limit=limit * 2,
+                    params=dense_params,
+                    limit=prefetch_limit,
                     score_threshold=similarity_threshold,
                 ),
                 models.Prefetch(
@@ -93,7 +286,7 @@ class QdrantClientWrapper:
                         values=sparse_vector["values"],
                     ),
                     using="sparse",
-                    limit=limit * 2,
+                    limit=prefetch_limit,
                 ),
             ]
         elif search_mode == "text-only":
@@ -101,7 +294,8 @@ class QdrantClientWrapper:
                 models.Prefetch(
                     query=dense_vector,
                     using="dense-text",
-                    limit=limit * 2,
+                    params=dense_params,
+                    limit=prefetch_limit,
                     score_threshold=similarity_threshold,
                 ),
                 models.Prefetch(
@@ -110,7 +304,7 @@ class QdrantClientWrapper:
                         values=sparse_vector["values"],
                     ),
                     using="sparse",
-                    limit=limit * 2,
+                    limit=prefetch_limit,
                 ),
             ]
         elif search_mode == "image-only":
@@ -118,11 +312,21 @@ class QdrantClientWrapper:
                 models.Prefetch(
                     query=dense_vector,
                     using="dense-image",
-                    limit=limit * 2,
+                    params=dense_params,
+                    limit=prefetch_limit,
                     score_threshold=similarity_threshold,
                 ),
             ]
 
+        return prefetch
+
+    async def search(
+        self, dense_vector: List[float], sparse_vector: Dict[str, Any], limit: int = 10, similarity_threshold: Optional[float] = None, search_mode: str = "hybrid", profile: str = "balanced"
+    ):
+        prefetch = self.build_search_prefetch(
+            dense_vector, sparse_vector, limit, similarity_threshold, search_mode, profile
+        )
+
         search_result = await self.client.query_points(
             collection_name=settings.COLLECTION_NAME,
             limit=limit,
@@ -134,6 +338,29 @@ class QdrantClientWrapper:
         )
         return search_result.points
 
+    async def search_batch(self, searches: List[Dict[str, Any]]):
+        """
+        Run several hybrid searches in one query_batch_points round trip.
+        Each entry takes the keyword arguments of `search`; returns one list
+        of points per entry, in order.
+        """
+        requests = [
+            models.QueryRequest(
+                prefetch=self.build_search_prefetch(**search),
+                query=models.FusionQuery(
+                    fusion=models.Fusion.RRF,
+                ),
+                limit=search.get("limit", 10),
+                with_payload=True,
+            )
+            for search in searches
+        ]
+        responses = await self.client.query_batch_points(
+            collection_name=settings.COLLECTION_NAME,
+            requests=requests,
+        )
+        return [response.points for response in responses]
+
     async def scroll(self, limit: int = 20, offset: str = None):
         """
         Scroll through points in the collection (pagination).
@@ -147,17 +374,13 @@ class QdrantClientWrapper:
         )
         return points, next_offset
 
-    async def find_point_by_image_url(self, image_url: str):
+    async def find_point_id_by_image_url(self, image_url: str):
         """
-        Find a point by matching preview_url or original_url in payload.
-        Returns the first matching point with vectors included.
+        Find the ID of the point whose original_url matches (indexed lookup,
+        no payload or vectors transferred).
         """
         flt = models.Filter(
-            should=[
-                # models.FieldCondition(
-                #     key="preview_url",
-                #     match=models.MatchValue(value=image_url),
-                # ),
+            must=[
                 models.FieldCondition(
                     key="original_url",
                     match=models.MatchValue(value=image_url),
@@ -165,14 +388,66 @@ class QdrantClientWrapper:
             ]
         )
 
-        res = await self.client.query_points(
+        points, _ = await self.client.scroll(
             collection_name=settings.COLLECTION_NAME,
+            scroll_filter=flt,
             limit=1,
-            query_filter=flt,
+            with_payload=False,
+            with_vectors=False,
+        )
+        return points[0].id if points else None
+
+    async def search_similar_to_point(
+        self, point_id: str, limit: int = 4, profile: str = "balanced"
+    ):
+        """
+        Hybrid search using a stored point's own vectors as the query, resolved
+        inside Qdrant: its dense-text vector against dense-image and dense-text,
+        its sparse vector against sparse, fused with RRF. The point itself is
+        excluded.
+        """
+        dense_params = self.search_params(profile)
+        prefetch_limit = limit * SEARCH_PROFILES[profile].prefetch_multiplier
+        exclude_self = models.Filter(
+            must_not=[models.HasIdCondition(has_id=[point_id])]
+        )
+        prefetch = [
+            models.Prefetch(
+                query=point_id,
+                using="dense-image",
+                # Compare the text vector against image vectors, like /search
+                lookup_from=models.LookupLocation(
+                    collection=settings.COLLECTION_NAME, vector="dense-text"
+                ),
+                params=dense_params,
+                filter=exclude_self,
+                limit=prefetch_limit,
+            ),
+            models.Prefetch(
+                query=point_id,
+                using="dense-text",
+                params=dense_params,
+                filter=exclude_self,
+                limit=prefetch_limit,
+            ),
+            models.Prefetch(
+                query=point_id,
+                using="sparse",
+                filter=exclude_self,
+                limit=prefetch_limit,
+            ),
+        ]
+
+        search_result = await self.client.query_points(
+            collection_name=settings.COLLECTION_NAME,
+            limit=limit,
+            prefetch=prefetch,
+            query=models.FusionQuery(
+                fusion=models.Fusion.RRF,
+            ),
             with_payload=True,
-            with_vectors=True,
         )
-        return res.points[0] if res.points else None
+        return search_result.points
 
     async def get_point(self, point_id: str):
         """
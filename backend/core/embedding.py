@@ -1,94 +1,137 @@
 import os
-import requests
+import asyncio
 import json
-import redis
-from typing import List, Optional, Union, Dict, Any
+import httpx
+import redis.asyncio as redis
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
 from pathlib import Path
-from functools import lru_cache
 from fastembed import SparseTextEmbedding
+from core.cache import (
+    TwoTierCache,
+    pack_dense,
+    pack_sparse,
+    unpack_dense,
+    unpack_sparse,
+)
 from core.config import settings
 
 
 # --- Jina Client (Dense) ---
 class JinaClient:
-    def __init__(self):
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {settings.JINA_API_KEY}",
         }
-        # Initialize Redis connection
-        try:
-            self.redis_client = redis.Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                username=settings.REDIS_USERNAME,
-                password=settings.REDIS_PASSWORD,
-                decode_responses=True,
-                socket_timeout=2,  # Short timeout to not block app if Redis is down
-            )
-            self.redis_client.ping()  # Check connection
-        except Exception as e:
-            print(
-                f"Warning: Redis connection failed ({e}). Running without Redis cache."
-            )
-            self.redis_client = None
+        # One pooled keep-alive client shared by every request
+        self.http_client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=httpx.Timeout(
+                settings.JINA_TIMEOUT, connect=settings.JINA_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.JINA_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.JINA_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+        )
+        # Bound the number of in-flight Jina calls so bursts queue here
+        # instead of piling up on the API (and its rate limiter).
+        self._semaphore = asyncio.Semaphore(settings.JINA_MAX_CONCURRENCY)
+        # Query embeddings: in-process LRU/TTL tier + packed float32 in Redis
+        self.cache = TwoTierCache(
+            namespace=f"emb:{settings.JINA_MODEL}:{settings.JINA_DIMENSIONS}:default",
+            encode=pack_dense,
+            decode=unpack_dense,
+            redis_client=redis_client,
+            memory_size=settings.EMBEDDING_CACHE_SIZE,
+            memory_ttl=settings.EMBEDDING_CACHE_MEMORY_TTL,
+            redis_ttl=settings.EMBEDDING_CACHE_REDIS_TTL,
+        )
+        self.batcher = EmbeddingBatcher(
+            self._post_embeddings,
+            max_batch_size=settings.JINA_BATCH_MAX_SIZE,
+            max_wait_ms=settings.JINA_BATCH_WAIT_MS,
+        )
+
+    async def connect(self):
+        await self.cache.connect()
+
+    async def close(self):
+        await self.http_client.aclose()
 
-    def get_embedding(
+    async def get_embedding(
         self,
         text: Optional[str] = None,
         image_url: Optional[str] = None,
         image_base64: Optional[str] = None,
         is_query: bool = False,
+        timeout: Optional[float] = None,
     ) -> List[float]:
         """
         Get embedding for a single text or image using Jina CLIP v2.
+        `timeout` overrides the default per-call timeout (seconds).
         """
         # Use cache for text-only queries (e.g. Search)
         if text and not image_url and not image_base64:
-            return self._get_cached_text_embedding(text)
+            return await self._get_cached_text_embedding(text, timeout=timeout)
 
-        return self._execute_embedding_request(
-            text, image_url, image_base64, is_query=is_query
+        return await self._execute_embedding_request(
+            text, image_url, image_base64, is_query=is_query, timeout=timeout
         )
 
-    @lru_cache(maxsize=1024)
-    def _get_cached_text_embedding(self, text: str) -> List[float]:
+    async def _get_cached_text_embedding(
+        self, text: str, timeout: Optional[float] = None
+    ) -> List[float]:
         """
-        Layer 1: Memory Cache (LRU)
-        Layer 2: Redis Cache (Persistent)
+        Layer 1: Memory Cache (LRU + TTL)
+        Layer 2: Redis Cache (packed float32)
         Layer 3: API Call
         """
-        # Checks Redis before hitting API
-        if self.redis_client:
-            redis_key = f"embedding:{text}"
-            try:
-                cached_data = self.redis_client.get(redis_key)
-                if cached_data:
-                    print(f"Hit Redis cache for query: '{text}'")
-                    return json.loads(cached_data)
-            except Exception as e:
-                print(f"Redis get error: {e}")
-
-        # If not in Redis or Redis failed, get from API
-        embedding = self._execute_embedding_request(text=text)
-
-        # Save to Redis for future
-        if self.redis_client:
-            try:
-                # Cache for 1 week (604800 seconds) or indefinite?
-                # Let's say 24h for now or indefinite. User said "persist", so maybe no expiry.
-                self.redis_client.set(redis_key, json.dumps(embedding))
-            except Exception as e:
-                print(f"Redis set error: {e}")
-
+        embedding = await self.cache.get(text)
+        if embedding is None:
+            embedding = await self._execute_embedding_request(
+                text=text, timeout=timeout
+            )
+            await self.cache.set(text, embedding)
         return embedding
 
-    def _execute_embedding_request(
+    async def get_text_embeddings(
+        self, texts: List[str], timeout: Optional[float] = None
+    ) -> List[List[float]]:
+        """
+        Embed many text queries: cached ones come from the two-tier cache, the
+        rest (deduplicated) go to Jina in one multi-input request.
+        """
+        embeddings = list(await asyncio.gather(*(self.cache.get(t) for t in texts)))
+
+        missing: Dict[str, str] = {}  # cache key -> text
+        for text, embedding in zip(texts, embeddings):
+            if embedding is None:
+                missing.setdefault(self.cache.key(text), text)
+
+        if missing:
+            fetched = await asyncio.wait_for(
+                self._post_embeddings([{"text": t} for t in missing.values()]),
+                timeout=timeout,
+            )
+            by_key = dict(zip(missing, fetched))
+            await asyncio.gather(
+                *(self.cache.set(text, by_key[key]) for key, text in missing.items())
+            )
+            embeddings = [
+                embedding if embedding is not None else by_key[self.cache.key(text)]
+                for text, embedding in zip(texts, embeddings)
+            ]
+        return embeddings
+
+    async def _execute_embedding_request(
         self,
         text: Optional[str] = None,
         image_url: Optional[str] = None,
         image_base64: Optional[str] = None,
         is_query: bool = False,
+        timeout: Optional[float] = None,
     ) -> List[float]:
         input_data = []
         if text:
@@ -103,29 +146,161 @@ class JinaClient:
         if not input_data:
             raise ValueError("No input provided")
 
+        # Only the first input is embedded; it is queued on the batcher so that
+        # concurrent callers share a single multi-input Jina request.
+        task = "retrieval.query" if is_query else None
+        return await self.batcher.submit(input_data[0], task=task, timeout=timeout)
+
+    async def _post_embeddings(
+        self, input_data: List[Dict[str, str]], task: Optional[str] = None
+    ) -> List[List[float]]:
+        """
+        Send one multi-input request to Jina and return embeddings in input order.
+        """
         data = {
-            "model": "jina-clip-v2",
-            "dimensions": 512,
+            "model": settings.JINA_MODEL,
+            "dimensions": settings.JINA_DIMENSIONS,
             "input": input_data,
         }
 
-        if is_query:
-            data["task"] = "retrieval.query"
+        if task:
+            data["task"] = task
 
-        response = requests.post(settings.JINA_URL, headers=self.headers, json=data)
+        async with self._semaphore:
+            try:
+                response = await self.http_client.post(settings.JINA_URL, json=data)
+            except httpx.TimeoutException as e:
+                raise ValueError(f"Jina API request timed out: {e!r}") from e
 
         try:
             response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             # Print error detail, truncated to avoid logging huge base64 reflected in error (unlikely but safe)
             error_msg = response.text[:500]
             print("Jina API Error Detail:", error_msg)
-            raise ValueError(
-                f"Jina API Validation Failed: {response.status_code} - {error_msg}"
+            raise JinaRequestError(
+                f"Jina API Validation Failed: {response.status_code} - {error_msg}",
+                status_code=response.status_code,
             ) from e
 
-        result_data = response.json()["data"]
-        return result_data[0]["embedding"]
+        result_data = sorted(response.json()["data"], key=lambda d: d["index"])
+        return [item["embedding"] for item in result_data]
+
+
+class JinaRequestError(ValueError):
+    """
+    Jina rejected a request; `status_code` is the HTTP status it returned.
+    """
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching dispatcher for the Jina embeddings endpoint.
+
+    Requests submitted within `max_wait_ms` of each other (and with the same
+    task) are sent as one multi-input call, up to `max_batch_size` inputs.
+    Each caller awaits its own future and gets back only its own embedding.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[
+            [List[Dict[str, str]], Optional[str]], Awaitable[List[List[float]]]
+        ],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10,
+    ):
+        self._send_batch = send_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: Dict[
+            Optional[str], List[Tuple[Dict[str, str], asyncio.Future]]
+        ] = {}
+        self._timers: Dict[Optional[str], asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        item: Dict[str, str],
+        task: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self._pending.setdefault(task, [])
+        queue.append((item, future))
+
+        if len(queue) >= self.max_batch_size:
+            self._flush(task)
+        elif task not in self._timers:
+            self._timers[task] = loop.call_later(self.max_wait, self._flush, task)
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError as e:
+            raise ValueError(f"Jina embedding timed out after {timeout}s") from e
+
+    def _flush(self, task: Optional[str]):
+        timer = self._timers.pop(task, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(task, None)
+        if not batch:
+            return
+        dispatch = asyncio.create_task(self._dispatch(batch, task))
+        self._tasks.add(dispatch)
+        dispatch.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(
+        self, batch: List[Tuple[Dict[str, str], asyncio.Future]], task: Optional[str]
+    ):
+        # Identical inputs (e.g. the same popular query) are embedded only once
+        keys = [json.dumps(item, sort_keys=True) for item, _ in batch]
+        positions: Dict[str, int] = {}
+        unique_inputs: List[Dict[str, str]] = []
+        for key, (item, _) in zip(keys, batch):
+            if key not in positions:
+                positions[key] = len(unique_inputs)
+                unique_inputs.append(item)
+
+        try:
+            embeddings = await self._send_batch(unique_inputs, task)
+        except JinaRequestError as e:
+            if len(unique_inputs) == 1 or e.status_code >= 500:
+                self._fail(batch, e)
+                return
+            # One bad input (e.g. a corrupt image) must not fail its neighbours:
+            # retry the inputs one by one so each caller gets its own outcome.
+            results = await asyncio.gather(
+                *(self._send_batch([item], task) for item in unique_inputs),
+                return_exceptions=True,
+            )
+            for key, (_, future) in zip(keys, batch):
+                result = results[positions[key]]
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result[0])
+            return
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        for key, (_, future) in zip(keys, batch):
+            if not future.done():
+                future.set_result(embeddings[positions[key]])
+
+    @staticmethod
+    def _fail(batch: List[Tuple[Dict[str, str], asyncio.Future]], error: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
 
 
 # --- Sparse Embedding (FastEmbed) ---
@@ -140,14 +315,74 @@ sparse_embedding_model = SparseTextEmbedding(
 )
 
 
-def get_sparse_embedding(text: str) -> Dict[str, Any]:
+def get_sparse_embeddings(
+    texts: List[str], batch_size: int = 256, parallel: Optional[int] = None
+) -> List[Dict[str, Any]]:
     """
-    Generate sparse vector using FastEmbed (BM25).
+    Generate sparse vectors for many texts in one FastEmbed (BM25) pass.
+    `parallel` is forwarded to FastEmbed (0 = one worker process per core).
     Returns dictionary format compatible with Qdrant: {'indices': [...], 'values': [...]}
     """
     # embed returns a generator of SparseEmbedding (which has .indices and .values)
-    embedding_gen = sparse_embedding_model.embed([text])
-    result = next(embedding_gen)
+    embedding_gen = sparse_embedding_model.embed(
+        texts, batch_size=batch_size, parallel=parallel
+    )
 
     # FastEmbed returns numpy arrays, convert to list for JSON serialization/Qdrant
-    return {"indices": result.indices.tolist(), "values": result.values.tolist()}
+    return [
+        {"indices": result.indices.tolist(), "values": result.values.tolist()}
+        for result in embedding_gen
+    ]
+
+
+def get_sparse_embedding(text: str) -> Dict[str, Any]:
+    """
+    Generate sparse vector using FastEmbed (BM25).
+    Returns dictionary format compatible with Qdrant: {'indices': [...], 'values': [...]}
+    """
+    return get_sparse_embeddings([text])[0]
+
+
+class SparseEncoder:
+    """
+    Runs BM25 encoding off the event loop.
+    Documents are encoded in batches; query vectors are cached in memory and
+    in Redis, keyed by normalised query text.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.cache = TwoTierCache(
+            namespace="sparse:bm25",
+            encode=pack_sparse,
+            decode=unpack_sparse,
+            redis_client=redis_client,
+            memory_size=settings.SPARSE_CACHE_SIZE,
+            memory_ttl=settings.EMBEDDING_CACHE_MEMORY_TTL,
+            redis_ttl=settings.EMBEDDING_CACHE_REDIS_TTL,
+        )
+
+    async def encode_documents(self, texts: List[str]) -> List[Dict[str, Any]]:
+        # Large batches (bulk ingest, reindex) fan out over FastEmbed worker processes
+        parallel = 0 if len(texts) >= settings.SPARSE_PARALLEL_MIN_BATCH else None
+        return await asyncio.to_thread(get_sparse_embeddings, texts, parallel=parallel)
+
+    async def encode_queries(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Cached query vectors for many texts; misses are encoded in one batch.
+        """
+        vectors = list(await asyncio.gather(*(self.cache.get(t) for t in texts)))
+        missing = list(
+            dict.fromkeys(t for t, v in zip(texts, vectors) if v is None)
+        )
+        if missing:
+            encoded = dict(zip(missing, await self.encode_documents(missing)))
+            await asyncio.gather(*(self.cache.set(t, encoded[t]) for t in missing))
+            vectors = [v if v is not None else encoded[t] for t, v in zip(texts, vectors)]
+        return vectors
+
+    async def encode_query(self, text: str) -> Dict[str, Any]:
+        sparse_vector = await self.cache.get(text)
+        if sparse_vector is None:
+            sparse_vector = (await self.encode_documents([text]))[0]
+            await self.cache.set(text, sparse_vector)
+        return sparse_vector
@@ -0,0 +1,99 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.cache import StaleWhileRevalidateCache
+from core.config import settings
+from core.db import QdrantClientWrapper
+
+
+class GalleryPager:
+    """
+    Serves gallery pages of any `limit` from fixed-size blocks of points.
+
+    Blocks are consecutive `scroll` windows of `block_size` points, cached by
+    the id of their first point, so clients with different page sizes share
+    the same cached data. Cursors are "{block_start}:{position}:{point_id}":
+    the block to resume from, how far into it, and the point found there.
+    Inserts refresh a block with its points shifted, so the point id is looked
+    up again in the block as fetched now; the position is only the fallback
+    when that point is gone. A bare point id (the cursor format from before)
+    is still read.
+    """
+
+    def __init__(
+        self,
+        qdrant_wrapper: QdrantClientWrapper,
+        cache: StaleWhileRevalidateCache,
+        block_size: int = settings.GALLERY_BLOCK_SIZE,
+    ):
+        self.qdrant_wrapper = qdrant_wrapper
+        self.cache = cache
+        self.block_size = max(1, block_size)
+
+    @staticmethod
+    def parse_cursor(cursor: Optional[str]) -> Tuple[Optional[str], int, Optional[str]]:
+        if not cursor:
+            return None, 0, None
+        parts = cursor.split(":")
+        if len(parts) != 3 or not parts[1].isdigit():
+            return cursor, 0, None
+        return parts[0] or None, int(parts[1]), parts[2] or None
+
+    @staticmethod
+    def format_cursor(start: Optional[str], position: int, anchor: Optional[str] = None) -> str:
+        return f"{start or ''}:{position}:{anchor or ''}"
+
+    @staticmethod
+    def locate(block: Dict[str, Any], position: int, anchor: Optional[str]) -> int:
+        """Where `anchor` is in `block` now, else `position`."""
+        points = block["points"]
+        if anchor is None or (position < len(points) and points[position]["id"] == anchor):
+            return position
+        for i, point in enumerate(points):
+            if point["id"] == anchor:
+                return i
+        return position
+
+    async def load_block(self, start: Optional[str]) -> Dict[str, Any]:
+        """
+        {"points": [...], "next": id of the next block's first point or None}
+        """
+
+        async def fetch_block():
+            points, next_offset = await self.qdrant_wrapper.scroll(
+                limit=self.block_size, offset=start
+            )
+            return {
+                "points": [
+                    {"id": str(point.id), "payload": point.payload} for point in points
+                ],
+                "next": str(next_offset) if next_offset is not None else None,
+            }
+
+        return await self.cache.get(f"block:{self.block_size}:{start or ''}", fetch_block)
+
+    async def page(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Returns up to `limit` points starting at `cursor`, and the next cursor
+        (None once the collection is exhausted).
+        """
+        start, position, anchor = self.parse_cursor(cursor)
+        points: List[Dict[str, Any]] = []
+
+        while True:
+            block = await self.load_block(start)
+            position = self.locate(block, position, anchor)
+            take = block["points"][position : position + limit - len(points)]
+            points.extend(take)
+            position += len(take)
+
+            if position < len(block["points"]):
+                # Stopped inside this block
+                anchor = block["points"][position]["id"]
+                return points, self.format_cursor(start, position, anchor)
+            if block["next"] is None:
+                return points, None
+            start, position, anchor = block["next"], 0, None
+            if len(points) >= limit:
+                return points, self.format_cursor(start, 0)
@@ -0,0 +1,356 @@
+import asyncio
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import UploadFile
+
+from core.config import settings
+from core.db import QdrantClientWrapper
+from core.embedding import JinaClient, SparseEncoder
+from core.storage import upload_many_to_r2
+from core.utils import build_image_derivatives, transcode_pool
+
+
+class IngestError(Exception):
+    """
+    A single image failed at one ingest stage.
+    """
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(message)
+        self.stage = stage
+
+
+@dataclass
+class IngestItem:
+    """
+    One image moving through the ingest stages.
+    One of `file_bytes`, `upload` or `path` must be set; bytes are read lazily
+    from `upload` / `path` by the transcode stage.
+    """
+
+    title: str
+    filename: str = ""
+    file_bytes: Optional[bytes] = None
+    upload: Optional[UploadFile] = None
+    path: Optional[str] = None
+    taken_time: Optional[str] = None
+    camera: Optional[str] = None
+    description: Optional[str] = None
+    index: int = 0
+    point_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+    # Filled in by the stages
+    preview_webp: Optional[bytes] = None
+    original_webp: Optional[bytes] = None
+    base64_str: Optional[str] = None
+    dense_embedding: Optional[List[float]] = None
+    text_dense_embedding: Optional[List[float]] = None
+    sparse_vector: Optional[Dict[str, Any]] = None
+    preview_url: Optional[str] = None
+    original_url: Optional[str] = None
+
+    @classmethod
+    def from_metadata(
+        cls,
+        index: int,
+        filename: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        file_bytes: Optional[bytes] = None,
+        upload: Optional[UploadFile] = None,
+        path: Optional[str] = None,
+    ) -> "IngestItem":
+        """
+        Build an item from a bulk-ingest metadata entry; the title defaults to the file name.
+        """
+        metadata = metadata or {}
+        default_title = os.path.splitext(os.path.basename(filename))[0]
+        return cls(
+            index=index,
+            filename=filename,
+            file_bytes=file_bytes,
+            upload=upload,
+            path=path,
+            title=metadata.get("title") or default_title,
+            taken_time=metadata.get("taken_time"),
+            camera=metadata.get("camera"),
+            description=metadata.get("description"),
+        )
+
+    @property
+    def metadata_text(self) -> str:
+        # Combine relevant metadata text for sparse search
+        return f"{self.title} {self.description or ''} {self.taken_time or ''} {self.camera or ''}"
+
+    @property
+    def storage_filename_preview(self) -> str:
+        return f"{self.point_id}_preview.webp"
+
+    @property
+    def storage_filename_original(self) -> str:
+        return f"{self.point_id}_original.webp"
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        return {
+            "title": self.title,
+            "taken_time": self.taken_time,
+            "camera": self.camera,
+            "description": self.description,
+            "preview_url": self.preview_url,
+            "original_url": self.original_url,
+            "type": "image",
+        }
+
+
+@dataclass
+class IngestResult:
+    index: int
+    filename: str
+    status: str
+    id: Optional[str] = None
+    preview_url: Optional[str] = None
+    original_url: Optional[str] = None
+    stage: Optional[str] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def success(cls, item: IngestItem) -> "IngestResult":
+        return cls(
+            index=item.index,
+            filename=item.filename,
+            status="success",
+            id=item.point_id,
+            preview_url=item.preview_url,
+            original_url=item.original_url,
+        )
+
+    @classmethod
+    def failure(cls, item: IngestItem, stage: str, error: Exception) -> "IngestResult":
+        return cls(
+            index=item.index,
+            filename=item.filename,
+            status="error",
+            stage=stage,
+            error=str(error),
+        )
+
+
+# --- Stages ---
+
+
+async def transcode_item(item: IngestItem, block: bool = False):
+    """
+    CPU stage: encode the preview/original WebP buffers and the embedding JPEG
+    on the transcode process pool. Raises TranscodeQueueFull when the pool is
+    saturated, unless `block` is set.
+    """
+    if item.file_bytes is None and item.upload is not None:
+        # Read here rather than in the endpoint: only items admitted to the
+        # pipeline hold their upload in memory
+        item.file_bytes = await item.upload.read()
+        await item.upload.close()
+        item.upload = None
+    elif item.file_bytes is None:
+        item.file_bytes = await asyncio.to_thread(_read_file, item.path)
+
+    # Decode once; Preview: Quality 5 at 2000px, Original: Quality 60 at 3000px,
+    # plus the compressed JPEG we deliver to the embedding model.
+    derivatives = await transcode_pool.submit(
+        build_image_derivatives, item.file_bytes, block=block
+    )
+    item.preview_webp = derivatives.preview_webp
+    item.original_webp = derivatives.original_webp
+    item.base64_str = derivatives.embedding_base64
+
+    # The raw upload is no longer needed; free it while the item waits downstream.
+    item.file_bytes = None
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def embed_item(item: IngestItem, jina_client: JinaClient):
+    """
+    Network stage: dense image + metadata embeddings (one batched Jina call).
+    """
+    image_result, text_result = await asyncio.gather(
+        jina_client.get_embedding(image_base64=item.base64_str),
+        jina_client.get_embedding(text=item.metadata_text),
+        return_exceptions=True,
+    )
+    if isinstance(image_result, Exception):
+        raise IngestError("embed", f"Jina Embedding failed: {str(image_result)}")
+    if isinstance(text_result, Exception):
+        # Fail rather than fall back to a zero vector to ensure quality.
+        raise IngestError("embed", f"Metadata Embedding failed: {str(text_result)}")
+
+    item.dense_embedding, item.text_dense_embedding = image_result, text_result
+    item.base64_str = None
+
+
+async def encode_sparse(items: List[IngestItem], sparse_encoder: SparseEncoder):
+    """
+    BM25 vectors for a group of items in one batched FastEmbed pass, off the event loop.
+    """
+    sparse_vectors = await sparse_encoder.encode_documents(
+        [item.metadata_text for item in items]
+    )
+    for item, sparse_vector in zip(items, sparse_vectors):
+        item.sparse_vector = sparse_vector
+
+
+async def upload_item(item: IngestItem):
+    """
+    Object-store stage: upload both WebP derivatives to R2 concurrently, from memory.
+    """
+    try:
+        item.preview_url, item.original_url = await upload_many_to_r2(
+            [
+                (item.preview_webp, item.storage_filename_preview),
+                (item.original_webp, item.storage_filename_original),
+            ]
+        )
+    except Exception as e:
+        raise IngestError("upload", f"R2 Upload failed: {str(e)}") from e
+    item.preview_webp = item.original_webp = None
+
+
+def build_point(item: IngestItem):
+    return QdrantClientWrapper.build_point(
+        point_id=item.point_id,
+        image_dense_vector=item.dense_embedding,
+        text_dense_vector=item.text_dense_embedding,
+        sparse_vector=item.sparse_vector,
+        payload=item.payload,
+    )
+
+
+# --- Pipeline ---
+
+
+class IngestPipeline:
+    """
+    Staged ingest engine for many images.
+
+    Each stage (transcode -> embed -> upload -> write) has its own bounded
+    worker pool and hands items to the next stage through a bounded queue,
+    so while one image is uploading the next is being embedded and a third
+    is being transcoded. Qdrant writes are grouped into multi-point upserts,
+    and the BM25 vectors for each write group are encoded in one batch.
+    Results are yielded per item as soon as it finishes or fails.
+    """
+
+    def __init__(
+        self,
+        jina_client: JinaClient,
+        qdrant_wrapper: QdrantClientWrapper,
+        sparse_encoder: SparseEncoder,
+        transcode_workers: int = (
+            settings.INGEST_TRANSCODE_WORKERS or transcode_pool.max_workers
+        ),
+        embed_workers: int = settings.INGEST_EMBED_WORKERS,
+        upload_workers: int = settings.INGEST_UPLOAD_WORKERS,
+        write_batch_size: int = settings.INGEST_WRITE_BATCH_SIZE,
+        on_write: Optional[Callable[[List[IngestItem]], Awaitable[None]]] = None,
+    ):
+        self.jina_client = jina_client
+        self.qdrant_wrapper = qdrant_wrapper
+        self.sparse_encoder = sparse_encoder
+        self.transcode_workers = max(1, transcode_workers)
+        self.embed_workers = max(1, embed_workers)
+        self.upload_workers = max(1, upload_workers)
+        self.write_batch_size = max(1, write_batch_size)
+        # Called after each successful upsert, e.g. to invalidate read caches
+        self.on_write = on_write
+
+    async def run(self, items: List[IngestItem]) -> AsyncIterator[IngestResult]:
+        results: asyncio.Queue = asyncio.Queue()
+        # Bounded hand-off queues give back-pressure: a fast stage cannot
+        # run ahead and hold thousands of decoded images in memory.
+        transcode_q: asyncio.Queue = asyncio.Queue(maxsize=self.transcode_workers)
+        embed_q: asyncio.Queue = asyncio.Queue(maxsize=self.embed_workers * 2)
+        upload_q: asyncio.Queue = asyncio.Queue(maxsize=self.upload_workers * 2)
+        write_q: asyncio.Queue = asyncio.Queue(maxsize=self.write_batch_size * 2)
+
+        async def transcode(item: IngestItem):
+            # Bulk work waits for a pool slot instead of being rejected
+            await transcode_item(item, block=True)
+
+        async def embed(item: IngestItem):
+            await embed_item(item, self.jina_client)
+
+        tasks = [asyncio.create_task(self._feed(items, transcode_q))]
+        for stage, fn, count, inbox, outbox in (
+            ("transcode", transcode, self.transcode_workers, transcode_q, embed_q),
+            ("embed", embed, self.embed_workers, embed_q, upload_q),
+            ("upload", upload_item, self.upload_workers, upload_q, write_q),
+        ):
+            tasks.extend(
+                asyncio.create_task(self._stage_worker(stage, fn, inbox, outbox, results))
+                for _ in range(count)
+            )
+        tasks.append(asyncio.create_task(self._writer(write_q, results)))
+
+        try:
+            for _ in range(len(items)):
+                yield await results.get()
+        finally:
+            # Also reached when the consumer goes away mid-stream
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    async def _feed(items: List[IngestItem], outbox: asyncio.Queue):
+        for item in items:
+            await outbox.put(item)
+
+    @staticmethod
+    async def _stage_worker(
+        stage: str,
+        fn: Callable[[IngestItem], Awaitable[None]],
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        results: asyncio.Queue,
+    ):
+        while True:
+            item = await inbox.get()
+            try:
+                await fn(item)
+            except Exception as e:
+                await results.put(
+                    IngestResult.failure(item, getattr(e, "stage", stage), e)
+                )
+                continue
+            await outbox.put(item)
+
+    async def _writer(self, inbox: asyncio.Queue, results: asyncio.Queue):
+        while True:
+            # Wait for one item, then take whatever else is already queued
+            batch = [await inbox.get()]
+            while len(batch) < self.write_batch_size and not inbox.empty():
+                batch.append(inbox.get_nowait())
+
+            try:
+                await encode_sparse(batch, self.sparse_encoder)
+                await self.qdrant_wrapper.upsert_points(
+                    [build_point(item) for item in batch]
+                )
+            except Exception as e:
+                for item in batch:
+                    await results.put(IngestResult.failure(item, "write", e))
+                continue
+
+            if self.on_write:
+                try:
+                    await self.on_write(batch)
+                except Exception as e:
+                    print(f"Ingest on_write hook failed: {e}")
+
+            for item in batch:
+                await results.put(IngestResult.success(item))
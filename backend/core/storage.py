@@ -1,7 +1,9 @@
+import asyncio
+import io
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
-import os
-from typing import Optional
+from typing import List, Tuple
 from core.config import settings
 
 s3 = boto3.client(
@@ -9,22 +11,63 @@ s3 = boto3.client(
     endpoint_url=settings.CF_API_URL,
     aws_access_key_id=settings.CF_API_KEY_ID,
     aws_secret_access_key=settings.CF_API_KEY_SECRET,
-    config=Config(signature_version="s3v4"),
+    config=Config(
+        signature_version="s3v4",
+        # Concurrent ingests share this client; keep enough warm connections
+        max_pool_connections=settings.R2_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        retries={"max_attempts": 3, "mode": "standard"},
+    ),
 )
 
+# Small derivatives go up as a single PUT; only large originals use multipart.
+transfer_config = TransferConfig(
+    multipart_threshold=settings.R2_MULTIPART_THRESHOLD,
+    multipart_chunksize=settings.R2_MULTIPART_CHUNKSIZE,
+    max_concurrency=4,
+)
+
+# Object keys are unique per upload (uuid), so the content never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
-def upload_file_to_r2(file_path: str, file_name: str) -> str:
+
+def upload_bytes_to_r2(
+    data: bytes,
+    file_name: str,
+    content_type: str = "image/webp",
+    cache_control: str = IMMUTABLE_CACHE_CONTROL,
+) -> str:
     """
-    Uploads a file to Cloudflare R2 and returns the public URL.
+    Uploads an in-memory buffer to Cloudflare R2 and returns the public URL.
     """
 
     bucket_name = settings.CF_BUCKET
     base_url = settings.CLOUDFLARE_FREE_URL
 
     try:
-        s3.upload_file(file_path, bucket_name, file_name)
+        s3.upload_fileobj(
+            io.BytesIO(data),
+            bucket_name,
+            file_name,
+            ExtraArgs={"ContentType": content_type, "CacheControl": cache_control},
+            Config=transfer_config,
+        )
         url = f"{base_url}{file_name}"
         return url
     except Exception as e:
         print(f"Error uploading to R2: {e}")
         raise e
+
+
+async def upload_many_to_r2(
+    uploads: List[Tuple[bytes, str]], content_type: str = "image/webp"
+) -> List[str]:
+    """
+    Uploads several (data, file_name) buffers concurrently; returns URLs in order.
+    """
+    return await asyncio.gather(
+        *(
+            asyncio.to_thread(upload_bytes_to_r2, data, file_name, content_type)
+            for data, file_name in uploads
+        )
+    )
@@ -1,119 +1,672 @@
-import pickle
+import bisect
+import collections
+import functools
+import heapq
+import mmap
 import os
-from typing import List, Set
+import pickle
+import struct
+import sys
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# --- Binary format ---
+# Header: magic, format version, section count; then a directory of
+# (tag, offset, length) entries. Every section is a little-endian uint32 array
+# except the UTF-8 string blob. Nodes are numbered breadth-first (root = 0);
+# node i owns edges [NEDG[i], NEDG[i+1]) sorted by code point, and phrases
+# PHID[NPHR[i]:NPHR[i+1]] with frequencies PHCT. Words and phrases live in one
+# string table. Words have frequencies NCNT, and each node its precomputed
+# completions TOPS[NTOP[i]:NTOP[i+1]], most frequent first; TOPK holds how
+# many completions were kept per node.
+# The next-word table: context key NGKY[k] (one or two tokens
+# joined by CONTEXT_SEP) has continuations NGTK[NGST[k]:NGST[k+1]] with counts
+# NGCT, most frequent first; NGHT is an open-addressing hash table
+# (crc32, linear probing) of key index + 1, 0 = empty.
+MAGIC = b"GTRIE\x00\x00\x00"
+FORMAT_VERSION = 1
+# Completions precomputed per node
+TOP_K = 10
+# Continuations kept per next-word context
+NEXT_K = 10
+# Subtree nodes a fuzzy match's completions are collected from, on tries
+# without precomputed completions
+FUZZY_COLLECT_NODES = 256
+CONTEXT_SEP = "\x1f"
+NO_STRING = 0xFFFFFFFF
+_HEADER = struct.Struct("<8sHHI")
+_SECTION = struct.Struct("<4sQQ")
+_ALIGN = 8
+
 
 class TrieNode:
+    __slots__ = ("children", "is_end_of_word", "word", "count", "phrases")
+
     def __init__(self):
         self.children = {}
         self.is_end_of_word = False
         self.word = None
-        self.phrases = set()  # Store full phrases that contain this word
+        self.count = 0  # Times the word was inserted
+        self.phrases = {}  # Full phrases that contain this word -> frequency
+
+    def __setstate__(self, state):
+        # Pickles written before __slots__ carry a plain attribute dict
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        for name, value in state.items():
+            setattr(self, name, value)
+        # Older pickles have no frequencies: count everything once
+        if not hasattr(self, "count"):
+            self.count = 1 if self.is_end_of_word else 0
+        if isinstance(self.phrases, set):
+            self.phrases = dict.fromkeys(self.phrases, 1)
+
+
+class _TrieSearch:
+    """
+    Prefix and fuzzy search over any node representation. Subclasses provide
+    the node primitives: _root, _child, _children, _child_nodes, _entry, and
+    may override _top with precomputed completions.
+    """
+
+    def search(self, prefix: str, limit: int = 10, deadline: Optional[float] = None) -> List[str]:
+        """
+        Exact prefix search returning associated phrases, most frequent first.
+        With `deadline` (time.monotonic()), a subtree walk stops there with
+        the best of what it has seen.
+        """
+        node = self._root()
+        for char in prefix.lower():
+            node = self._child(node, char)
+            if node is None:
+                return []
+        return self._top(node, limit, deadline)
+
+    def search_fuzzy(
+        self,
+        pattern: str,
+        max_distance: int = 1,
+        limit: int = 10,
+        deadline: Optional[float] = None,
+    ) -> List[str]:
+        """
+        Fuzzy prefix search allowing insertions, deletions, and substitutions:
+        phrases under every trie path within `max_distance` edits of `pattern`,
+        closest matches first, then most frequent. With `deadline`
+        (time.monotonic()), stops there and returns what it has found so far.
+        """
+        pattern = pattern.lower()
+        # Distance 0 is the exact prefix: often enough on its own
+        results = dict.fromkeys(self.search(pattern, limit, deadline))  # insertion-ordered set
+        if len(results) >= limit:
+            return list(results)
+        for node in self._fuzzy_prefix_nodes(pattern, max_distance, deadline):
+            for text in self._top(node, limit, deadline, FUZZY_COLLECT_NODES):
+                results[text] = None
+                if len(results) >= limit:
+                    return list(results)
+        return list(results)
+
+    def _fuzzy_prefix_nodes(
+        self, pattern: str, max_distance: int, deadline: Optional[float] = None
+    ) -> Iterator[Any]:
+        """
+        Yields nodes whose path is within `max_distance` edits of `pattern`,
+        closest first.
+
+        One pass carrying a Levenshtein DP row per node: row[j] is the edit
+        distance between the node's path and pattern[:j], a child's row follows
+        from its parent's, and the node's distance is row[len(pattern)]. Cells
+        with |j - depth| > max_distance always exceed it, so only that band of
+        2 * max_distance + 1 cells is kept (Ukkonen's cut-off) and a child costs
+        O(max_distance), not O(len(pattern)).
+
+        No descendant can get closer than min(row): subtrees with min(row) >
+        `max_distance` are pruned, and so are subtrees that cannot beat their
+        nearest matching ancestor (whose completions already cover them).
+        Nodes are expanded in order of min(row), which makes the distances come
+        out sorted: a caller with enough results stops the walk before the
+        wider neighbourhood is visited.
+        """
+        m = len(pattern)
+        far = max_distance + 1  # Any distance beyond the budget
+        width = 2 * max_distance + 1
+        # Band cell k of a node at depth t is column j = t - max_distance + k,
+        # compared with pattern[j - 1] = padded[t - 1 + k]
+        padded = [None] * max_distance + list(pattern) + [None] * width
+        # Bands repeat a lot: they are numbered, and what a (band, depth,
+        # closest) state does is worked out once per search
+        bands = [
+            tuple(j if 0 <= j <= min(m, max_distance) else far for j in range(-max_distance, far + 1))
+        ]
+        band_ids = {bands[0]: 0}
+        states: Dict[Tuple[int, int, int], Tuple[Any, ...]] = {}
+
+        def state(band_id: int, depth: int, closest: int) -> Tuple[Any, ...]:
+            """
+            (distance if the node is kept as a match, closest for its children,
+            (band id, lowest) of a child matching no pattern char if it is kept,
+            {char: (band id, lowest)} of kept matching children).
+            """
+            band = bands[band_id]
+            k = m - depth + max_distance
+            matched = band[k] if 0 <= k < width and band[k] < closest else None
+            if matched is not None:
+                closest = matched
+            if min(band) >= closest:
+                return matched, closest, None, {}  # No descendant can be closer
+
+            # Cells past the end of the pattern don't count; bit k of a char's
+            # mask is set where it equals the pattern char of cell k
+            cells = max(0, min(width, m - depth + max_distance))
+            masks: Dict[str, int] = {}
+            for k in range(cells):
+                if padded[depth + k] is not None:
+                    masks[padded[depth + k]] = masks.get(padded[depth + k], 0) | 1 << k
+            kept = {}
+            for char, mask in [(None, 0), *masks.items()]:
+                child_band, lowest = _next_band(band, mask, cells, far)
+                if lowest < closest:
+                    if child_band not in band_ids:
+                        band_ids[child_band] = len(bands)
+                        bands.append(child_band)
+                    kept[char] = band_ids[child_band], lowest
+            return matched, closest, kept.pop(None, None), kept
+
+        # Pending nodes by bound (min of their band, which never decreases
+        # down the trie), as (node, band id, depth, closest matching ancestor);
+        # band id None: the node itself, due at distance `bound`. Last in, first
+        # out within a bound, so the walk goes deep before wide, like a DFS.
+        pending: List[List[Tuple[Any, Optional[int], int, int]]] = [[] for _ in range(far)]
+        pending[0].append((self._root(), 0, 0, far))
+        bound = steps = 0
+        while bound < far:
+            if not pending[bound]:
+                bound += 1
+                continue
+            node, band_id, depth, closest = pending[bound].pop()
+            if band_id is None:
+                yield node
+                continue
+            steps += 1
+            if deadline is not None and steps % 64 == 0 and time.monotonic() > deadline:
+                return
+
+            key = (band_id, depth, closest)
+            if key not in states:
+                states[key] = state(*key)
+            matched, closest, other, kept = states[key]
+            if matched is not None:
+                if matched == bound:
+                    yield node
+                else:
+                    pending[matched].append((node, None, depth, 0))
+
+            if other is not None:
+                # Even a child matching no pattern char is kept (near the root)
+                for char, child in self._children(node):
+                    child_band, lowest = kept.get(char, other)
+                    pending[lowest].append((child, child_band, depth + 1, closest))
+                continue
+            for char, (child_band, lowest) in kept.items():
+                child = self._child(node, char)
+                if child is not None:
+                    pending[lowest].append((child, child_band, depth + 1, closest))
+
+    def _candidates(self, node) -> Iterable[Tuple[str, int]]:
+        entry = self._entry(node)
+        if entry is None:
+            return ()
+        word, count, phrases = entry
+        # If we have phrases, prefer them. If not, fallback to the word itself.
+        return phrases.items() or ((word, count),)
+
+    def _top(
+        self, node, limit: int, deadline: Optional[float] = None, max_nodes: Optional[int] = None
+    ) -> List[str]:
+        """
+        The `limit` most frequent completions under `node` (ties by text).
+        Walks the subtree breadth-first, until `deadline` or `max_nodes` if
+        given (shortest completions are seen first); indexes with precomputed
+        completions override it.
+        """
+        scored = {}
+        queue = collections.deque([node])
+        steps = 0
+        while queue:
+            current = queue.popleft()
+            for text, count in self._candidates(current):
+                scored[text] = max(count, scored.get(text, 0))
+            queue.extend(self._child_nodes(current))
+            steps += 1
+            if steps == max_nodes:
+                break
+            if deadline is not None and steps % 64 == 0 and time.monotonic() > deadline:
+                break
+        return [text for text, _ in _rank(scored.items(), limit)]
+
+
+class Trie(_TrieSearch):
+    """
+    Mutable in-memory trie, used while building the index. `save` writes the
+    compact binary format that `CompactTrie` serves from.
+    """
+
+    # Set on copies: ids of the nodes and context keys this trie made itself
+    # (anything else is shared with the original and replaced, not changed)
+    _owned: Optional[set] = None
 
-class Trie:
     def __init__(self):
         self.root = TrieNode()
+        # Context (tokens joined by CONTEXT_SEP) -> next token -> count
+        self.continuations: Dict[str, Dict[str, int]] = {}
+
+    def copy(self) -> "Trie":
+        """
+        A copy sharing every node with this trie: changes to it copy the
+        nodes and counts they touch, so this trie can still be read
+        (without a lock) while the copy is updated.
+        """
+        trie = Trie()
+        trie.root = self.root
+        trie.continuations = dict(self.continuations)
+        trie._owned = set()
+        return trie
 
     def insert(self, word: str, phrase: str = None):
-        node = self.root
-        for char in word.lower():
-            if char not in node.children:
-                node.children[char] = TrieNode()
-            node = node.children[char]
+        """Add one occurrence of `word` (and of `phrase`, if given)."""
+        node = self._node_for(word.lower())
         node.is_end_of_word = True
         node.word = word
+        node.count += 1
         if phrase:
-            node.phrases.add(phrase)
+            node.phrases[phrase] = node.phrases.get(phrase, 0) + 1
 
-    def search(self, prefix: str, limit: int = 10) -> List[str]:
-        """Exact prefix search returning associated phrases."""
-        node = self.root
-        for char in prefix.lower():
-            if char not in node.children:
-                return []
-            node = node.children[char]
-        
-        results = set()
-        self._dfs(node, results, limit)
-        return list(results)
+    def add_continuation(self, context: List[str], token: str):
+        """Count one occurrence of `token` right after the tokens in `context`."""
+        counts = self._counts_for(CONTEXT_SEP.join(context))
+        counts[token] = counts.get(token, 0) + 1
 
-    def _dfs(self, node: TrieNode, results: Set[str], limit: int):
-        if len(results) >= limit:
-            return
-        
-        if node.is_end_of_word:
-            # If we have phrases, prefer them. If not, fallback to the word itself.
-            if node.phrases:
-                for p in node.phrases:
-                    if len(results) >= limit: break
-                    results.add(p)
-            else:
-                results.add(node.word)
-        
-        for char in node.children:
-            self._dfs(node.children[char], results, limit)
-
-    def search_fuzzy(self, pattern: str, max_distance: int = 1, limit: int = 10) -> List[str]:
-        """Fuzzy search allowing insertions, deletions, and substitutions."""
-        results = set()
-        # Start DFS from root
-        self._dfs_fuzzy(self.root, pattern.lower(), 0, max_distance, results, limit)
-        return list(results)
+    def next_words(self, context: List[str], limit: int = NEXT_K) -> List[Tuple[str, int]]:
+        """Most frequent (token, count) continuations of `context`."""
+        counts = self.continuations.get(CONTEXT_SEP.join(context))
+        return _rank(counts.items(), limit) if counts else []
 
-    def _dfs_fuzzy(self, node: TrieNode, pattern: str, index: int, edits_left: int, results: Set[str], limit: int):
-        if len(results) >= limit:
-            return
-
-        # If we have reached the end of the pattern, we collect words from this node downwards
-        # This treats the pattern as a prefix (with potential errors)
-        if index == len(pattern):
-             self._collect_all(node, results, limit)
-             return
-
-        char = pattern[index]
-
-        # 1. Match: Pattern matches Trie path
-        if char in node.children:
-            self._dfs_fuzzy(node.children[char], pattern, index + 1, edits_left, results, limit)
-        
-        if edits_left > 0:
-            # 2. Substitution: Pattern matches Trie path with a change
-            for child_char in node.children:
-                self._dfs_fuzzy(node.children[child_char], pattern, index + 1, edits_left - 1, results, limit)
-            
-            # 3. Insertion: Pattern missed a char that is in Trie (Trie advances, Pattern stays)
-            for child_char in node.children:
-                self._dfs_fuzzy(node.children[child_char], pattern, index, edits_left - 1, results, limit)
-
-            # 4. Deletion: Pattern has extra char not in Trie (Trie stays, Pattern advances)
-            self._dfs_fuzzy(node, pattern, index + 1, edits_left - 1, results, limit)
-
-    def _collect_all(self, node: TrieNode, results: Set[str], limit: int):
-        if len(results) >= limit:
-            return
-        if node.is_end_of_word:
-            # If we have phrases, prefer them. If not, fallback to the word itself.
-            if node.phrases:
-                for p in node.phrases:
-                    if len(results) >= limit: break
-                    results.add(p)
-            else:
-                results.add(node.word)
-        for char in node.children:
-            self._collect_all(node.children[char], results, limit)
+    def _continuation_items(self) -> Iterable[Tuple[str, Dict[str, int]]]:
+        return self.continuations.items()
+
+    def merge(self, other: _TrieSearch):
+        """
+        Add every word, phrase and continuation of `other` (any trie format),
+        summing counts.
+        """
+        for key, counts in other._continuation_items():
+            merged = self._counts_for(key)
+            for token, count in counts.items():
+                merged[token] = merged.get(token, 0) + count
+        stack = [(other._root(), "")]
+        while stack:
+            node, path = stack.pop()
+            entry = other._entry(node)
+            if entry is not None:
+                word, count, phrases = entry
+                target = self._node_for(path)
+                target.is_end_of_word = True
+                target.word = word
+                target.count += count
+                for phrase, phrase_count in phrases.items():
+                    target.phrases[phrase] = target.phrases.get(phrase, 0) + phrase_count
+            stack.extend((child, path + char) for char, child in other._children(node))
+
+    def _node_for(self, path: str) -> TrieNode:
+        node = self.root = self._own(self.root)
+        for char in path:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = TrieNode()
+                if self._owned is not None:
+                    self._owned.add(id(child))
+            elif self._owned is not None and id(child) not in self._owned:
+                child = node.children[char] = self._own(child)
+            node = child
+        return node
+
+    def _own(self, node: TrieNode) -> TrieNode:
+        """`node`, or on a copy a private clone of it if it is shared."""
+        if self._owned is None or id(node) in self._owned:
+            return node
+        clone = TrieNode()
+        clone.children = dict(node.children)
+        clone.is_end_of_word = node.is_end_of_word
+        clone.word = node.word
+        clone.count = node.count
+        clone.phrases = dict(node.phrases)
+        self._owned.add(id(clone))
+        return clone
+
+    def _counts_for(self, key: str) -> Dict[str, int]:
+        counts = self.continuations.get(key)
+        if counts is None or (self._owned is not None and key not in self._owned):
+            counts = self.continuations[key] = dict(counts or {})
+            if self._owned is not None:
+                self._owned.add(key)
+        return counts
+
+    def _root(self) -> TrieNode:
+        return self.root
+
+    def _child(self, node: TrieNode, char: str) -> Optional[TrieNode]:
+        return node.children.get(char)
+
+    def _children(self, node: TrieNode) -> Iterable[Tuple[str, TrieNode]]:
+        return node.children.items()
+
+    def _child_nodes(self, node: TrieNode) -> Iterable[TrieNode]:
+        return node.children.values()
+
+    def _entry(self, node: TrieNode) -> Optional[Tuple[str, int, Dict[str, int]]]:
+        if not node.is_end_of_word:
+            return None
+        return node.word, node.count, node.phrases
+
+    def to_bytes(self, top_k: int = TOP_K) -> bytes:
+        """Serialize to the compact binary format."""
+        strings: Dict[str, int] = {}
+
+        def string_id(text: str) -> int:
+            if text not in strings:
+                strings[text] = len(strings)
+            return strings[text]
+
+        edge_start, words, word_counts, phrase_start = [0], [], [], [0]
+        edge_chars, edge_children, phrase_ids, phrase_counts = [], [], [], []
+
+        # Breadth-first numbering: children of a node get consecutive ids
+        order = [self.root]
+        for node in order:
+            for char in sorted(node.children):
+                edge_chars.append(ord(char))
+                edge_children.append(len(order))
+                order.append(node.children[char])
+            edge_start.append(len(edge_chars))
+            words.append(string_id(node.word) if node.is_end_of_word else NO_STRING)
+            word_counts.append(node.count)
+            for phrase in sorted(node.phrases):
+                phrase_ids.append(string_id(phrase))
+                phrase_counts.append(node.phrases[phrase])
+            phrase_start.append(len(phrase_ids))
+
+        # Top-k per node, bottom-up: a node's completions are the best of its
+        # own candidates and its children's top-k lists
+        tops: List[List[Tuple[str, int]]] = [[]] * len(order)
+        child_ids = iter(reversed(edge_children))
+        for i in range(len(order) - 1, -1, -1):
+            node = order[i]
+            scored = dict(self._candidates(node))
+            for _ in node.children:
+                for text, count in tops[next(child_ids)]:
+                    scored[text] = max(count, scored.get(text, 0))
+            tops[i] = _rank(scored.items(), top_k)
+
+        top_start, top_ids = [0], []
+        for ranked in tops:
+            top_ids.extend(string_id(text) for text, _ in ranked)
+            top_start.append(len(top_ids))
+
+        # Next-word table: ranked continuations per context, hashed by key
+        keys = sorted(self.continuations)
+        table = [0] * _table_size(len(keys))
+        mask = len(table) - 1
+        key_ids, next_start, next_ids, next_counts = [], [0], [], []
+        for index, key in enumerate(keys):
+            slot = zlib.crc32(key.encode("utf-8")) & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = index + 1
+            key_ids.append(string_id(key))
+            for token, count in _rank(self.continuations[key].items(), NEXT_K):
+                next_ids.append(string_id(token))
+                next_counts.append(count)
+            next_start.append(len(next_ids))
+
+        blob = bytearray()
+        offsets = [0]
+        for text in strings:  # dicts keep insertion order == id order
+            blob += text.encode("utf-8")
+            offsets.append(len(blob))
+
+        return _pack_sections(
+            {
+                b"NEDG": _u32(edge_start),
+                b"NWRD": _u32(words),
+                b"NCNT": _u32(word_counts),
+                b"NPHR": _u32(phrase_start),
+                b"NTOP": _u32(top_start),
+                b"ECHR": _u32(edge_chars),
+                b"ECHD": _u32(edge_children),
+                b"PHID": _u32(phrase_ids),
+                b"PHCT": _u32(phrase_counts),
+                b"TOPS": _u32(top_ids),
+                b"TOPK": _u32([top_k]),
+                b"NGKY": _u32(key_ids),
+                b"NGHT": _u32(table),
+                b"NGST": _u32(next_start),
+                b"NGTK": _u32(next_ids),
+                b"NGCT": _u32(next_counts),
+                b"SOFF": _u32(offsets),
+                b"SBLB": bytes(blob),
+            }
+        )
 
     def save(self, filepath: str):
-        """Serialize the Trie to a file."""
+        """Write the binary index atomically (readers keep their old mapping)."""
         # Ensure directory exists
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'wb') as f:
-            pickle.dump(self, f)
+        tmp_path = f"{filepath}.tmp.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, filepath)
 
     @classmethod
     def load(cls, filepath: str) -> 'Trie':
-        """Load the Trie from a file."""
+        """Load a legacy pickled Trie from a file."""
         try:
             with open(filepath, 'rb') as f:
-                return pickle.load(f)
+                trie = pickle.load(f)
+            trie.__dict__.setdefault("continuations", {})  # Pickled before next-word support
+            return trie
         except Exception as e:
             print(f"Error loading Trie: {e}")
             return cls()
+
+
+class CompactTrie(_TrieSearch):
+    """
+    Read-only trie served straight from a memory-mapped binary index: opening
+    is O(1), and every worker mapping the same file shares its pages.
+    Nodes are integer ids into flat uint32 arrays.
+    """
+
+    def __init__(self, buffer: Any, mapping: Optional[mmap.mmap] = None):
+        self._mapping = mapping
+        sections = _read_sections(buffer)
+        self._edge_start = sections[b"NEDG"].cast("I")
+        self._words = sections[b"NWRD"].cast("I")
+        self._phrase_start = sections[b"NPHR"].cast("I")
+        self._edge_chars = sections[b"ECHR"].cast("I")
+        self._edge_children = sections[b"ECHD"].cast("I")
+        self._phrase_ids = sections[b"PHID"].cast("I")
+        self._word_counts = sections[b"NCNT"].cast("I")
+        self._phrase_counts = sections[b"PHCT"].cast("I")
+        self._top_start = sections[b"NTOP"].cast("I")
+        self._top_ids = sections[b"TOPS"].cast("I")
+        self.top_k = sections[b"TOPK"].cast("I")[0]
+        self._next_keys = sections[b"NGKY"].cast("I")
+        self._next_table = sections[b"NGHT"].cast("I")
+        self._next_start = sections[b"NGST"].cast("I")
+        self._next_ids = sections[b"NGTK"].cast("I")
+        self._next_counts = sections[b"NGCT"].cast("I")
+        self._string_offsets = sections[b"SOFF"].cast("I")
+        self._strings = sections[b"SBLB"]
+
+    @classmethod
+    def open(cls, filepath: str) -> "CompactTrie":
+        with open(filepath, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(memoryview(mapping), mapping)
+
+    @property
+    def node_count(self) -> int:
+        return len(self._words)
+
+    def _string(self, string_id: int) -> str:
+        start = self._string_offsets[string_id]
+        end = self._string_offsets[string_id + 1]
+        return str(self._strings[start:end], "utf-8")
+
+    def _root(self) -> int:
+        return 0
+
+    def _child(self, node: int, char: str) -> Optional[int]:
+        lo, hi = self._edge_start[node], self._edge_start[node + 1]
+        code = ord(char)
+        i = bisect.bisect_left(self._edge_chars, code, lo, hi)
+        if i < hi and self._edge_chars[i] == code:
+            return self._edge_children[i]
+        return None
+
+    def _children(self, node: int) -> Iterable[Tuple[str, int]]:
+        for i in range(self._edge_start[node], self._edge_start[node + 1]):
+            yield chr(self._edge_chars[i]), self._edge_children[i]
+
+    def _child_nodes(self, node: int) -> Iterable[int]:
+        return self._edge_children[self._edge_start[node] : self._edge_start[node + 1]]
+
+    def _entry(self, node: int) -> Optional[Tuple[str, int, Dict[str, int]]]:
+        string_id = self._words[node]
+        if string_id == NO_STRING:
+            return None
+        phrases = {
+            self._string(self._phrase_ids[i]): self._phrase_counts[i]
+            for i in range(self._phrase_start[node], self._phrase_start[node + 1])
+        }
+        return self._string(string_id), self._word_counts[node], phrases
+
+    def _top(
+        self, node: int, limit: int, deadline: Optional[float] = None, max_nodes: Optional[int] = None
+    ) -> List[str]:
+        if limit > self.top_k:
+            # Only `top_k` completions are stored per node: walk for more
+            return super()._top(node, limit, deadline, max_nodes)
+        start = self._top_start[node]
+        end = min(self._top_start[node + 1], start + limit)
+        return [self._string(self._top_ids[i]) for i in range(start, end)]
+
+    def next_words(self, context: List[str], limit: int = NEXT_K) -> List[Tuple[str, int]]:
+        """Most frequent (token, count) continuations of `context`: one hash probe."""
+        key = CONTEXT_SEP.join(context).encode("utf-8")
+        mask = len(self._next_table) - 1
+        slot = zlib.crc32(key) & mask
+        while True:
+            entry = self._next_table[slot]
+            if entry == 0:
+                return []
+            string_id = self._next_keys[entry - 1]
+            if self._strings[self._string_offsets[string_id] : self._string_offsets[string_id + 1]] == key:
+                return self._continuations(entry - 1, limit)
+            slot = (slot + 1) & mask
+
+    def _continuations(self, index: int, limit: int = NEXT_K) -> List[Tuple[str, int]]:
+        start = self._next_start[index]
+        end = min(self._next_start[index + 1], start + limit)
+        return [
+            (self._string(self._next_ids[i]), self._next_counts[i]) for i in range(start, end)
+        ]
+
+    def _continuation_items(self) -> Iterable[Tuple[str, Dict[str, int]]]:
+        for index, string_id in enumerate(self._next_keys):
+            yield self._string(string_id), dict(self._continuations(index))
+
+
+def load_trie(filepath: str):
+    """
+    Open an autocomplete index: binary files are memory-mapped as a
+    CompactTrie, anything else is treated as a legacy pickled Trie.
+    """
+    with open(filepath, "rb") as f:
+        is_binary = f.read(len(MAGIC)) == MAGIC
+    if is_binary:
+        return CompactTrie.open(filepath)
+    return Trie.load(filepath)
+
+
+@functools.lru_cache(maxsize=4096)
+def _next_band(band: Tuple[int, ...], matches: int, cells: int, far: int) -> Tuple[Tuple[int, ...], int]:
+    """
+    A child's Levenshtein band from its parent's (see `_fuzzy_prefix_nodes`);
+    bit k of `matches` is set where the child's char equals the pattern char
+    of cell k. Match / substitution from the diagonal, insertion from above,
+    deletion from the left, capped at `far`. Returns (band, lowest cell).
+    Bands are small and repeat a lot, so results are cached.
+    """
+    child_band = []
+    left = lowest = far
+    for k in range(cells):
+        cost = band[k] if matches >> k & 1 else band[k] + 1
+        cost = min(cost, band[k + 1] + 1, left + 1, far)
+        child_band.append(cost)
+        left = cost
+        lowest = min(lowest, cost)
+    child_band.extend([far] * (len(band) - cells))
+    return tuple(child_band), lowest
+
+
+# --- Section helpers ---
+
+
+def _rank(scored: Iterable[Tuple[str, int]], limit: int) -> List[Tuple[str, int]]:
+    """Most frequent first, ties alphabetically, so results are deterministic."""
+    return heapq.nsmallest(limit, scored, key=lambda item: (-item[1], item[0]))
+
+
+def _table_size(keys: int) -> int:
+    """Power of two with at most 50% load."""
+    size = 1
+    while size < 2 * keys:
+        size *= 2
+    return size
+
+
+def _u32(values: List[int]) -> bytes:
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def _pack_sections(sections: Dict[bytes, bytes]) -> bytes:
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    directory, body = [], bytearray()
+    for tag, data in sections.items():
+        padding = -(offset + len(body)) % _ALIGN
+        body += b"\0" * padding
+        directory.append(_SECTION.pack(tag, offset + len(body), len(data)))
+        body += data
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(sections))
+    return header + b"".join(directory) + bytes(body)
+
+
+def _read_sections(buffer: Any) -> Dict[bytes, memoryview]:
+    view = memoryview(buffer)
+    magic, version, _, count = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("Not an autocomplete index file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported autocomplete index version {version}")
+    if sys.byteorder != "little":
+        raise ValueError("Autocomplete index requires a little-endian host")
+
+    sections = {}
+    for i in range(count):
+        tag, offset, length = _SECTION.unpack_from(view, _HEADER.size + i * _SECTION.size)
+        sections[tag] = view[offset : offset + length]
+    return sections
+
@@ -1,58 +1,221 @@
+import asyncio
 import base64
 import io
-from PIL import Image
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from PIL import Image, ImageOps
+from core.config import settings
 
 
-def process_image_for_embedding(file_bytes: bytes, max_size: int = 1024) -> str:
+@dataclass
+class ImageDerivatives:
     """
-    Resizes and compresses the image for embedding API consumption.
-    Returns: Base64 string of the processed image (JPEG).
+    Everything ingest needs from one upload, produced from a single decode.
     """
-    try:
-        # Load image from bytes
-        image = Image.open(io.BytesIO(file_bytes))
 
-        # Resize if dimensions exceed max_size (maintaining aspect ratio)
-        if max(image.size) > max_size:
-            image.thumbnail((max_size, max_size))
+    preview_webp: bytes
+    original_webp: bytes
+    embedding_base64: str
 
-        # Convert to RGB to ensure compatibility (e.g. removing Alpha channel for JPEG)
-        if image.mode != "RGB":
-            image = image.convert("RGB")
 
-        # Save to buffer as JPEG
-        output = io.BytesIO()
-        image.save(
-            output, format="JPEG", quality=50
-        )  # Quality 85 is usually good enough for embeddings
+def build_image_derivatives(
+    file_bytes: bytes,
+    original_quality: int = 60,
+    original_max_size: int = 3000,
+    preview_quality: int = 5,
+    preview_max_size: int = 2000,
+    embedding_quality: int = 50,
+    embedding_max_size: int = 1024,
+) -> ImageDerivatives:
+    """
+    Decodes the upload once, applies EXIF orientation once, then builds each
+    derivative from the previous (larger) one:
+    original WebP (3000px) -> preview WebP (2000px) -> embedding JPEG (1024px).
+    """
+    # Every derivative is at most original_max_size, so decode no larger than that
+    image = _open_image(file_bytes, original_max_size)
 
-        # Encode to Base64
-        return base64.b64encode(output.getvalue()).decode("utf-8")
+    # Ensure compatible mode for WebP (RGB or RGBA)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB")
+
+    original = _downscale(image, original_max_size)
+    preview = _downscale(original, preview_max_size)
+    embedding = _downscale(preview, embedding_max_size)
+
+    return ImageDerivatives(
+        preview_webp=_encode(preview, "WEBP", preview_quality),
+        original_webp=_encode(original, "WEBP", original_quality),
+        embedding_base64=_encode_embedding_jpeg(embedding, embedding_quality),
+    )
+
+
+def process_image_for_embedding(file_bytes: bytes, max_size: int = 1024) -> str:
+    """
+    Resizes and compresses the image for embedding API consumption.
+    Returns: Base64 string of the processed image (JPEG).
+    """
+    try:
+        image = _downscale(_open_image(file_bytes, max_size), max_size)
+        # Quality 50 is usually good enough for embeddings
+        return _encode_embedding_jpeg(image, quality=50)
     except Exception as e:
         print(f"Error processing image: {e}")
-        # In case of error, try to return original base64 or re-raise
-        # For safety/fallback, let's just assume we re-raise because if PIL fails, the file is likely bad.
+        # If PIL fails, the file is likely bad.
         raise ValueError(f"Failed to process image for embedding: {e}")
 
 
-def save_as_webp(
-    file_bytes: bytes,
-    output_path: str,
-    quality: int = 50,
-    max_size: int = 3000,
-) -> None:
+def _open_image(file_bytes: bytes, max_size: Optional[int] = None) -> Image.Image:
     """
-    Compresses image to WebP and saves to the specified path.
-    Optionally downscales to max_size (longer edge).
+    Decode the image and rotate it upright according to its EXIF orientation.
+
+    When max_size is given and the codec supports scale-on-load (JPEG DCT
+    scaling via Pillow's draft mode), the image is decoded directly at the
+    smallest 1/2, 1/4 or 1/8 scale that still covers max_size, instead of
+    materialising the full-resolution bitmap. Other formats decode in full.
     """
     image = Image.open(io.BytesIO(file_bytes))
+    if max_size and image.format == "JPEG":
+        width, height = image.size
+        if max(width, height) > max_size:
+            scale = max_size / max(width, height)
+            # draft() keeps both edges >= the requested size, so ask for the
+            # fitted box rather than a square.
+            image.draft(image.mode, (round(width * scale), round(height * scale)))
+    ImageOps.exif_transpose(image, in_place=True)
+    return image
 
-    # Resize if dimensions exceed max_size (maintaining aspect ratio)
-    if max_size and max(image.size) > max_size:
-        image.thumbnail((max_size, max_size))
 
-    # Ensure compatible mode for WebP (RGB or RGBA)
-    if image.mode not in ("RGB", "RGBA"):
+def _downscale(image: Image.Image, max_size: int) -> Image.Image:
+    """
+    Fit the image inside max_size x max_size, keeping aspect ratio.
+    Large reductions are done in stages: an integer box reduce() first,
+    then a LANCZOS resample over at most 2x the target size.
+    """
+    width, height = image.size
+    if not max_size or max(width, height) <= max_size:
+        return image
+
+    scale = max_size / max(width, height)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+def _encode(image: Image.Image, format: str, quality: int) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format=format, quality=quality)
+    return output.getvalue()
+
+
+def _encode_embedding_jpeg(image: Image.Image, quality: int) -> str:
+    # Convert to RGB to ensure compatibility (e.g. removing Alpha channel for JPEG)
+    if image.mode != "RGB":
         image = image.convert("RGB")
+    return base64.b64encode(_encode(image, "JPEG", quality)).decode("utf-8")
+
+
+# --- Transcode Process Pool ---
+
+
+def available_cpus() -> int:
+    """
+    Cores this process may actually use: CPU affinity, capped by a cgroup v2
+    quota (e.g. a Cloud Run / Docker CPU limit) when one is set.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+class TranscodeQueueFull(Exception):
+    """
+    The transcode pool has no free slot; retry after `retry_after` seconds.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Image transcoding is busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class TranscodePool:
+    """
+    Dedicated process pool for CPU-heavy image work, so decoding and WebP
+    encoding run on every core outside the GIL and never occupy the
+    threadpool that serves interactive endpoints.
+
+    At most `max_workers + queue_size` jobs are admitted at once. Beyond that,
+    `submit` either raises TranscodeQueueFull (interactive uploads -> 503)
+    or, with `block=True`, waits for a slot (bulk ingest, which already
+    bounds its own concurrency). Blocking callers together hold at most all
+    but `interactive_reserve` slots, so a bulk run cannot starve uploads.
+    """
+
+    def __init__(self, max_workers: int = 0, queue_size: int = 0, interactive_reserve: int = 0):
+        self.max_workers = max_workers or available_cpus()
+        self.queue_size = queue_size or self.max_workers * 2
+        slots = self.max_workers + self.queue_size
+        self.interactive_reserve = min(interactive_reserve or max(1, self.queue_size // 2), slots - 1)
+        self._slots = asyncio.Semaphore(slots)
+        self._bulk_slots = asyncio.Semaphore(slots - self.interactive_reserve)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Moving average of job latency (including queueing), used for Retry-After
+        self._avg_seconds = 1.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs the event loop,
+            # boto3 and ONNX threads is not safe.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._avg_seconds))
+
+    async def submit(self, fn: Callable[..., Any], *args, block: bool = False) -> Any:
+        if not block:
+            if self._slots.locked():
+                raise TranscodeQueueFull(self.retry_after())
+            return await self._run(fn, *args)
+
+        async with self._bulk_slots:
+            return await self._run(fn, *args)
+
+    async def _run(self, fn: Callable[..., Any], *args) -> Any:
+        async with self._slots:
+            start = time.monotonic()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+            finally:
+                elapsed = time.monotonic() - start
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
 
-    image.save(output_path, format="WEBP", quality=quality)
+transcode_pool = TranscodePool(
+    max_workers=settings.TRANSCODE_WORKERS,
+    queue_size=settings.TRANSCODE_QUEUE_SIZE,
+    interactive_reserve=settings.TRANSCODE_INTERACTIVE_RESERVE,
+)
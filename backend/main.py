@@ -1,48 +1,90 @@
-import uuid
+import asyncio
 import os
+from dataclasses import asdict
 from typing import Optional, List
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, status
-from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
+from qdrant_client.http.exceptions import UnexpectedResponse
 from core.random_query import generate_random_query
 import secrets
 import json
 from enum import Enum
-import redis.asyncio as redis
 
 # Imports from Core
 from core.config import settings
-from core.embedding import JinaClient, get_sparse_embedding
-from core.storage import upload_file_to_r2
+from core.cache import (
+    CollectionGeneration,
+    SearchResultCache,
+    SingleFlight,
+    StaleWhileRevalidateCache,
+    create_redis_client,
+    normalize_query,
+)
+from core.embedding import JinaClient, SparseEncoder
 from core.db import QdrantClientWrapper
-from core.utils import process_image_for_embedding, save_as_webp
+from core.gallery import GalleryPager
+from core.utils import (
+    TranscodeQueueFull,
+    process_image_for_embedding,
+    transcode_pool,
+)
+from core.ingest import (
+    IngestError,
+    IngestItem,
+    IngestPipeline,
+    build_point,
+    embed_item,
+    encode_sparse,
+    transcode_item,
+    upload_item,
+)
 from core.generate_description import description_generator
 from core.autocomplete import autocomplete_manager
 
 # --- Initialize Clients ---
-jina_client = JinaClient()
 qdrant_wrapper = QdrantClientWrapper()
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    username=settings.REDIS_USERNAME,
-    password=settings.REDIS_PASSWORD,
-    decode_responses=True,
+redis_client = create_redis_client(decode_responses=True)
+# Binary client for packed query vectors; short timeout to not block app if Redis is down
+cache_redis_client = create_redis_client(decode_responses=False, socket_timeout=2)
+jina_client = JinaClient(redis_client=cache_redis_client)
+sparse_encoder = SparseEncoder(redis_client=cache_redis_client)
+collection_generation = CollectionGeneration(redis_client)
+search_cache = SearchResultCache(
+    redis_client, collection_generation, ttl=settings.SEARCH_CACHE_TTL
+)
+# Coalesces identical concurrent cache misses (/search, /gallery, /image)
+single_flight = SingleFlight()
+gallery_cache = StaleWhileRevalidateCache(
+    redis_client,
+    collection_generation,
+    single_flight,
+    namespace="gallery",
+    fresh_ttl=settings.GALLERY_CACHE_TTL,
+    max_stale=settings.GALLERY_CACHE_MAX_STALE,
 )
+gallery_pager = GalleryPager(qdrant_wrapper, gallery_cache)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Load autocomplete model if available
+    # Load autocomplete model if available, then follow newly published ones
     autocomplete_manager.initialize()
+    artifact_watcher = asyncio.create_task(autocomplete_manager.watch_artifacts())
 
     # Startup: Initialize Qdrant Collection
     await qdrant_wrapper.init_collection()
+    await jina_client.connect()
+    await sparse_encoder.cache.connect()
     yield
+    artifact_watcher.cancel()
+    transcode_pool.shutdown()
+    await jina_client.close()
+    await cache_redis_client.close()
     await redis_client.close()
     await qdrant_wrapper.client.close()
 
@@ -66,7 +108,7 @@ async def autocomplete(q: str):
     if not q:
         return {"suggestions": []}
     
-    suggestions = autocomplete_manager.suggest(q)
+    suggestions = await autocomplete_manager.suggest(q)
     return {"suggestions": suggestions}
 
 @app.get("/image/{image_id}")
@@ -75,7 +117,9 @@ async def get_image_by_id(image_id: str):
     Get a single image detail by its ID.
     """
     try:
-        point = await qdrant_wrapper.get_point(image_id)
+        point = await single_flight.do(
+            ("image", image_id), lambda: qdrant_wrapper.get_point(image_id)
+        )
         if not point:
             raise HTTPException(status_code=404, detail="Image not found")
         
@@ -93,13 +137,23 @@ async def get_image_by_id(image_id: str):
         print(f"Error fetching image {image_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@app.post("/autocomplete/build")
+@app.post("/autocomplete/build", status_code=202)
 async def build_autocomplete():
     """
-    Trigger a rebuild of the autocomplete index from Qdrant data.
+    Start a background rebuild of the autocomplete index from Qdrant data;
+    poll GET /autocomplete/build for progress. Suggestions keep using the
+    current index until the new one is swapped in.
+    """
+    build = autocomplete_manager.start_build(qdrant_wrapper)
+    return {"status": "accepted", "build": build}
+
+
+@app.get("/autocomplete/build")
+async def autocomplete_build_status():
+    """
+    Status of the latest autocomplete rebuild.
     """
-    await autocomplete_manager.build_index(qdrant_wrapper)
-    return {"status": "success", "message": "Autocomplete index rebuilt."}
+    return autocomplete_manager.build_status
 
 
 # --- Security ---
@@ -130,15 +184,27 @@ class SearchMode(str, Enum):
     IMAGE_ONLY = "image-only"
 
 
+class SearchProfile(str, Enum):
+    FAST = "fast"  # e.g. typeahead
+    BALANCED = "balanced"
+    EXACT = "exact"  # e.g. full results page
+
+
 class SearchRequest(BaseModel):
     query: str
     limit: int = 4
     similarity_threshold: Optional[float] = None
     search_mode: SearchMode = SearchMode.HYBRID
+    profile: SearchProfile = SearchProfile.BALANCED
+
+
+class BatchSearchRequest(BaseModel):
+    searches: List[SearchRequest]
 
 
 class SimilarToRequest(BaseModel):
-    image_url: str
+    image_url: Optional[str] = None
+    id: Optional[str] = None  # Point ID; skips the URL lookup when given
     limit: int = 4
 
 
@@ -163,6 +229,35 @@ class GenerateDescriptionResponse(BaseModel):
 # --- Endpoints ---
 
 
+async def invalidate_caches():
+    """
+    Bump the collection generation: cached search results stop matching and
+    cached gallery pages are refreshed on their next read.
+    """
+    try:
+        await collection_generation.bump()
+    except Exception as e:
+        print(f"Failed to bump collection generation: {e}")
+
+
+async def on_ingested(items: List[IngestItem]):
+    """
+    After new points are written: invalidate caches and make their titles /
+    descriptions suggestible.
+    """
+    await invalidate_caches()
+    for item in items:
+        await autocomplete_manager.add_texts([item.title, item.description])
+
+
+def transcode_busy(e: TranscodeQueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Image processing is at capacity, please retry later",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
 @app.post("/ingest")
 async def ingest_image(
     username: str = Depends(verify_credentials),
@@ -175,127 +270,143 @@ async def ingest_image(
     """
     Ingest an image:
     1. Read and Convert to Base64
-    2. Save Preview & Original Versions to R2
-    3. Get Dense Embedding from Jina
-    4. Generate Sparse Embedding from Metadata
-    5. Save to Qdrant
+    2. Get Dense Embeddings (Image + Metadata) from Jina in one batch,
+       and the Sparse Embedding from Metadata
+    3. Save Preview & Original Versions to R2
+    4. Save to Qdrant
     """
     try:
         # 1. Read file
-        file_bytes = await file.read()
-        file_uuid = uuid.uuid4()
-
-        # Generate filenames for R2 (WebP)
-        # Preview: Quality 10, Original: Quality 90
-        storage_filename_preview = f"{file_uuid}_preview.webp"
-        storage_filename_original = f"{file_uuid}_original.webp"
-
-        # Save temp files for R2 upload
-        temp_filename_preview = f"/tmp/{storage_filename_preview}"
-        temp_filename_original = f"/tmp/{storage_filename_original}"
-
-        # 1.1 Save Preview (Quality 10) with lower resolution
-        await run_in_threadpool(
-            save_as_webp, file_bytes, temp_filename_preview, 5, max_size=2000
+        item = IngestItem(
+            file_bytes=await file.read(),
+            filename=file.filename or "",
+            title=title,
+            taken_time=taken_time,
+            camera=camera,
+            description=description,
         )
 
-        # 1.2 Save Original (Quality 90)
-        await run_in_threadpool(save_as_webp, file_bytes, temp_filename_original, 60)
-
-        # Process image for Jina (Resize & Compress)
-        # We generally deliver the compressed version to embedding model to save bandwidth and meet limits.
-        # R2 gets the compressed WebP file via temp_filename logic.
-        base64_str = process_image_for_embedding(file_bytes)
+        # 1.1 Encode Preview & Original WebP, process image for Jina
+        try:
+            await transcode_item(item)
+        except TranscodeQueueFull as e:
+            raise transcode_busy(e)
 
         print("Prepare to embed image via Jina...")
 
-        # 2. Dense Embedding (Image)
+        # 2. Dense Embeddings (Image + Metadata Text) and Sparse Embedding
+        # Issued together so the batcher sends both inputs in one Jina request.
         try:
-            dense_embedding = jina_client.get_embedding(image_base64=base64_str)
-        except Exception as e:
+            await embed_item(item, jina_client)
+        except IngestError as e:
             print(e)
-            raise HTTPException(
-                status_code=500, detail=f"Jina Embedding failed: {str(e)}"
-            )
+            raise HTTPException(status_code=500, detail=str(e))
+        await encode_sparse([item], sparse_encoder)
 
-        print(f"Dense embedding length: {len(dense_embedding)}")
+        print(f"Dense embedding length: {len(item.dense_embedding)}")
 
         # 3. R2 Upload
         try:
-            # Upload the Preview WebP file
-            r2_url_preview = await run_in_threadpool(
-                upload_file_to_r2, temp_filename_preview, storage_filename_preview
-            )
-            # Upload the Original WebP file
-            r2_url_original = await run_in_threadpool(
-                upload_file_to_r2, temp_filename_original, storage_filename_original
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"R2 Upload failed: {str(e)}")
-        finally:
-            if os.path.exists(temp_filename_preview):
-                os.remove(temp_filename_preview)
-            if os.path.exists(temp_filename_original):
-                os.remove(temp_filename_original)
-
-        print(f"Uploaded to R2. Preview: {r2_url_preview}, Original: {r2_url_original}")
-
-        # 4. Sparse Embedding
-        # Combine relevant metadata text for sparse search
-        metadata_text = f"{title} {description or ''} {taken_time or ''} {camera or ''}"
-
-        # FastEmbed is CPU bound, might want to offload if heavy, but for short text it's fast.
-        sparse_vec = get_sparse_embedding(metadata_text)
-
-        # 4.5 Dense Embedding (Metadata Text)
-        try:
-            text_dense_embedding = jina_client.get_embedding(text=metadata_text)
-        except Exception as e:
-            print(f"Warning: Metadata Dense Embedding failed: {e}")
-            # Fallback? Or just fail? Let's use zero vector or fail.
-            # Ideally fail, but maybe we can just duplicate image embedding if we had to.
-            # But let's fail to ensure quality.
-            raise HTTPException(
-                status_code=500, detail=f"Metadata Embedding failed: {str(e)}"
-            )
-
-        # 5. Qdrant Upsert
-        point_id = str(file_uuid)
-        payload = {
-            "title": title,
-            "taken_time": taken_time,
-            "camera": camera,
-            "description": description,
-            "preview_url": r2_url_preview,
-            "original_url": r2_url_original,
-            "type": "image",
-        }
+            await upload_item(item)
+        except IngestError as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
-        await qdrant_wrapper.upsert_point(
-            point_id=point_id,
-            image_dense_vector=dense_embedding,
-            text_dense_vector=text_dense_embedding,
-            sparse_vector=sparse_vec,
-            payload=payload,
+        print(
+            f"Uploaded to R2. Preview: {item.preview_url}, Original: {item.original_url}"
         )
 
-        # await invalidate_gallery_cache()
+        # 4. Qdrant Upsert
+        await qdrant_wrapper.upsert_points([build_point(item)])
+        await on_ingested([item])
 
         return {
             "status": "success",
-            "id": point_id,
-            "preview_url": r2_url_preview,
-            "original_url": r2_url_original,
-            "metadata_used_for_sparse": metadata_text,
+            "id": item.point_id,
+            "preview_url": item.preview_url,
+            "original_url": item.original_url,
+            "metadata_used_for_sparse": item.metadata_text,
         }
 
     except HTTPException as he:
         raise he
     except Exception as e:
-        # Cleanup?
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/ingest/batch")
+async def ingest_batch(
+    username: str = Depends(verify_credentials),
+    files: List[UploadFile] = File(...),
+    metadata: Optional[str] = Form(None),
+):
+    """
+    Ingest many images through the staged pipeline (transcode / embed / upload / write).
+    `metadata` is an optional JSON list aligned with `files`; each entry may hold
+    title, taken_time, camera and description (title defaults to the file name).
+    Streams one NDJSON line per image as it finishes, then a summary line.
+    """
+    if len(files) > settings.INGEST_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many files (max {settings.INGEST_BATCH_MAX_FILES} per batch)",
+        )
+
+    try:
+        entries = json.loads(metadata) if metadata else [{}] * len(files)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="metadata must be valid JSON")
+    if (
+        not isinstance(entries, list)
+        or len(entries) != len(files)
+        or not all(isinstance(entry, dict) for entry in entries)
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="metadata must be a list of objects, one per file",
+        )
+
+    items = [
+        IngestItem.from_metadata(
+            index=index,
+            filename=file.filename or "",
+            metadata=entry,
+            upload=file,
+        )
+        for index, (file, entry) in enumerate(zip(files, entries))
+    ]
+    pipeline = IngestPipeline(
+        jina_client,
+        qdrant_wrapper,
+        sparse_encoder,
+        on_write=on_ingested,
+    )
+
+    async def progress():
+        succeeded = 0
+        completed = 0
+        async for result in pipeline.run(items):
+            completed += 1
+            succeeded += result.status == "success"
+            yield json.dumps(
+                {
+                    "event": "item",
+                    "completed": completed,
+                    "total": len(items),
+                    **asdict(result),
+                }
+            ) + "\n"
+        yield json.dumps(
+            {
+                "event": "summary",
+                "total": len(items),
+                "succeeded": succeeded,
+                "failed": len(items) - succeeded,
+            }
+        ) + "\n"
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
 @app.post("/generate-description", response_model=GenerateDescriptionResponse)
 async def generate_description_endpoint(file: UploadFile = File(...)):
     """
@@ -307,7 +418,12 @@ async def generate_description_endpoint(file: UploadFile = File(...)):
             raise HTTPException(status_code=400, detail="Empty file")
 
         # Compress/resize before sending to LLM
-        image_base64 = await run_in_threadpool(process_image_for_embedding, file_bytes)
+        try:
+            image_base64 = await transcode_pool.submit(
+                process_image_for_embedding, file_bytes
+            )
+        except TranscodeQueueFull as e:
+            raise transcode_busy(e)
 
         result = await description_generator.generate(image_base64)
 
@@ -324,34 +440,137 @@ async def generate_description_endpoint(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def search_cache_params(request: SearchRequest) -> dict:
+    return {
+        "search_mode": request.search_mode.value,
+        "limit": request.limit,
+        "similarity_threshold": request.similarity_threshold,
+        "profile": request.profile.value,
+    }
+
+
 @app.post("/search", response_model=List[SearchResult])
 async def search_images(request: SearchRequest):
     """
     Search for images using text query.
+    0. Return the cached result if the collection has not changed since
     1. Get Dense Embedding for Query (Text)
     2. Get Sparse Embedding for Query (Text)
     3. Retrieve from Qdrant
     """
+    cache_params = search_cache_params(request)
     try:
-        print("Getting embeddings for search query...")
-        # 1. Dense (Text)
-        dense_embedding = jina_client.get_embedding(text=request.query, is_query=True)
-        print(f"Dense embedding length: {len(dense_embedding)}")
-        # 2. Sparse (Text)
-        sparse_vec = get_sparse_embedding(request.query)
-
-        print("Searching Qdrant...")
-        # 3. Search
-        results = await qdrant_wrapper.search(
-            dense_vector=dense_embedding, sparse_vector=sparse_vec, limit=request.limit, similarity_threshold=request.similarity_threshold, search_mode=request.search_mode
+        # 0. Cached response for this query / mode / limit / threshold.
+        # One generation for the lookup and the store, read before searching.
+        generation = await search_cache.current_generation()
+        cached = await search_cache.get(generation, request.query, **cache_params)
+        if cached is not None:
+            return cached
+
+        async def run_search():
+            print("Getting embeddings for search query...")
+            # 1. Dense (Text)
+            dense_embedding = await jina_client.get_embedding(
+                text=request.query, is_query=True
+            )
+            print(f"Dense embedding length: {len(dense_embedding)}")
+            # 2. Sparse (Text)
+            sparse_vec = await sparse_encoder.encode_query(request.query)
+
+            print("Searching Qdrant...")
+            # 3. Search
+            results = await qdrant_wrapper.search(
+                dense_vector=dense_embedding, sparse_vector=sparse_vec, limit=request.limit, similarity_threshold=request.similarity_threshold, search_mode=request.search_mode, profile=request.profile.value
+            )
+
+            print(results)
+
+            # Format results
+            output = []
+            for hit in results:
+                output.append(
+                    SearchResult(
+                        id=str(hit.id),
+                        preview_url=hit.payload.get("preview_url", ""),
+                        original_url=hit.payload.get("original_url", ""),
+                        metadata=hit.payload,
+                        score=hit.score,
+                    )
+                )
+
+            await search_cache.set(
+                generation, request.query, [r.model_dump() for r in output], **cache_params
+            )
+            return output
+
+        # Identical concurrent misses share one embed + Qdrant round trip
+        # (only within a generation: later requests must not join an older search)
+        flight_key = (
+            "search",
+            generation,
+            normalize_query(request.query),
+            tuple(sorted(cache_params.items())),
         )
+        return await single_flight.do(flight_key, run_search)
 
-        print(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Format results
-        output = []
-        for hit in results:
-            output.append(
+
+@app.post("/search/batch", response_model=List[List[SearchResult]])
+async def search_images_batch(request: BatchSearchRequest):
+    """
+    Run several searches at once; results come back in request order.
+    1. Serve cached results
+    2. Embed the remaining queries in one Jina request (dense) and one BM25 batch (sparse)
+    3. Run all hybrid queries in one Qdrant query_batch_points call
+    """
+    searches = request.searches
+    if len(searches) > settings.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.SEARCH_BATCH_MAX_QUERIES} searches per batch",
+        )
+
+    try:
+        # 1. Cache (one generation, read up front, for every lookup and store)
+        generation = await search_cache.current_generation()
+        outputs = list(
+            await asyncio.gather(
+                *(
+                    search_cache.get(generation, s.query, **search_cache_params(s))
+                    for s in searches
+                )
+            )
+        )
+        pending = [i for i, cached in enumerate(outputs) if cached is None]
+        if not pending:
+            return outputs
+
+        # 2. Dense + Sparse embeddings for every miss
+        queries = [searches[i].query for i in pending]
+        dense_embeddings, sparse_vecs = await asyncio.gather(
+            jina_client.get_text_embeddings(queries),
+            sparse_encoder.encode_queries(queries),
+        )
+
+        # 3. One Qdrant round trip
+        batch_results = await qdrant_wrapper.search_batch(
+            [
+                {
+                    "dense_vector": dense,
+                    "sparse_vector": sparse,
+                    "limit": searches[i].limit,
+                    "similarity_threshold": searches[i].similarity_threshold,
+                    "search_mode": searches[i].search_mode.value,
+                    "profile": searches[i].profile.value,
+                }
+                for i, dense, sparse in zip(pending, dense_embeddings, sparse_vecs)
+            ]
+        )
+
+        for i, results in zip(pending, batch_results):
+            output = [
                 SearchResult(
                     id=str(hit.id),
                     preview_url=hit.payload.get("preview_url", ""),
@@ -359,9 +578,22 @@ async def search_images(request: SearchRequest):
                     metadata=hit.payload,
                     score=hit.score,
                 )
+                for hit in results
+            ]
+            outputs[i] = output
+
+        await asyncio.gather(
+            *(
+                search_cache.set(
+                    generation,
+                    searches[i].query,
+                    [r.model_dump() for r in outputs[i]],
+                    **search_cache_params(searches[i]),
+                )
+                for i in pending
             )
-
-        return output
+        )
+        return outputs
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -370,43 +602,33 @@ async def search_images(request: SearchRequest):
 @app.post("/similar-to", response_model=List[SearchResult])
 async def similar_to_image(request: SimilarToRequest):
     """
-    Find similar images based on an existing image URL.
-    1. Check if image URL exists in Qdrant
-    2. Retrieve the image's vectors (dense-text + sparse)
-    3. Perform a hybrid search
-    4. Return results in the same schema as /search
+    Find similar images based on an existing image (by ID or URL).
+    1. Resolve the point ID (indexed original_url lookup if only a URL is given)
+    2. Hybrid search inside Qdrant from the stored point's vectors
+    3. Return results in the same schema as /search
     """
-    try:
-        point = await qdrant_wrapper.find_point_by_image_url(request.image_url)
-        if not point:
-            raise HTTPException(status_code=404, detail="image_url not found")
-
-        vectors = getattr(point, "vector", None) or getattr(point, "vectors", None)
-        if not vectors:
-            raise HTTPException(status_code=500, detail="Vectors not found for image")
-
-        dense_vector = vectors.get("dense-text") or vectors.get("dense-image")
-        sparse_vector = vectors.get("sparse")
+    if not request.id and not request.image_url:
+        raise HTTPException(status_code=422, detail="Either id or image_url is required")
 
-        if dense_vector is None or sparse_vector is None:
-            raise HTTPException(status_code=500, detail="Required vectors missing")
-
-        sparse_vec = qdrant_wrapper.normalize_sparse_vector(sparse_vector)
+    try:
+        point_id = request.id
+        if not point_id:
+            point_id = await qdrant_wrapper.find_point_id_by_image_url(request.image_url)
+            if point_id is None:
+                raise HTTPException(status_code=404, detail="image_url not found")
 
-        # Fetch one extra to allow removing the original image from results
-        results = await qdrant_wrapper.search(
-            dense_vector=dense_vector,
-            sparse_vector=sparse_vec,
-            limit=request.limit + 1,
-        )
+        try:
+            results = await qdrant_wrapper.search_similar_to_point(
+                point_id, limit=request.limit
+            )
+        except UnexpectedResponse as e:
+            # Qdrant rejects a query by an ID that does not exist
+            if e.status_code in (400, 404):
+                raise HTTPException(status_code=404, detail="id not found")
+            raise
 
         output = []
         for hit in results:
-            if (
-                hit.payload.get("original_url") == request.image_url
-                or hit.payload.get("preview_url") == request.image_url
-            ):
-                continue
             output.append(
                 SearchResult(
                     id=str(hit.id),
@@ -417,7 +639,7 @@ async def similar_to_image(request: SimilarToRequest):
                 )
             )
 
-        return output[: request.limit]
+        return output
 
     except HTTPException as he:
         raise he
@@ -432,38 +654,22 @@ async def get_gallery(limit: int = 20, cursor: Optional[str] = None):
     """
 
     try:
-        # 1. Try Cache
-        cache_key = f"gallery:{limit}:{cursor}"
-        cached_data = await redis_client.get(cache_key)
-        if cached_data:
-            print("Cache Hit!")
-            return GalleryResponse(**json.loads(cached_data))
-
-        print("Cache Miss! Fetching from Qdrant...")
-
-        # 2. Fetch from DB
-        points, next_cursor = await qdrant_wrapper.scroll(limit=limit, offset=cursor)
+        # Cut from cached fixed-size blocks (possibly stale while they refresh)
+        points, next_cursor = await gallery_pager.page(limit=limit, cursor=cursor)
 
         items = []
         for point in points:
             items.append(
                 SearchResult(
-                    id=str(point.id),
-                    preview_url=point.payload.get("preview_url", ""),
-                    original_url=point.payload.get("original_url", ""),
-                    metadata=point.payload,
+                    id=point["id"],
+                    preview_url=point["payload"].get("preview_url", ""),
+                    original_url=point["payload"].get("original_url", ""),
+                    metadata=point["payload"],
                     score=1.0,  # Default score for browsing
                 )
             )
 
-        response = GalleryResponse(items=items, next_cursor=next_cursor)
-
-        # 3. Save to Cache
-        await redis_client.set(
-            cache_key, response.model_dump_json(), ex=300
-        )  # TTL 5 minutes
-
-        return response
+        return GalleryResponse(items=items, next_cursor=next_cursor)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -486,3 +692,19 @@ async def health_check():
     Health check endpoint.
     """
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    In-process cache and request-coalescing counters, and autocomplete
+    latency (per worker).
+    """
+    return {
+        "single_flight": single_flight.stats(),
+        "embedding_cache": jina_client.cache.stats(),
+        "sparse_cache": sparse_encoder.cache.stats(),
+        "search_cache": search_cache.counters,
+        "gallery_cache": gallery_cache.stats(),
+        "autocomplete": autocomplete_manager.stats(),
+    }
@@ -0,0 +1,139 @@
+"""
+Bulk-ingest a folder of photos through the staged ingest pipeline.
+
+Usage (from backend/):
+    python -m scripts.bulk_ingest ~/Pictures/trip --metadata trip.json
+
+`--metadata` is an optional JSON object keyed by file name, e.g.
+    {"IMG_0001.jpg": {"title": "Harbour at dawn", "camera": "Sony A7M4"}}
+Files without an entry are titled after their file name.
+
+Titles and descriptions are folded into the autocomplete model at the end and
+published; running API workers load it from the artifact store.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from core.autocomplete import autocomplete_manager
+from core.cache import CollectionGeneration, create_redis_client
+from core.config import settings
+from core.db import QdrantClientWrapper
+from core.embedding import JinaClient, SparseEncoder
+from core.ingest import IngestItem, IngestPipeline
+from core.utils import transcode_pool
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff"}
+
+
+def collect_paths(inputs):
+    paths = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for root, _, names in os.walk(entry):
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                        paths.append(os.path.join(root, name))
+        else:
+            paths.append(entry)
+    return paths
+
+
+async def run(args):
+    metadata = {}
+    if args.metadata:
+        with open(args.metadata) as f:
+            metadata = json.load(f)
+
+    paths = collect_paths(args.paths)
+    items = [
+        IngestItem.from_metadata(
+            index=index,
+            filename=os.path.basename(path),
+            metadata=metadata.get(os.path.basename(path)),
+            path=path,
+        )
+        for index, path in enumerate(paths)
+    ]
+    if not items:
+        print("No images found.")
+        return 0
+
+    jina_client = JinaClient()
+    qdrant_wrapper = QdrantClientWrapper()
+    redis_client = create_redis_client()
+    generation = CollectionGeneration(redis_client)
+
+    async def on_write(batch):
+        # Let the running API drop cached reads that predate these points
+        await generation.bump()
+        await autocomplete_manager.add_texts(
+            [text for item in batch for text in (item.title, item.description)]
+        )
+
+    await asyncio.to_thread(autocomplete_manager.initialize)
+    await jina_client.connect()
+    await qdrant_wrapper.init_collection()
+
+    pipeline = IngestPipeline(
+        jina_client,
+        qdrant_wrapper,
+        SparseEncoder(),
+        transcode_workers=args.transcode_workers,
+        embed_workers=args.embed_workers,
+        upload_workers=args.upload_workers,
+        write_batch_size=args.write_batch_size,
+        on_write=on_write,
+    )
+
+    failed = 0
+    try:
+        completed = 0
+        async for result in pipeline.run(items):
+            completed += 1
+            if result.status == "success":
+                print(f"[{completed}/{len(items)}] ok    {result.filename} -> {result.id}")
+            else:
+                failed += 1
+                print(
+                    f"[{completed}/{len(items)}] error {result.filename} "
+                    f"({result.stage}): {result.error}"
+                )
+        await autocomplete_manager.flush()
+    finally:
+        transcode_pool.shutdown()
+        await jina_client.close()
+        await redis_client.close()
+        await qdrant_wrapper.client.close()
+
+    print(f"Done: {len(items) - failed} succeeded, {failed} failed.")
+    if autocomplete_manager.artifact_store is None:
+        print("No autocomplete artifact store: restart the API to serve the new suggestions.")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest photos into the gallery.")
+    parser.add_argument("paths", nargs="+", help="Image files or directories")
+    parser.add_argument("--metadata", help="JSON file mapping file name to metadata")
+    parser.add_argument(
+        "--transcode-workers",
+        type=int,
+        default=settings.INGEST_TRANSCODE_WORKERS or transcode_pool.max_workers,
+    )
+    parser.add_argument("--embed-workers", type=int, default=settings.INGEST_EMBED_WORKERS)
+    parser.add_argument(
+        "--upload-workers", type=int, default=settings.INGEST_UPLOAD_WORKERS
+    )
+    parser.add_argument(
+        "--write-batch-size", type=int, default=settings.INGEST_WRITE_BATCH_SIZE
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
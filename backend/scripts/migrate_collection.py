@@ -0,0 +1,86 @@
+"""
+Apply the configured storage layout (quantization, on-disk vectors, HNSW
+m / ef_construct, sparse index on disk) to the existing collection.
+
+Usage (from backend/):
+    QDRANT_QUANTIZATION=scalar QDRANT_VECTORS_ON_DISK=true \
+        python -m scripts.migrate_collection --wait
+    python -m scripts.migrate_collection --quantization binary --dry-run
+
+Qdrant rebuilds segments in the background; searches keep working meanwhile.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from core.config import settings
+from core.db import DENSE_VECTOR_NAMES, QUANTIZATION_MODES, QdrantClientWrapper
+
+
+def describe(params) -> str:
+    hnsw = params.hnsw_config
+    return (
+        f"on_disk={params.on_disk} "
+        f"hnsw(m={hnsw.m if hnsw else None}, ef_construct={hnsw.ef_construct if hnsw else None}) "
+        f"quantization={params.quantization_config}"
+    )
+
+
+async def run(args):
+    qdrant_wrapper = QdrantClientWrapper()
+    try:
+        info = await qdrant_wrapper.client.get_collection(settings.COLLECTION_NAME)
+        vectors = info.config.params.vectors
+        vector_size = vectors[DENSE_VECTOR_NAMES[0]].size
+        target = qdrant_wrapper.dense_vector_params(vector_size, args.quantization)
+
+        print(f"Collection {settings.COLLECTION_NAME}: {info.points_count} points")
+        # Collection-level settings apply where a vector has no override
+        print(f"  collection hnsw: {info.config.hnsw_config}")
+        print(f"  collection quantization: {info.config.quantization_config}")
+        for name in DENSE_VECTOR_NAMES:
+            print(f"  {name}: {describe(vectors[name])}")
+        print(f"  sparse: {info.config.params.sparse_vectors['sparse'].index}")
+        print("Target:")
+        print(f"  dense: {describe(target)}")
+        print(f"  sparse: {qdrant_wrapper.sparse_vector_params().index}")
+
+        if args.dry_run:
+            return 0
+
+        await qdrant_wrapper.apply_storage_config(vector_size, args.quantization)
+        print("Update accepted.")
+
+        while args.wait:
+            info = await qdrant_wrapper.client.get_collection(settings.COLLECTION_NAME)
+            print(
+                f"  status={info.status} indexed_vectors={info.indexed_vectors_count} "
+                f"segments={info.segments_count}"
+            )
+            if info.status == "green":
+                break
+            await asyncio.sleep(args.poll_interval)
+        return 0
+    finally:
+        await qdrant_wrapper.client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--quantization",
+        choices=QUANTIZATION_MODES,
+        default=settings.QDRANT_QUANTIZATION,
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only print the change")
+    parser.add_argument(
+        "--wait", action="store_true", help="Poll until the optimizer has finished"
+    )
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
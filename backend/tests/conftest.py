@@ -0,0 +1,25 @@
+import pytest
+
+
+class FakeRedis:
+    """The few redis.asyncio.Redis commands the caches use, in a dict (TTLs recorded, not applied)."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key) or 0) + 1
+        return self.data[key]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
@@ -0,0 +1,70 @@
+import os
+import time
+
+import pytest
+
+from core.artifacts import LATEST, LocalArtifactStore, PublishConflict
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalArtifactStore(str(tmp_path / "store"), keep=2)
+
+
+def publish(store, tmp_path, content):
+    path = tmp_path / "model.bin"
+    path.write_text(content)
+    version = store.publish({"model.bin": str(path)})
+    time.sleep(0.002)  # Version ids sort by millisecond
+    return version
+
+
+def test_empty_store_has_no_latest(store):
+    assert store.latest() is None
+    assert store.versions() == []
+
+
+def test_publish_points_latest_at_new_version(store, tmp_path):
+    first = publish(store, tmp_path, "one")
+    assert store.latest() == first
+    second = publish(store, tmp_path, "two")
+    assert store.latest() == second
+    assert store.versions() == [first, second]
+
+    dest = tmp_path / "fetched.bin"
+    store.fetch(first, "model.bin", str(dest))
+    assert dest.read_text() == "one"
+    store.fetch(store.latest(), "model.bin", str(dest))
+    assert dest.read_text() == "two"
+
+
+def test_publish_prunes_old_versions(store, tmp_path):
+    versions = [publish(store, tmp_path, str(i)) for i in range(4)]
+    assert store.versions() == versions[-2:]
+    assert store.latest() == versions[-1]
+    entries = [entry for entry in os.listdir(store.directory) if not entry.startswith(".")]
+    assert sorted(entries) == sorted(versions[-2:] + [LATEST])
+
+
+def test_prune_keeps_latest_even_when_older(store, tmp_path):
+    versions = [publish(store, tmp_path, str(i)) for i in range(2)]
+    with open(os.path.join(store.directory, LATEST), "w") as f:
+        f.write(versions[0])  # Rolled back
+    store.keep = 1
+    store.prune()
+    assert store.versions() == versions
+
+
+def test_conditional_publish(store, tmp_path):
+    path = tmp_path / "model.bin"
+    path.write_text("one")
+    first = store.publish({"model.bin": str(path)}, expected=None)
+    with pytest.raises(PublishConflict) as conflict:
+        store.publish({"model.bin": str(path)}, expected=None)
+    assert conflict.value.latest == first
+
+    second = store.publish({"model.bin": str(path)}, expected=first)
+    with pytest.raises(PublishConflict):
+        store.publish({"model.bin": str(path)}, expected=first)  # Based on a stale LATEST
+    assert store.latest() == second
+    assert sorted(store.versions()) == sorted([first, second])  # The losing copies are dropped
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+import core.autocomplete as autocomplete
+from core.artifacts import LocalArtifactStore
+from core.autocomplete import AutocompleteManager
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    for name in (
+        "TRIE_MODEL_PATH",
+        "LEGACY_TRIE_MODEL_PATH",
+        "PHRASE_COUNTS_PATH",
+        "DELTA_LOG_PATH",
+        "VERSION_PATH",
+    ):
+        path = str(tmp_path / os.path.basename(getattr(autocomplete, name)))
+        monkeypatch.setattr(autocomplete, name, path)
+    monkeypatch.setattr(autocomplete.settings, "AUTOCOMPLETE_ARTIFACT_STORE", "none")
+    monkeypatch.setattr(autocomplete.settings, "AUTOCOMPLETE_COMPACT_EVERY", 1000)
+    return tmp_path
+
+
+def start_manager():
+    manager = AutocompleteManager()
+    manager.initialize()
+    return manager
+
+
+def suggest(manager, query):
+    return asyncio.run(manager.suggest(query))
+
+
+def dead_pid():
+    pid = 999_999
+    while autocomplete._pid_alive(pid):
+        pid -= 1
+    return pid
+
+
+def test_added_texts_survive_a_crash(data_dir):
+    manager = start_manager()
+    asyncio.run(manager.add_texts(["Golden Gate Bridge", None, "Harbour lights"]))
+    assert suggest(manager, "gold")
+
+    # Crash mid-append: the last line is torn
+    with open(manager.delta_log, "a") as f:
+        f.write('["Half written')
+
+    restarted = start_manager()
+    assert restarted.delta_texts == 2
+    assert suggest(restarted, "gold") == suggest(manager, "gold")
+    assert suggest(restarted, "harb")
+
+
+def test_interrupted_compaction_is_replayed(data_dir):
+    manager = start_manager()
+    asyncio.run(manager.add_texts(["Golden Gate Bridge"]))
+    # Crash after the fold took the log, before the model was saved
+    assert manager._begin_fold() is not None
+    asyncio.run(manager.add_texts(["Harbour lights"]))
+
+    restarted = start_manager()
+    assert restarted.delta_texts == 2
+    assert suggest(restarted, "gold") and suggest(restarted, "harb")
+
+
+def test_compaction_clears_the_log(data_dir):
+    manager = start_manager()
+    asyncio.run(manager.add_texts(["Golden Gate Bridge"]))
+    manager.compact()
+    assert not os.path.exists(manager.delta_log)
+    assert not os.path.exists(f"{manager.delta_log}.compacting")
+
+    restarted = start_manager()
+    assert restarted.delta_texts == 0
+    assert suggest(restarted, "gold") == suggest(manager, "gold")
+
+
+def test_trailing_space_suggests_next_words(data_dir):
+    manager = start_manager()
+    asyncio.run(manager.add_texts(["Golden gate at dusk", "Golden gate fog", "Golden hour"]))
+    assert suggest(manager, "golden ") == ["Golden Gate", "Golden Hour"]
+    assert suggest(manager, "golden gate ") == ["Golden Gate at Dusk", "Golden Gate Fog"]
+    # A finished sentence has nothing to continue
+    assert suggest(manager, "golden. ") == []
+
+
+def test_next_words_add_model_and_delta_counts(data_dir):
+    manager = start_manager()
+    asyncio.run(manager.add_texts(["Golden gate at dusk", "Golden gate fog", "Golden hour"]))
+    manager.compact()
+    asyncio.run(manager.add_texts(["Golden hour light", "Golden hour glow"]))
+    # gate: 2 in the model; hour: 1 in the model + 2 in the delta
+    assert manager.trie.next_words(["golden"]) == [("gate", 2), ("hour", 1)]
+    assert suggest(manager, "golden ") == ["Golden Hour", "Golden Gate"]
+
+    manager.compact()
+    assert manager.trie.next_words(["golden"]) == [("hour", 3), ("gate", 2)]
+    assert suggest(manager, "golden ") == ["Golden Hour", "Golden Gate"]
+
+
+def test_flush_folds_added_texts_into_the_model(data_dir):
+    manager = start_manager()
+    asyncio.run(manager.add_texts(["Golden Gate Bridge"]))
+    asyncio.run(manager.flush())
+    assert not os.path.exists(manager.delta_log)
+
+    restarted = start_manager()
+    assert restarted.delta_texts == 0
+    assert suggest(restarted, "gold") == suggest(manager, "gold")
+
+
+def test_logs_of_exited_workers_are_claimed(data_dir):
+    orphan = f"{autocomplete.DELTA_LOG_PATH}.{dead_pid()}"
+    with open(orphan, "w") as f:
+        f.write(json.dumps(["Golden Gate Bridge"]) + "\n")
+
+    manager = start_manager()
+    assert manager.delta_texts == 1
+    assert suggest(manager, "gold")
+    assert not os.path.exists(orphan)
+    # Now this worker's to fold
+    assert os.path.exists(f"{manager.delta_log}.compacting")
+
+
+def test_detector_reset_catches_up_with_texts_added_meanwhile(data_dir):
+    manager = start_manager()
+    asyncio.run(manager.add_texts(["Golden Gate Bridge"] * 3))
+    prepared = manager._prepare_detector()  # Without the lock
+    asyncio.run(manager.add_texts(["Golden Gate Bridge"] * 2))
+    with manager._lock:
+        manager._swap_detector(prepared)
+
+    assert manager.detector.vocab == manager._load_detector(manager.delta_log).vocab
+    assert manager.detector.vocab["golden"] == 5
+
+
+def test_compaction_publishes_for_other_workers(data_dir):
+    store = LocalArtifactStore(str(data_dir / "artifacts"))
+    manager = start_manager()
+    manager.artifact_store = store
+    asyncio.run(manager.add_texts(["Golden Gate Bridge"]))
+    manager.compact()
+    assert store.latest() == manager.version
+
+    other = AutocompleteManager()  # A worker that started before the publish
+    other.artifact_store = store
+    assert other.reload_if_newer()
+    assert other.version == manager.version
+    assert suggest(other, "gold") == suggest(manager, "gold")
+    assert not other.reload_if_newer()  # Already current
+
+
+def test_suggest_while_texts_are_added(data_dir):
+    manager = start_manager()
+    errors = []
+
+    def ingest():
+        try:
+            for i in range(200):
+                manager._add_texts([f"Golden gate view {i}", f"gallery opening night {i}"])
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=ingest)
+    writer.start()
+    while writer.is_alive():
+        manager.compute_suggestions("g", deadline=float("inf"))
+        manager.compute_suggestions("golden ", deadline=float("inf"))
+    writer.join()
+
+    assert not errors
+    assert manager.delta_texts == 400
+
+
+def second_worker(store, name):
+    """Another worker process sharing the data dir and the store."""
+    manager = AutocompleteManager()
+    manager.delta_log = f"{autocomplete.DELTA_LOG_PATH}.{name}"
+    manager.initialize()
+    manager.artifact_store = store
+    return manager
+
+
+def test_compaction_folds_onto_a_newer_published_version(data_dir):
+    store = LocalArtifactStore(str(data_dir / "artifacts"))
+    first = start_manager()
+    first.artifact_store = store
+    other = second_worker(store, "other")
+    asyncio.run(first.add_texts(["Golden Gate Bridge"]))
+    asyncio.run(other.add_texts(["Harbour lights"]))
+
+    other.compact()
+    first.compact()
+
+    assert store.latest() == first.version
+    assert suggest(first, "gold") and suggest(first, "harb")
+
+
+def test_compaction_retries_after_losing_a_publish_race(data_dir):
+    store = LocalArtifactStore(str(data_dir / "artifacts"))
+    manager = start_manager()
+    manager.artifact_store = store
+    other = second_worker(store, "other")
+    asyncio.run(manager.add_texts(["Golden Gate Bridge"]))
+    asyncio.run(other.add_texts(["Harbour lights"]))
+
+    publish = store.publish
+    attempts = []
+
+    def racing_publish(files, expected):
+        attempts.append(expected)
+        if len(attempts) == 1:
+            other.compact()  # Lands between this fold and its publish
+        return publish(files, expected=expected)
+
+    store.publish = racing_publish
+    manager.compact()
+
+    assert attempts == [None, None, other.version]  # Lost once, then folded onto it
+    assert store.latest() == manager.version
+    assert not os.path.exists(f"{manager.delta_log}.compacting")
+    store.publish = publish
+    fresh = AutocompleteManager()  # A worker with nothing loaded yet
+    fresh.artifact_store = store
+    assert fresh.reload_if_newer()
+    assert suggest(fresh, "gold") and suggest(fresh, "harb")
+
+
+def test_failed_publish_keeps_the_delta_log(data_dir):
+    class DownStore(LocalArtifactStore):
+        def publish(self, files, expected=None):
+            raise OSError("store unavailable")
+
+    manager = start_manager()
+    manager.artifact_store = DownStore(str(data_dir / "artifacts"))
+    asyncio.run(manager.add_texts(["Golden Gate Bridge"]))
+    manager.compact()
+
+    assert manager.compacting_delta is None
+    assert suggest(manager, "gold")  # Still served from the delta
+    assert start_manager().delta_texts == 1  # Replayed after a restart
+
+
+def test_suggestion_cache_misses_after_the_index_changes(data_dir):
+    manager = start_manager()
+    asyncio.run(manager.add_texts(["Golden Gate Bridge"]))
+    first = suggest(manager, "gold")
+    assert suggest(manager, "gold ") != first  # Next-word queries are cached apart
+    assert suggest(manager, "Gold") == first
+    assert manager.counters["hits"] == 1
+
+    version = manager.index_version
+    asyncio.run(manager.add_texts(["Goldfish pond"]))
+    assert manager.index_version > version
+    assert any("Goldfish" in s for s in suggest(manager, "gold"))
+    assert manager.counters["hits"] == 1
+
+
+def test_partial_suggestions_are_not_cached(data_dir, monkeypatch):
+    manager = start_manager()
+    asyncio.run(manager.add_texts(["Golden Gate Bridge"]))
+    monkeypatch.setattr(autocomplete.settings, "AUTOCOMPLETE_TIME_BUDGET_MS", 0)
+    suggest(manager, "gold")
+    suggest(manager, "gold")
+    assert len(manager.cache) == 0
+    assert manager.counters["partial"] == 2 and manager.counters["hits"] == 0
+
+
+def test_latency_percentiles_cover_the_configured_window(data_dir, monkeypatch):
+    monkeypatch.setattr(autocomplete.settings, "AUTOCOMPLETE_LATENCY_WINDOW", 100)
+    manager = start_manager()
+    for _ in range(3):
+        suggest(manager, "gold")
+    assert len(manager.latencies_ms) == 3
+
+    manager.latencies_ms.extend(float(ms) for ms in range(1, 201))
+    stats = manager.stats()
+    # Only the last 100 (101..200 ms) count
+    assert (stats["p50_ms"], stats["p99_ms"]) == (151.0, 200.0)
@@ -0,0 +1,316 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import core.cache as cache_module
+from core.cache import (
+    CollectionGeneration,
+    SearchResultCache,
+    SingleFlight,
+    StaleWhileRevalidateCache,
+    TwoTierCache,
+    pack_dense,
+    pack_sparse,
+    unpack_dense,
+    unpack_sparse,
+)
+
+RESULTS = [{"id": "1", "score": 0.9}]
+
+
+def make_cache(redis_client):
+    return SearchResultCache(redis_client, CollectionGeneration(redis_client, local_ttl=0))
+
+
+def test_search_cache_round_trip(fake_redis):
+    async def run():
+        cache = make_cache(fake_redis)
+        generation = await cache.current_generation()
+        assert await cache.get(generation, "Golden Gate", limit=10) is None
+        await cache.set(generation, "Golden Gate", RESULTS, limit=10)
+        # Same normalised query and params
+        assert await cache.get(generation, "  golden gate ", limit=10) == RESULTS
+        # Different params are a different entry
+        assert await cache.get(generation, "golden gate", limit=20) is None
+        return cache.counters
+
+    assert asyncio.run(run()) == {"hits": 1, "misses": 2, "errors": 0}
+
+
+def test_bump_invalidates_search_cache(fake_redis):
+    async def run():
+        cache = make_cache(fake_redis)
+        generation = await cache.current_generation()
+        await cache.set(generation, "bridge", RESULTS)
+        await cache.generation.bump()
+        current = await cache.current_generation()
+        assert current == generation + 1
+        assert await cache.get(current, "bridge") is None
+        assert await cache.get(generation, "bridge") == RESULTS
+
+    asyncio.run(run())
+
+
+def test_result_stored_under_generation_read_before_search(fake_redis):
+    async def run():
+        cache = make_cache(fake_redis)
+        generation = await cache.current_generation()
+        await cache.generation.bump()  # Ingest lands while the search runs
+        await cache.set(generation, "bridge", RESULTS)
+        assert await cache.get(await cache.current_generation(), "bridge") is None
+
+    asyncio.run(run())
+
+
+def test_search_cache_without_redis():
+    async def run():
+        cache = make_cache(None)
+        generation = await cache.current_generation()
+        assert generation is None
+        await cache.set(generation, "bridge", RESULTS)
+        assert await cache.get(generation, "bridge") is None
+
+    asyncio.run(run())
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    calls = []
+
+    async def run():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return RESULTS
+
+        waiters = [asyncio.ensure_future(flight.do("q", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        assert all(result is RESULTS for result in results)
+        assert flight.stats()["in_flight"] == 0
+        # The key is free again once done
+        await flight.do("q", fetch)
+        return flight.counters
+
+    assert asyncio.run(run()) == {"executed": 2, "coalesced": 2}
+    assert len(calls) == 2
+
+
+def test_single_flight_shares_exceptions():
+    async def run():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            raise ValueError("Qdrant down")
+
+        waiters = [asyncio.ensure_future(flight.do("q", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+def test_single_flight_survives_a_cancelled_caller():
+    async def run():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return RESULTS
+
+        gone = asyncio.ensure_future(flight.do("q", fetch))
+        staying = asyncio.ensure_future(flight.do("q", fetch))
+        await asyncio.sleep(0)
+        gone.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await staying is RESULTS
+        assert gone.cancelled()
+
+    asyncio.run(run())
+
+
+def test_single_flight_clears_a_cancelled_computation():
+    async def run():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(60)
+
+        waiter = asyncio.ensure_future(flight.do("q", fetch))
+        await asyncio.sleep(0)
+        flight._inflight["q"].cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+def make_swr(redis_client):
+    return StaleWhileRevalidateCache(
+        redis_client,
+        CollectionGeneration(redis_client, local_ttl=0),
+        SingleFlight(),
+        namespace="gallery",
+    )
+
+
+class Source:
+    """fetch() returning "v1", "v2", ... (or raising once `fail` is set)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def fetch(self):
+        self.calls += 1
+        if self.fail:
+            raise ValueError("Qdrant down")
+        return f"v{self.calls}"
+
+
+async def settle(cache):
+    await asyncio.gather(*list(cache._refreshing.values()), return_exceptions=True)
+
+
+def test_stale_entry_is_served_during_one_refresh(fake_redis):
+    async def run():
+        cache = make_swr(fake_redis)
+        source = Source()
+        assert await cache.get("page", source.fetch) == "v1"
+        assert await cache.get("page", source.fetch) == "v1"  # Fresh
+        assert source.calls == 1
+
+        await cache.generation.bump()
+        stale = await asyncio.gather(*(cache.get("page", source.fetch) for _ in range(3)))
+        assert stale == ["v1", "v1", "v1"]
+        assert cache.stats()["refreshing"] == 1
+        await settle(cache)
+        assert source.calls == 2
+        assert await cache.get("page", source.fetch) == "v2"
+        return cache.counters
+
+    counters = asyncio.run(run())
+    assert counters["misses"] == 1 and counters["refreshes"] == 1
+    assert counters["stale_hits"] == 3 and counters["fresh_hits"] == 2
+
+
+def test_failed_refresh_keeps_serving_the_stale_entry(fake_redis):
+    async def run():
+        cache = make_swr(fake_redis)
+        source = Source()
+        await cache.get("page", source.fetch)
+        await cache.generation.bump()
+
+        source.fail = True
+        assert await cache.get("page", source.fetch) == "v1"
+        await settle(cache)
+        assert cache.counters["errors"] == 1
+        # Still stale: served again and retried
+        assert await cache.get("page", source.fetch) == "v1"
+        source.fail = False
+        await settle(cache)
+        assert await cache.get("page", source.fetch) == "v3"
+
+    asyncio.run(run())
+
+
+def test_failed_fetch_on_a_miss_raises(fake_redis):
+    async def run():
+        cache = make_swr(fake_redis)
+        source = Source()
+        source.fail = True
+        with pytest.raises(ValueError):
+            await cache.get("page", source.fetch)
+        assert await fake_redis.get(cache.key("page")) is None
+
+    asyncio.run(run())
+
+
+def test_packed_vectors_round_trip_as_float32():
+    dense = [0.1, -2.5, 3.0, 1e-8]
+    packed = unpack_dense(pack_dense(dense))
+    assert len(pack_dense(dense)) == 4 * len(dense)
+    assert packed == pytest.approx(dense, rel=1e-6)
+    assert packed[1:3] == [-2.5, 3.0]  # Exact in float32
+
+    sparse = {"indices": [3, 17, 4_000_000_000], "values": [0.5, 1.25, -0.1]}
+    unpacked = unpack_sparse(pack_sparse(sparse))
+    assert unpacked["indices"] == sparse["indices"]
+    assert unpacked["values"] == pytest.approx(sparse["values"], rel=1e-6)
+    assert unpack_sparse(pack_sparse({"indices": [], "values": []})) == {"indices": [], "values": []}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        cache_module, "time", SimpleNamespace(monotonic=lambda: clock.now, time=time.time)
+    )
+    return clock
+
+
+def make_two_tier(redis_client, **kwargs):
+    return TwoTierCache("emb:test", pack_dense, unpack_dense, redis_client, **kwargs)
+
+
+def test_two_tier_cache_promotes_redis_hits_to_memory(fake_redis):
+    async def run():
+        writer = make_two_tier(fake_redis, redis_ttl=60)
+        await writer.set("Golden Gate", [0.5, 0.25])
+        assert list(fake_redis.ttls.values()) == [60]
+
+        # Another worker: empty memory tier, same Redis
+        reader = make_two_tier(fake_redis)
+        assert await reader.get("  golden gate ") == [0.5, 0.25]
+        fake_redis.data.clear()
+        assert await reader.get("golden gate") == [0.5, 0.25]  # From memory now
+        assert await reader.get("harbour") is None
+        return reader.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["redis_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["memory_entries"] == 1
+
+
+def test_two_tier_cache_memory_entries_expire(fake_redis, clock):
+    async def run():
+        cache = make_two_tier(fake_redis, memory_ttl=10)
+        await cache.set("bridge", [1.0])
+        clock.now += 5
+        assert await cache.get("bridge") == [1.0]
+        assert cache.counters["memory_hits"] == 1
+
+        # Expired in memory: read from Redis again and re-promoted
+        clock.now += 10
+        assert await cache.get("bridge") == [1.0]
+        assert cache.counters["redis_hits"] == 1
+
+        clock.now += 11
+        fake_redis.data.clear()
+        assert await cache.get("bridge") is None
+
+    asyncio.run(run())
+
+
+def test_two_tier_cache_works_without_redis(clock):
+    async def run():
+        cache = make_two_tier(None, memory_ttl=10)
+        await cache.set("bridge", [1.0])
+        assert await cache.get("bridge") == [1.0]
+        clock.now += 11
+        assert await cache.get("bridge") is None
+
+    asyncio.run(run())
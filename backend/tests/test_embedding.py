@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from core.embedding import EmbeddingBatcher, JinaRequestError
+
+
+class FakeTransport:
+    """Embeds {"text": t} as [len(t)]; `bad` inputs make the call fail with a 400."""
+
+    def __init__(self, bad=(), status_code=400):
+        self.bad = set(bad)
+        self.status_code = status_code
+        self.calls = []
+
+    async def __call__(self, inputs, task):
+        self.calls.append(([item["text"] for item in inputs], task))
+        if any(item["text"] in self.bad for item in inputs):
+            raise JinaRequestError("rejected", self.status_code)
+        return [[float(len(item["text"]))] for item in inputs]
+
+
+def submit_all(batcher, texts, task=None):
+    async def run():
+        return await asyncio.gather(
+            *(batcher.submit({"text": text}, task) for text in texts),
+            return_exceptions=True,
+        )
+
+    return asyncio.run(run())
+
+
+def test_concurrent_submits_share_one_call():
+    transport = FakeTransport()
+    batcher = EmbeddingBatcher(transport, max_batch_size=16, max_wait_ms=5)
+    results = submit_all(batcher, ["a", "bb", "ccc", "bb"])
+    # Each caller gets its own embedding, in submit order; duplicates are sent once
+    assert results == [[1.0], [2.0], [3.0], [2.0]]
+    assert transport.calls == [(["a", "bb", "ccc"], None)]
+
+
+def test_full_batch_is_sent_without_waiting():
+    transport = FakeTransport()
+    batcher = EmbeddingBatcher(transport, max_batch_size=2, max_wait_ms=60_000)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit({"text": t}) for t in ["a", "bb", "ccc", "dddd"])),
+            timeout=1,
+        )
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0], [4.0]]
+    assert [inputs for inputs, _ in transport.calls] == [["a", "bb"], ["ccc", "dddd"]]
+
+
+def test_linger_flushes_a_partial_batch():
+    transport = FakeTransport()
+    batcher = EmbeddingBatcher(transport, max_batch_size=16, max_wait_ms=5)
+
+    async def run():
+        first = await batcher.submit({"text": "a"})
+        second = await batcher.submit({"text": "bb"})
+        return first, second
+
+    assert asyncio.run(run()) == ([1.0], [2.0])
+    assert [inputs for inputs, _ in transport.calls] == [["a"], ["bb"]]
+
+
+def test_tasks_are_batched_separately():
+    transport = FakeTransport()
+    batcher = EmbeddingBatcher(transport, max_batch_size=16, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit({"text": "a"}, "retrieval.query"),
+            batcher.submit({"text": "bb"}, "retrieval.passage"),
+            batcher.submit({"text": "ccc"}, "retrieval.query"),
+        )
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0]]
+    assert sorted(transport.calls) == [
+        (["a", "ccc"], "retrieval.query"),
+        (["bb"], "retrieval.passage"),
+    ]
+
+
+def test_rejected_batch_is_retried_per_input():
+    transport = FakeTransport(bad={"bb"})
+    batcher = EmbeddingBatcher(transport, max_batch_size=16, max_wait_ms=5)
+    results = submit_all(batcher, ["a", "bb", "ccc"])
+
+    assert results[0] == [1.0] and results[2] == [3.0]
+    assert isinstance(results[1], JinaRequestError)
+    assert transport.calls[0] == (["a", "bb", "ccc"], None)
+    assert sorted(inputs for inputs, _ in transport.calls[1:]) == [["a"], ["bb"], ["ccc"]]
+
+
+def test_server_errors_fail_the_whole_batch():
+    transport = FakeTransport(bad={"bb"}, status_code=503)
+    batcher = EmbeddingBatcher(transport, max_batch_size=16, max_wait_ms=5)
+    results = submit_all(batcher, ["a", "bb", "ccc"])
+
+    assert all(isinstance(result, JinaRequestError) for result in results)
+    assert len(transport.calls) == 1  # Not retried input by input
+
+
+def test_submit_times_out():
+    async def never(inputs, task):
+        await asyncio.sleep(60)
+
+    batcher = EmbeddingBatcher(never, max_wait_ms=1)
+    with pytest.raises(ValueError, match="timed out"):
+        asyncio.run(batcher.submit({"text": "a"}, timeout=0.05))
@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.gallery import GalleryPager
+
+
+class FakeQdrant:
+    """Scroll over sorted string ids, like Qdrant's id-ordered scroll."""
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+
+    async def scroll(self, limit=20, offset=None):
+        ids = sorted(self.ids)
+        start = 0 if offset is None else next(i for i, x in enumerate(ids) if x >= offset)
+        window = ids[start : start + limit]
+        next_offset = ids[start + limit] if start + limit < len(ids) else None
+        return [SimpleNamespace(id=x, payload={}) for x in window], next_offset
+
+
+class UncachedBlocks:
+    async def get(self, name, fetch):
+        return await fetch()
+
+
+def read_all(pager, limit, cursor=None, before_each=None):
+    async def run():
+        seen, next_cursor = [], cursor
+        while True:
+            if before_each:
+                before_each(len(seen))
+            points, next_cursor = await pager.page(limit, next_cursor)
+            seen.extend(point["id"] for point in points)
+            if next_cursor is None:
+                return seen
+
+    return asyncio.run(run())
+
+
+IDS = [f"{i:03d}" for i in range(0, 40, 2)]
+
+
+@pytest.mark.parametrize("limit", [1, 5, 8, 13, 50])
+def test_pages_cover_collection_once(limit):
+    pager = GalleryPager(FakeQdrant(IDS), UncachedBlocks(), block_size=8)
+    assert read_all(pager, limit) == IDS
+
+
+def test_insert_before_cursor_does_not_repeat_items():
+    qdrant = FakeQdrant(IDS)
+    pager = GalleryPager(qdrant, UncachedBlocks(), block_size=8)
+
+    def insert_after_first_page(seen):
+        if seen == 5:
+            qdrant.ids += ["001", "003"]  # Lands in the block being read
+
+    assert read_all(pager, 5, before_each=insert_after_first_page) == IDS
+
+
+@pytest.mark.parametrize(
+    "cursor, parsed",
+    [
+        (None, (None, 0, None)),
+        ("abc", ("abc", 0, None)),  # Bare point id
+        ("abc:3:def", ("abc", 3, "def")),
+        (":3:def", (None, 3, "def")),
+    ],
+)
+def test_parse_cursor(cursor, parsed):
+    assert GalleryPager.parse_cursor(cursor) == parsed
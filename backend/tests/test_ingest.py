@@ -0,0 +1,105 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+
+import core.ingest as ingest
+from core.ingest import IngestItem, IngestPipeline
+
+
+def jpeg_bytes(color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class InlinePool:
+    """Runs transcode jobs in-process instead of on the process pool."""
+
+    max_workers = 2
+
+    async def submit(self, fn, *args, block=False):
+        return fn(*args)
+
+
+class FakeJina:
+    def __init__(self, fail_text=None):
+        self.fail_text = fail_text
+
+    async def get_embedding(self, text=None, image_base64=None):
+        if text is not None and text == self.fail_text:
+            raise RuntimeError("Jina down")
+        return [0.1, 0.2]
+
+
+class FakeSparse:
+    async def encode_documents(self, texts):
+        return [{"indices": [1], "values": [1.0]} for _ in texts]
+
+
+class FakeQdrant:
+    def __init__(self):
+        self.batches = []
+
+    async def upsert_points(self, points):
+        self.batches.append(points)
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    async def upload_many_to_r2(files):
+        return [f"https://cdn/{name}" for _, name in files]
+
+    monkeypatch.setattr(ingest, "transcode_pool", InlinePool())
+    monkeypatch.setattr(ingest, "upload_many_to_r2", upload_many_to_r2)
+
+
+def run_pipeline(pipeline, items):
+    async def collect():
+        return [result async for result in pipeline.run(items)]
+
+    return asyncio.run(collect())
+
+
+def test_uploads_are_read_in_the_transcode_stage():
+    upload = UploadFile(io.BytesIO(jpeg_bytes()), filename="bridge.jpg")
+    item = IngestItem.from_metadata(0, "bridge.jpg", upload=upload)
+    assert item.file_bytes is None  # Not read until admitted
+
+    asyncio.run(ingest.transcode_item(item))
+
+    assert item.upload is None and upload.file.closed
+    assert item.preview_webp and item.original_webp and item.base64_str
+    assert item.file_bytes is None  # Freed once transcoded
+
+
+def test_pipeline_reports_every_item():
+    qdrant = FakeQdrant()
+    written = []
+
+    async def on_write(batch):
+        written.extend(item.index for item in batch)
+
+    items = [
+        IngestItem.from_metadata(
+            i, f"photo{i}.jpg", upload=UploadFile(io.BytesIO(jpeg_bytes()), filename=f"photo{i}.jpg")
+        )
+        for i in range(5)
+    ]
+    pipeline = IngestPipeline(
+        FakeJina(fail_text=items[2].metadata_text),
+        qdrant,
+        FakeSparse(),
+        write_batch_size=4,
+        on_write=on_write,
+    )
+
+    results = run_pipeline(pipeline, items)
+
+    assert sorted(result.index for result in results) == list(range(5))
+    failed = [result for result in results if result.status == "error"]
+    assert [(result.index, result.stage) for result in failed] == [(2, "embed")]
+    assert sorted(written) == [0, 1, 3, 4]
+    assert sum(len(batch) for batch in qdrant.batches) == 4
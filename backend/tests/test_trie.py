@@ -0,0 +1,186 @@
+import time
+
+import pytest
+
+from core.trie import FORMAT_VERSION, CompactTrie, Trie, load_trie
+
+WORDS = [
+    ("golden", "golden gate bridge"),
+    ("golden", "golden hour"),
+    ("golden", "golden hour"),
+    ("gate", "golden gate bridge"),
+    ("gallery", None),
+    ("garden", "japanese garden"),
+    ("garden", None),
+    ("bridge", "golden gate bridge"),
+    ("bridge", "bridge at night"),
+    ("night", "bridge at night"),
+    ("sunset", "sunset over the bay"),
+    ("sun", None),
+]
+
+
+@pytest.fixture
+def trie():
+    trie = Trie()
+    for word, phrase in WORDS:
+        trie.insert(word, phrase)
+    trie.add_continuation(["golden"], "gate")
+    trie.add_continuation(["golden"], "hour")
+    trie.add_continuation(["golden"], "hour")
+    trie.add_continuation(["golden", "gate"], "bridge")
+    return trie
+
+
+@pytest.fixture
+def compact(trie, tmp_path):
+    path = str(tmp_path / "trie_model.bin")
+    trie.save(path)
+    return load_trie(path)
+
+
+def test_saved_model_opens_as_compact_trie(compact):
+    assert isinstance(compact, CompactTrie)
+
+
+@pytest.mark.parametrize("prefix", ["", "g", "go", "gol", "ga", "b", "s", "sun", "x"])
+@pytest.mark.parametrize("limit", [1, 3, 10])
+def test_compact_search_matches_trie(trie, compact, prefix, limit):
+    assert compact.search(prefix, limit) == trie.search(prefix, limit)
+
+
+@pytest.mark.parametrize("context", [["golden"], ["golden", "gate"], ["bridge"]])
+def test_compact_next_words_match_trie(trie, compact, context):
+    assert compact.next_words(context) == trie.next_words(context)
+
+
+def test_next_words_rank_by_continuation_count(trie, compact):
+    for model in (trie, compact):
+        assert model.next_words(["golden"]) == [("hour", 2), ("gate", 1)]
+        assert model.next_words(["golden"], limit=1) == [("hour", 2)]
+        assert model.next_words(["golden", "gate"]) == [("bridge", 1)]
+        assert model.next_words(["sunset"]) == []
+
+
+def test_merge_sums_continuation_counts(trie, compact, tmp_path):
+    delta = Trie()
+    for _ in range(3):
+        delta.add_continuation(["golden"], "gate")
+    merged = Trie()
+    merged.merge(compact)
+    merged.merge(delta)
+    assert merged.next_words(["golden"]) == [("gate", 4), ("hour", 2)]
+
+    path = str(tmp_path / "merged.bin")
+    merged.save(path)
+    assert load_trie(path).next_words(["golden"]) == [("gate", 4), ("hour", 2)]
+
+
+def test_merged_tries_round_trip(trie, compact, tmp_path):
+    merged = Trie()
+    merged.merge(compact)
+    merged.merge(trie)
+    path = str(tmp_path / "merged.bin")
+    merged.save(path)
+    assert load_trie(path).search("g", 10) == merged.search("g", 10)
+
+
+def edit_distance(a, b):
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        prev, row = row, [i]
+        for j, cb in enumerate(b, 1):
+            row.append(min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (ca != cb)))
+    return row[-1]
+
+
+def prefix_distance(pattern, word):
+    """Edits to turn `pattern` into some prefix of `word`."""
+    return min(edit_distance(pattern, word[:k]) for k in range(len(word) + 1))
+
+
+@pytest.mark.parametrize(
+    "pattern, max_distance, expected",
+    [
+        ("goldn", 1, "golden hour"),  # Deletion
+        ("golxen", 1, "golden hour"),  # Substitution
+        ("gollden", 1, "golden hour"),  # Insertion
+        ("brigde", 2, "golden gate bridge"),  # Transposition = 2 edits
+    ],
+)
+def test_search_fuzzy_finds_single_edits(trie, compact, pattern, max_distance, expected):
+    assert expected in trie.search_fuzzy(pattern, max_distance)
+    assert expected in compact.search_fuzzy(pattern, max_distance)
+
+
+def test_search_fuzzy_respects_max_distance(trie):
+    assert trie.search_fuzzy("brigde", 1) == []
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2])
+@pytest.mark.parametrize("pattern", ["", "g", "gxrden", "sunet", "brdge", "nihgt", "zzz"])
+def test_search_fuzzy_matches_brute_force(pattern, max_distance):
+    words = sorted({word for word, _ in WORDS})
+    trie = Trie()
+    for word in words:
+        trie.insert(word)
+
+    results = trie.search_fuzzy(pattern, max_distance, limit=len(words))
+
+    expected = {word for word in words if prefix_distance(pattern, word) <= max_distance}
+    assert set(results) == expected
+    distances = [prefix_distance(pattern, word) for word in results]
+    assert distances == sorted(distances)  # Closest first
+
+
+@pytest.mark.parametrize("top_k", [3, 10])
+@pytest.mark.parametrize("limit", [2, 10, 25])
+def test_compact_completions_beyond_stored_top_k(top_k, limit):
+    trie = Trie()
+    for i in range(20):
+        for _ in range(i + 1):
+            trie.insert(f"photo{i:02d}")
+    compact = CompactTrie(memoryview(trie.to_bytes(top_k=top_k)))
+
+    assert compact.top_k == top_k
+    assert compact.search("photo", limit) == trie.search("photo", limit)
+    assert compact.search("photo", limit)[0] == "photo19"  # Most frequent first
+
+
+def test_copy_leaves_original_unchanged(trie):
+    before = (trie.search("g", 10), trie.next_words(["golden"]))
+    copy = trie.copy()
+    copy.insert("golden", "golden retriever")
+    copy.insert("glacier", "glacier point")
+    copy.add_continuation(["golden"], "retriever")
+    copy.merge(trie)
+
+    assert (trie.search("g", 10), trie.next_words(["golden"])) == before
+    expected = Trie()
+    for _ in range(2):
+        expected.merge(trie)
+    expected.insert("golden", "golden retriever")
+    expected.insert("glacier", "glacier point")
+    expected.add_continuation(["golden"], "retriever")
+    assert copy.search("g", 20) == expected.search("g", 20)
+    assert copy.next_words(["golden"]) == expected.next_words(["golden"])
+
+
+def test_prefix_walk_stops_at_deadline():
+    trie = Trie()
+    for i in range(20000):
+        trie.insert(f"a{i}")
+
+    start = time.monotonic()
+    partial = trie.search("a", 10, deadline=start)
+    assert time.monotonic() - start < 0.05
+    assert len(partial) == 10  # Best of the nodes seen before the deadline
+    assert len(trie.search("a", 10)) == 10
+    assert trie.search_fuzzy("a", 1, 10, deadline=start)
+
+
+def test_other_format_versions_are_rejected(trie):
+    data = bytearray(trie.to_bytes())
+    data[8:10] = (FORMAT_VERSION + 1).to_bytes(2, "little")
+    with pytest.raises(ValueError):
+        CompactTrie(memoryview(bytes(data)))
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.utils import TranscodePool, TranscodeQueueFull
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # 3 slots, one of them held back for interactive submits
+    pool = TranscodePool(max_workers=1, queue_size=2, interactive_reserve=1)
+    executor = ThreadPoolExecutor(max_workers=8)
+    monkeypatch.setattr(pool, "_get_executor", lambda: executor)
+    yield pool
+    executor.shutdown(wait=False)
+
+
+class Jobs:
+    """Jobs that block until released, recording how many have started."""
+
+    def __init__(self):
+        self.started = 0
+        self.gate = threading.Event()
+        self._lock = threading.Lock()
+
+    def job(self, name):
+        with self._lock:
+            self.started += 1
+        self.gate.wait(5)
+        return name
+
+
+def test_bulk_submits_leave_the_interactive_reserve(pool):
+    jobs = Jobs()
+
+    async def scenario():
+        bulk = [
+            asyncio.create_task(pool.submit(jobs.job, f"bulk-{i}", block=True))
+            for i in range(4)
+        ]
+        await asyncio.sleep(0.05)
+        assert jobs.started == 2  # The others wait for a bulk slot
+
+        interactive = asyncio.create_task(pool.submit(jobs.job, "upload"))
+        await asyncio.sleep(0.05)
+        assert jobs.started == 3
+
+        jobs.gate.set()
+        return await asyncio.gather(*bulk), await interactive
+
+    bulk, interactive = asyncio.run(scenario())
+    assert bulk == ["bulk-0", "bulk-1", "bulk-2", "bulk-3"]
+    assert interactive == "upload"
+
+
+def test_interactive_submit_raises_when_every_slot_is_taken(pool):
+    jobs = Jobs()
+
+    async def scenario():
+        running = [asyncio.create_task(pool.submit(jobs.job, i)) for i in range(3)]
+        await asyncio.sleep(0.05)
+        try:
+            with pytest.raises(TranscodeQueueFull) as full:
+                await pool.submit(jobs.job, "upload")
+            assert full.value.retry_after >= 1
+        finally:
+            jobs.gate.set()
+        await asyncio.gather(*running)
+        # Slots free again
+        assert await pool.submit(jobs.job, "upload") == "upload"
+
+    asyncio.run(scenario())
+    assert jobs.started == 4